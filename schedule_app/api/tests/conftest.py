@@ -79,4 +79,45 @@ def mock_db():
                 "equipment_type": "rkt_ge"
             }
         ]
-    } 
\ No newline at end of file
+    } 
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached calendars must not leak between tests"""
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
+@pytest.fixture
+def make_manager_user(db):
+    """Factory of users with a manager profile: make_manager_user(email='head@example.com', full_name='Head')"""
+    from django.contrib.auth import get_user_model
+    from api.models import Employee
+
+    def make(email='manager@example.com', password='password123', full_name='Manager', **employee_fields):
+        user = get_user_model().objects.create_user(email=email, password=password)
+        Employee.objects.create(user=user, full_name=full_name, email=email, role='manager', **employee_fields)
+        return user
+    return make
+
+@pytest.fixture
+def manager_user(make_manager_user):
+    """User with a manager profile and the default email"""
+    return make_manager_user()
+
+@pytest.fixture
+def make_employee(db):
+    """Factory of staff employees with skills: make_employee('Employee 0', {mri: 'primary'}, shift_availability='day_only').
+
+    The email defaults to the lowercased name without spaces at example.com.
+    """
+    from api.models import Employee, EmployeeEquipmentSkill
+
+    def make(full_name, skills=None, **fields):
+        fields.setdefault('email', f"{full_name.lower().replace(' ', '')}@example.com")
+        employee = Employee.objects.create(full_name=full_name, **fields)
+        for equipment, skill_level in (skills or {}).items():
+            EmployeeEquipmentSkill.objects.create(employee=employee, equipment=equipment, skill_level=skill_level)
+        return employee
+    return make
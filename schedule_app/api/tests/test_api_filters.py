@@ -0,0 +1,123 @@
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import Employee, Equipment, Schedule, TimeOffRequest
+
+User = get_user_model()
+
+START = date(2025, 1, 1)
+
+@pytest.fixture
+def api_client():
+    user = User.objects.create_user(email='manager@example.com', password='password123')
+    Employee.objects.create(user=user, full_name='Manager', email='manager@example.com', role='manager')
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+@pytest.fixture
+def history():
+    equipment = [
+        Equipment.objects.create(name='MRI', equipment_type='mrt'),
+        Equipment.objects.create(name='CT GE', equipment_type='rkt_ge', shift_night=True),
+    ]
+    employees = [
+        Employee.objects.create(full_name=f'Employee {index}', email=f'employee{index}@example.com')
+        for index in range(4)
+    ]
+    for day in range(90):
+        for index, shift_type in enumerate(['morning', 'evening', 'night']):
+            Schedule.objects.create(
+                employee=employees[(day + index) % 4],
+                equipment=equipment[index // 2],
+                date=START + timedelta(days=day),
+                shift_type=shift_type
+            )
+    return {'employees': employees, 'equipment': equipment}
+
+def collect(client, url, params):
+    rows = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == 200
+        rows.extend(response.json()['results'])
+        if not response.json()['next']:
+            return rows
+        response = client.get(response.json()['next'])
+
+@pytest.mark.django_db
+class TestScheduleFilters:
+    def test_date_range_and_filters(self, api_client, history):
+        employee = history['employees'][1]
+        response = api_client.get(reverse('schedule-list'), {
+            'start_date': '2025-02-01',
+            'end_date': '2025-02-28',
+            'employee': employee.id,
+            'shift_type': 'morning,evening',
+            'page_size': 100
+        })
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        expected = Schedule.objects.filter(
+            date__range=(date(2025, 2, 1), date(2025, 2, 28)),
+            employee=employee,
+            shift_type__in=['morning', 'evening']
+        ).count()
+        assert response.json()['count'] == len(results) == expected > 0
+        assert [row['date'] for row in results] == sorted(row['date'] for row in results)
+
+    def test_invalid_params(self, api_client, history):
+        assert api_client.get(reverse('schedule-list'), {'start_date': '01.02.2025'}).status_code == 400
+        assert api_client.get(reverse('schedule-list'), {'employee': 'abc'}).status_code == 400
+        assert api_client.get(reverse('schedule-list'), {'shift_type': 'lunch'}).status_code == 400
+
+    def test_keyset_pages_cover_month_once(self, api_client, history):
+        params = {'pagination': 'cursor', 'start_date': '2025-02-01', 'end_date': '2025-02-28', 'page_size': 7}
+
+        rows = collect(api_client, reverse('schedule-list'), params)
+
+        ids = [row['id'] for row in rows]
+        assert len(ids) == len(set(ids)) == 28 * 3
+        assert [(row['date'], row['id']) for row in rows] == sorted((row['date'], row['id']) for row in rows)
+
+    def test_keyset_page_query_count(self, api_client, history, django_assert_num_queries):
+        first_page = api_client.get(reverse('schedule-list'), {'pagination': 'cursor', 'page_size': 50}).json()
+
+        # requesting employee, change counters and the page itself, no COUNT and no OFFSET
+        with django_assert_num_queries(3):
+            response = api_client.get(first_page['next'])
+
+        assert len(response.json()['results']) == 50
+        assert 'count' not in response.json()
+
+    def test_invalid_cursor(self, api_client, history):
+        response = api_client.get(reverse('schedule-list'), {'pagination': 'cursor', 'cursor': 'garbage'})
+
+        assert response.status_code == 404
+
+@pytest.mark.django_db
+class TestTimeOffFilters:
+    def test_overlap_and_keyset(self, api_client, history):
+        employees = history['employees']
+        for index in range(10):
+            TimeOffRequest.objects.create(
+                employee=employees[index % 4],
+                start_date=START + timedelta(days=index * 10),
+                end_date=START + timedelta(days=index * 10 + 4),
+                reason='Vacation',
+                status='approved' if index % 2 else 'pending'
+            )
+
+        response = api_client.get(reverse('timeoffrequest-list'), {
+            'start_date': '2025-01-14',
+            'end_date': '2025-01-22',
+            'status': 'approved'
+        })
+
+        assert [(row['start_date'], row['status']) for row in response.json()['results']] == [('2025-01-11', 'approved')]
+
+        rows = collect(api_client, reverse('timeoffrequest-list'), {'pagination': 'cursor', 'page_size': 3})
+        assert len(rows) == 10
@@ -0,0 +1,56 @@
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import Employee, Equipment, Schedule, EmployeeEquipmentSkill, TimeOffRequest
+
+User = get_user_model()
+
+START = date(2025, 3, 1)
+
+@pytest.fixture
+def api_client(manager_user):
+    client = APIClient()
+    client.force_authenticate(manager_user)
+    return client
+
+def seed(count):
+    equipment = [Equipment.objects.create(name=f'Equipment {index}', equipment_type='mrt') for index in range(3)]
+    for index in range(count):
+        user = User.objects.create_user(email=f'employee{index}@example.com')
+        employee = Employee.objects.create(user=user, full_name=f'Employee {index}', email=f'employee{index}@example.com')
+        for unit in equipment:
+            EmployeeEquipmentSkill.objects.create(employee=employee, equipment=unit)
+        Schedule.objects.create(employee=employee, equipment=equipment[index % 3], date=START + timedelta(days=index), shift_type='morning')
+        TimeOffRequest.objects.create(employee=employee, start_date=START, end_date=START, reason='Vacation')
+
+@pytest.mark.django_db
+class TestApiQueryCounts:
+    # requesting employee, page count, page rows (+ one prefetch per relation)
+    @pytest.mark.parametrize('count', [5, 20])
+    @pytest.mark.parametrize('url_name, queries', [
+        # one more for the schedule change counters behind the ETag
+        ('schedule-list', 4),
+        ('timeoffrequest-list', 3),
+        ('employeeequipmentskill-list', 3),
+        ('employee-list', 4),
+    ])
+    def test_list_query_count_is_constant(self, api_client, django_assert_num_queries, count, url_name, queries):
+        seed(count)
+
+        with django_assert_num_queries(queries):
+            response = api_client.get(reverse(url_name))
+
+        assert response.status_code == 200
+        assert response.json()['count'] >= count
+
+    def test_staff_sees_only_own_schedule(self, django_assert_num_queries):
+        seed(5)
+        client = APIClient()
+        client.force_authenticate(User.objects.get(email='employee3@example.com'))
+
+        with django_assert_num_queries(4):
+            response = client.get(reverse('schedule-list'))
+
+        assert [entry['employee_name'] for entry in response.json()['results']] == ['Employee 3']
@@ -0,0 +1,160 @@
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import Employee, Equipment, Schedule
+from api.scheduling import bulk
+from api.scheduling.bulk import apply_schedule_operations
+
+User = get_user_model()
+
+START = date(2025, 3, 3)
+
+@pytest.fixture
+def staff(make_employee):
+    mri = Equipment.objects.create(name='MRI', equipment_type='mrt')
+    ct = Equipment.objects.create(name='CT GE', equipment_type='rkt_ge', shift_night=True)
+    employees = [make_employee(f'Employee {index}', {mri: 'primary', ct: 'secondary'}) for index in range(4)]
+    return {'employees': employees, 'mri': mri, 'ct': ct}
+
+@pytest.fixture
+def manager_client(manager_user):
+    client = APIClient()
+    client.force_authenticate(manager_user)
+    return client
+
+def entries():
+    return set(Schedule.objects.values_list('id', 'employee_id', 'equipment_id', 'date', 'shift_type'))
+
+@pytest.mark.django_db
+class TestApplyScheduleOperations:
+    def test_mixed_batch(self, staff):
+        first, second, third, _ = staff['employees']
+        mri, ct = staff['mri'], staff['ct']
+        moved = Schedule.objects.create(employee=first, equipment=mri, date=START, shift_type='morning')
+        updated = Schedule.objects.create(employee=second, equipment=mri, date=START, shift_type='morning')
+        deleted = Schedule.objects.create(employee=third, equipment=mri, date=START, shift_type='evening')
+
+        applied, results = apply_schedule_operations([
+            {'op': 'move', 'id': moved.id, 'date': START + timedelta(days=1)},
+            {'op': 'update', 'id': updated.id, 'equipment': ct.id, 'shift_type': 'night'},
+            {'op': 'delete', 'id': deleted.id},
+            {'op': 'create', 'employee': third.id, 'equipment': mri.id, 'date': START + timedelta(days=2), 'shift_type': 'evening'},
+        ])
+
+        assert applied
+        assert [result['status'] for result in results] == ['ok'] * 4
+        created_id = results[3]['id']
+        assert entries() == {
+            (moved.id, first.id, mri.id, START + timedelta(days=1), 'morning'),
+            (updated.id, second.id, ct.id, START, 'night'),
+            (created_id, third.id, mri.id, START + timedelta(days=2), 'evening'),
+        }
+
+    def test_swap_days_keeps_ids(self, staff):
+        first = staff['employees'][0]
+        mri = staff['mri']
+        monday = Schedule.objects.create(employee=first, equipment=mri, date=START, shift_type='morning')
+        tuesday = Schedule.objects.create(employee=first, equipment=mri, date=START + timedelta(days=1), shift_type='evening')
+
+        applied, _ = apply_schedule_operations([
+            {'op': 'move', 'id': monday.id, 'date': START + timedelta(days=1)},
+            {'op': 'move', 'id': tuesday.id, 'date': START},
+        ])
+
+        assert applied
+        assert entries() == {
+            (monday.id, first.id, mri.id, START + timedelta(days=1), 'morning'),
+            (tuesday.id, first.id, mri.id, START, 'evening'),
+        }
+
+    def test_invalid_operation_rejects_whole_batch(self, staff):
+        first, second, _, _ = staff['employees']
+        mri = staff['mri']
+        entry = Schedule.objects.create(employee=first, equipment=mri, date=START, shift_type='morning')
+        Schedule.objects.create(employee=second, equipment=mri, date=START + timedelta(days=1), shift_type='morning')
+        before = entries()
+
+        applied, results = apply_schedule_operations([
+            {'op': 'delete', 'id': entry.id},
+            {'op': 'create', 'employee': second.id, 'equipment': mri.id, 'date': START + timedelta(days=1), 'shift_type': 'evening'},
+            {'op': 'move', 'id': 0, 'date': START},
+        ])
+
+        assert not applied
+        assert [result['status'] for result in results] == ['skipped', 'error', 'error']
+        assert results[1]['codes'] == ['same_day']
+        assert results[2]['codes'] == ['not_found']
+        assert entries() == before
+
+    def test_query_count_does_not_depend_on_batch_size(self, staff, django_assert_max_num_queries):
+        mri = staff['mri']
+        employees = staff['employees']
+        existing = [
+            Schedule.objects.create(employee=employees[day % 4], equipment=mri, date=START + timedelta(days=day), shift_type='morning')
+            for day in range(20)
+        ]
+        operations = [{'op': 'move', 'id': entry.id, 'date': entry.date + timedelta(days=20)} for entry in existing[:10]]
+        operations += [{'op': 'update', 'id': entry.id, 'shift_type': 'evening'} for entry in existing[10:]]
+        operations += [
+            {'op': 'create', 'employee': employees[day % 4].id, 'equipment': mri.id, 'date': START + timedelta(days=60 + day), 'shift_type': 'morning'}
+            for day in range(20)
+        ]
+
+        # savepoint, locked entries, five constraint queries, savepoint, delete, update, insert,
+        # two releases, two counter queries
+        with django_assert_max_num_queries(16):
+            applied, _ = apply_schedule_operations(operations)
+
+        assert applied
+        assert Schedule.objects.count() == 40
+
+    def test_conflicting_write_fails_the_batch(self, staff, monkeypatch):
+        employees = staff['employees']
+        operations = [{'op': 'create', 'employee': employees[0].id, 'equipment': staff['mri'].id, 'date': START, 'shift_type': 'morning'}]
+
+        def racing_check(assignments, removed_ids=()):
+            # A concurrent request takes the slot after this batch was checked
+            Schedule.objects.create(employee=employees[0], equipment=staff['mri'], date=START, shift_type='evening')
+            return []
+
+        monkeypatch.setattr(bulk, 'check_assignments', racing_check)
+
+        applied, results = apply_schedule_operations(operations)
+
+        assert not applied
+        assert results[0]['status'] == 'error'
+        assert results[0]['codes'] == ['conflict']
+        assert Schedule.objects.get().shift_type == 'evening'
+
+@pytest.mark.django_db
+class TestBulkEndpoint:
+    def test_bulk_endpoint(self, staff, manager_client):
+        first = staff['employees'][0]
+        entry = Schedule.objects.create(employee=first, equipment=staff['mri'], date=START, shift_type='morning')
+
+        response = manager_client.post(reverse('schedule-bulk'), {'operations': [
+            {'op': 'move', 'id': entry.id, 'date': str(START + timedelta(days=3))},
+            {'op': 'create', 'employee': first.id, 'equipment': staff['mri'].id, 'date': str(START), 'shift_type': 'evening'},
+        ]}, format='json')
+
+        assert response.status_code == 200
+        assert response.json()['applied'] is True
+        assert Schedule.objects.filter(employee=first).count() == 2
+
+    def test_missing_fields(self, staff, manager_client):
+        response = manager_client.post(reverse('schedule-bulk'), {'operations': [{'op': 'move', 'id': 1}]}, format='json')
+
+        assert response.status_code == 400
+        assert 'date' in response.json()[0]
+
+    def test_staff_cannot_bulk_edit(self, staff):
+        user = User.objects.create_user(email='staff@example.com', password='password123')
+        Employee.objects.create(user=user, full_name='Staff', email='staff@example.com')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.post(reverse('schedule-bulk'), {'operations': []}, format='json')
+
+        assert response.status_code == 403
@@ -0,0 +1,53 @@
+import pytest
+from datetime import date
+from api.models import Employee, Equipment, Schedule
+from hospital.views import build_calendar_rows, generate_calendar_days
+
+@pytest.fixture
+def month_schedule():
+    mri = Equipment.objects.create(name='MRI', equipment_type='mrt')
+    ct = Equipment.objects.create(name='CT GE', equipment_type='rkt_ge', shift_night=True)
+    employees = [
+        Employee.objects.create(full_name=f'Employee {index}', email=f'employee{index}@example.com')
+        for index in range(20)
+    ]
+    for day in range(1, 32):
+        for index, (equipment, shift_type) in enumerate([(mri, 'morning'), (ct, 'evening'), (ct, 'night')]):
+            Schedule.objects.create(
+                employee=employees[(day * 3 + index) % 20],
+                equipment=equipment,
+                date=date(2025, 3, day),
+                shift_type=shift_type
+            )
+    return employees
+
+@pytest.mark.django_db
+class TestBuildCalendarRows:
+    def test_month_cells(self, month_schedule, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            rows = build_calendar_rows(date(2025, 3, 15), 'month', Schedule.objects.all())
+
+        cells = [cell for row in rows for cell in row]
+        assert all(len(row) == 7 for row in rows)
+        assert len(cells) == len(generate_calendar_days(date(2025, 3, 15), 'month'))
+        # March 2025 starts on a Saturday
+        assert cells[5]['date'] == date(2025, 3, 1)
+        assert all('shifts' not in cell for cell in cells if cell['date'] is None)
+        assert sum(len(cell.get('shifts', [])) for cell in cells) == 93
+
+        first_day = {shift['shift_type']: shift for shift in cells[5]['shifts']}
+        assert first_day['morning']['equipment_name'] == 'MRI'
+        assert first_day['night']['shift_label'] == 'Ночь'
+        assert first_day['evening']['employee_name'] == month_schedule[4].full_name
+        assert first_day['evening']['date'] == date(2025, 3, 1)
+
+    def test_week_uses_filtered_schedules(self, month_schedule):
+        employee = month_schedule[0]
+
+        rows = build_calendar_rows(date(2025, 3, 12), 'week', Schedule.objects.filter(employee=employee))
+
+        assert len(rows) == 1
+        assert [cell['date'].day for cell in rows[0]] == list(range(10, 17))
+        shifts = [shift for cell in rows[0] for shift in cell.get('shifts', [])]
+        assert shifts
+        assert {shift['employee_name'] for shift in shifts} == {employee.full_name}
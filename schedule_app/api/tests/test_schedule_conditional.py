@@ -0,0 +1,151 @@
+import pytest
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import Equipment, Schedule
+from api.scheduling.bulk import apply_schedule_operations
+from api.scheduling.cache import invalidate_all_schedule_months, invalidate_schedule_months, schedule_version
+
+User = get_user_model()
+
+MARCH = (date(2025, 3, 1), date(2025, 3, 31))
+
+@pytest.fixture
+def staff(make_employee):
+    equipment = Equipment.objects.create(name='MRI', equipment_type='mrt')
+    employee = make_employee('Employee', {equipment: 'primary'})
+    entry = Schedule.objects.create(employee=employee, equipment=equipment, date=date(2025, 3, 10), shift_type='morning')
+    return {'employee': employee, 'equipment': equipment, 'entry': entry}
+
+def touches_schedule(queries):
+    return any('"api_schedule"' in query['sql'] for query in queries)
+
+@pytest.mark.django_db
+class TestScheduleVersion:
+    def test_bumps_are_per_month(self):
+        march = schedule_version(*MARCH)
+        april = schedule_version(date(2025, 4, 1), date(2025, 4, 30))
+
+        invalidate_schedule_months(date(2025, 3, 15))
+
+        assert schedule_version(*MARCH) != march
+        assert schedule_version(date(2025, 4, 1), date(2025, 4, 30)) == april
+        assert schedule_version(*MARCH)[1] is not None
+
+    def test_open_periods_and_all_scope(self):
+        versions = [schedule_version(), schedule_version(start_date=date(2025, 3, 1)), schedule_version(end_date=date(2025, 2, 28))]
+
+        invalidate_schedule_months(date(2025, 5, 1))
+
+        assert schedule_version() != versions[0]
+        assert schedule_version(start_date=date(2025, 3, 1)) != versions[1]
+        assert schedule_version(end_date=date(2025, 2, 28)) == versions[2]
+
+        invalidate_all_schedule_months()
+
+        assert schedule_version(end_date=date(2025, 2, 28)) != versions[2]
+
+    def test_single_query(self, django_assert_num_queries):
+        invalidate_schedule_months(*MARCH)
+
+        with django_assert_num_queries(1):
+            schedule_version(*MARCH)
+
+    def test_write_paths_bump_the_month(self, staff, manager_user):
+        client = APIClient()
+        client.force_authenticate(manager_user)
+        version = schedule_version(*MARCH)
+
+        client.patch(reverse('schedule-detail', args=[staff['entry'].id]), {'shift_type': 'evening'}, format='json')
+        assert schedule_version(*MARCH) != version
+        version = schedule_version(*MARCH)
+
+        apply_schedule_operations([{'op': 'delete', 'id': staff['entry'].id}])
+        assert schedule_version(*MARCH) != version
+        version = schedule_version(*MARCH)
+
+        client.patch(reverse('equipment-detail', args=[staff['equipment'].id]), {'name': 'MRI 2'}, format='json')
+        assert schedule_version(*MARCH) != version
+
+@pytest.mark.django_db
+class TestConditionalScheduleList:
+    def test_not_modified_until_the_window_changes(self, staff, manager_user):
+        client = APIClient()
+        client.force_authenticate(manager_user)
+        url = reverse('schedule-list')
+        params = {'start_date': '2025-03-01', 'end_date': '2025-03-31'}
+        etag = client.get(url, params)['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            assert client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert not touches_schedule(context.captured_queries)
+
+        # A change of another month keeps the tag, another page has its own
+        invalidate_schedule_months(date(2025, 6, 1))
+        assert client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert client.get(url, {**params, 'page': 2}, HTTP_IF_NONE_MATCH=etag).status_code != 304
+
+        client.post(url, {
+            'employee': staff['employee'].id,
+            'equipment': staff['equipment'].id,
+            'date': '2025-03-11',
+            'shift_type': 'morning'
+        }, format='json')
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response.json()['count'] == 2
+
+@pytest.mark.django_db
+class TestConditionalSchedulePages:
+    def test_manager_schedule(self, client, manager_user, staff):
+        client.force_login(manager_user)
+        url = reverse('manager_schedule')
+        params = {'view': 'month', 'date': '2025-03-10'}
+        # The first page sets the CSRF cookie, which is part of the tag
+        client.get(url, params)
+        etag = client.get(url, params)['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert not response.templates
+        assert not touches_schedule(context.captured_queries)
+
+        client.post(reverse('update_employee', args=[staff['employee'].id]), {
+            'full_name': 'Renamed',
+            'phone': '',
+            'rate': '1.0',
+            'role': 'staff'
+        })
+        # The flash message of the edit is still waiting, so the page is rendered without a tag
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert 'ETag' not in response
+
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_my_schedule(self, client, staff):
+        user = User.objects.create_user(email='employee@example.com')
+        staff['employee'].user = user
+        staff['employee'].save()
+        client.force_login(user)
+        url = reverse('my_schedule')
+        params = {'view': 'week', 'date': '2025-03-31'}
+        client.get(url, params)
+        etag = client.get(url, params)['ETag']
+
+        assert client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert client.get(url, {'view': 'month', 'date': '2025-03-31'}, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+        invalidate_schedule_months(date(2025, 5, 20))
+        assert client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        # The week runs into April
+        invalidate_schedule_months(date(2025, 4, 20))
+        assert client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -149,7 +149,8 @@ class TestScheduleGeneration:
         
         assert data['employees'][1] not in available_employees
     
-    def test_generate_schedule_api(self, setup_schedule_data):
+    def test_generate_schedule_api(self, setup_schedule_data, settings):
+        settings.SCHEDULE_JOBS_RUN_INLINE = True
         data = setup_schedule_data
         manager_user = data['users'][2]
         
@@ -172,7 +173,8 @@ class TestScheduleGeneration:
         
         response = client.post(url, request_data, format='json')
         
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == 'completed'
         
         assert Schedule.objects.filter(
             date__gte=today,
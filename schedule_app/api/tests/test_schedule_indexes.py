@@ -0,0 +1,40 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from api.models import Employee, Schedule, TimeOffRequest
+
+@pytest.mark.django_db
+class TestScheduleIndexes:
+    def test_indexes_exist(self):
+        with connection.cursor() as cursor:
+            schedule_constraints = connection.introspection.get_constraints(cursor, Schedule._meta.db_table)
+            time_off_constraints = connection.introspection.get_constraints(cursor, TimeOffRequest._meta.db_table)
+
+        assert schedule_constraints['schedule_employee_day_shift']['columns'] == ['employee_id', 'date', 'shift_type']
+        assert schedule_constraints['schedule_day_covering']['columns'] == ['date', 'employee_id', 'equipment_id', 'shift_type']
+        assert time_off_constraints['timeoff_employee_status_dates']['columns'] == ['employee_id', 'status', 'start_date', 'end_date']
+        assert time_off_constraints['timeoff_dates']['columns'] == ['start_date', 'end_date']
+
+    def test_explain_command_leaves_database_untouched(self):
+        out = StringIO()
+
+        call_command('explain_schedule_queries', '--employees', '30', '--equipment', '4', '--days', '20', '--force', stdout=out)
+
+        output = out.getvalue()
+        assert 'Seeded 200 schedule entries and 120 time off requests' in output
+        with_indexes, without_indexes = output.split('Without scheduler indexes')
+        assert with_indexes.count('-- ') == without_indexes.count('-- ') == 6
+        assert not Employee.objects.exists()
+        assert not Schedule.objects.exists()
+        with connection.cursor() as cursor:
+            assert 'schedule_day_covering' in connection.introspection.get_constraints(cursor, Schedule._meta.db_table)
+
+    def test_explain_command_needs_debug_or_force(self, settings):
+        settings.DEBUG = False
+
+        with pytest.raises(CommandError):
+            call_command('explain_schedule_queries', '--employees', '1', '--days', '1', stdout=StringIO())
+
+        assert not Employee.objects.exists()
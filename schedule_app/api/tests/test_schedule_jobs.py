@@ -0,0 +1,202 @@
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.models import Equipment, Schedule, ScheduleGenerationJob
+from api.scheduling import jobs
+from api.scheduling.generator import generate_schedule
+from api.scheduling.jobs import enqueue_generation_job, expire_stale_jobs, run_generation_job
+
+User = get_user_model()
+
+START = date(2025, 3, 3)
+END = date(2025, 3, 9)
+
+@pytest.fixture
+def staff(manager_user, make_employee):
+    ct = Equipment.objects.create(name='CT GE', equipment_type='rkt_ge', shift_night=True)
+    for index in range(6):
+        make_employee(f'Employee {index}', {ct: 'primary'}, shift_availability='all_shifts' if index % 2 else 'day_only')
+    return ct
+
+@pytest.mark.django_db
+class TestScheduleGenerationJobs:
+    def test_inline_job_completes_with_phase_timings(self, staff, manager_user, settings):
+        settings.SCHEDULE_JOBS_RUN_INLINE = True
+
+        job = enqueue_generation_job(START, END, created_by=manager_user)
+
+        assert job.status == 'completed'
+        assert job.progress == 100
+        assert job.started_at and job.finished_at
+        assert set(job.phase_timings) == {'snapshot', 'weights', 'matching', 'rules', 'resolve', 'save'}
+        assert job.created_count == Schedule.objects.filter(date__gte=START, date__lte=END).count() > 0
+
+    def test_random_method(self, staff, manager_user, settings):
+        settings.SCHEDULE_JOBS_RUN_INLINE = True
+
+        job = enqueue_generation_job(START, END, created_by=manager_user, method='random')
+
+        assert job.status == 'completed'
+        assert job.created_count == Schedule.objects.count() > 0
+
+    def test_failure_is_recorded(self, staff, monkeypatch, settings):
+        settings.SCHEDULE_JOBS_RUN_INLINE = True
+
+        def broken(start_date, end_date, created_by=None, progress=None):
+            progress('snapshot', 0)
+            raise ValueError('no staff')
+
+        monkeypatch.setitem(jobs.GENERATORS, 'matching', broken)
+
+        job = enqueue_generation_job(START, END)
+
+        assert job.status == 'failed'
+        assert job.error == 'no staff'
+        assert 'snapshot' in job.phase_timings
+
+    def test_request_only_queues_the_job(self, staff):
+        job = enqueue_generation_job(START, END)
+
+        assert job.status == 'queued'
+        assert not Schedule.objects.exists()
+
+        job = run_generation_job(job.id)
+
+        assert job.status == 'completed'
+        assert run_generation_job(job.id).finished_at == job.finished_at
+
+    def test_overlapping_active_job_is_reused(self, staff):
+        job = enqueue_generation_job(START, END)
+
+        assert enqueue_generation_job(END, END + timedelta(days=3)) == job
+        assert enqueue_generation_job(END + timedelta(days=1), END + timedelta(days=3)) != job
+
+    def test_enqueue_checks_and_creates_under_the_lock(self, staff, monkeypatch):
+        locked = []
+
+        def lock():
+            locked.append((connection.in_atomic_block, ScheduleGenerationJob.objects.count()))
+
+        monkeypatch.setattr(jobs, '_lock_job_periods', lock)
+
+        job = enqueue_generation_job(START, END)
+
+        assert locked == [(True, 0)]
+        assert enqueue_generation_job(START, END) == job
+        assert locked[-1] == (True, 1)
+
+    def test_stale_jobs_expire(self, staff, settings):
+        settings.SCHEDULE_JOB_TIMEOUT = 60
+        job = enqueue_generation_job(START, END)
+        ScheduleGenerationJob.objects.filter(id=job.id).update(created_at=timezone.now() - timedelta(minutes=5))
+
+        assert expire_stale_jobs() == 1
+
+        job.refresh_from_db()
+        assert job.status == 'failed'
+        assert enqueue_generation_job(START, END) != job
+
+    def test_running_job_expires_by_start_time(self, staff, settings):
+        settings.SCHEDULE_JOB_TIMEOUT = 60
+        job = enqueue_generation_job(START, END)
+        ScheduleGenerationJob.objects.filter(id=job.id).update(
+            status='running',
+            created_at=timezone.now() - timedelta(minutes=5),
+            started_at=timezone.now()
+        )
+
+        assert expire_stale_jobs() == 0
+
+        ScheduleGenerationJob.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(minutes=5))
+
+        assert expire_stale_jobs() == 1
+
+    def test_expired_job_is_not_completed_by_its_run(self, staff, monkeypatch, settings):
+        settings.SCHEDULE_JOB_TIMEOUT = 60
+
+        def slow(start_date, end_date, created_by=None, progress=None):
+            ScheduleGenerationJob.objects.filter(status='running').update(started_at=timezone.now() - timedelta(minutes=5))
+            expire_stale_jobs()
+            return 1
+
+        monkeypatch.setitem(jobs.GENERATORS, 'matching', slow)
+        job = enqueue_generation_job(START, END)
+
+        job = run_generation_job(job.id)
+
+        assert job.status == 'failed'
+        assert job.created_count == 0
+
+    def test_expired_job_does_not_write_the_schedule(self, staff, monkeypatch, settings):
+        settings.SCHEDULE_JOB_TIMEOUT = 60
+
+        def expiring(start_date, end_date, created_by=None, progress=None):
+            ScheduleGenerationJob.objects.filter(status='running').update(started_at=timezone.now() - timedelta(minutes=5))
+            expire_stale_jobs()
+            return generate_schedule(start_date, end_date, created_by, progress)
+
+        monkeypatch.setitem(jobs.GENERATORS, 'matching', expiring)
+        job = enqueue_generation_job(START, END)
+
+        job = run_generation_job(job.id)
+
+        assert job.status == 'failed'
+        assert job.error == "Задача не завершилась за отведённое время"
+        assert not Schedule.objects.exists()
+
+    def test_generator_page_queues_and_status_endpoint(self, client, staff, manager_user):
+        client.force_login(manager_user)
+
+        response = client.post(reverse('schedule_generator'), {'start_date': '2025-03-03', 'end_date': '2025-03-09'})
+
+        job = ScheduleGenerationJob.objects.get()
+        assert response.status_code == 302
+        assert response.url == f"{reverse('schedule_generator')}?job={job.id}"
+        assert job.created_by == manager_user
+
+        response = client.get(reverse('schedule_generation_job_status', args=[job.id]))
+
+        assert response.status_code == 200
+        assert response.json()['status'] == 'queued'
+        assert response.json()['redirect_url'] is None
+
+        run_generation_job(job.id)
+        response = client.get(reverse('schedule_generation_job_status', args=[job.id]))
+
+        assert response.json()['status'] == 'completed'
+        assert response.json()['progress'] == 100
+        assert response.json()['redirect_url'] == reverse('manager_schedule')
+
+    def test_api_poll(self, staff, manager_user):
+        other_user = User.objects.create_user(email='other@example.com', password='password123')
+        job = enqueue_generation_job(START, END, created_by=manager_user)
+
+        client = APIClient()
+        client.force_authenticate(user=manager_user)
+        response = client.get(reverse('schedulegenerationjob-detail', args=[job.id]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'queued'
+
+        client.force_authenticate(user=other_user)
+        response = client.get(reverse('schedulegenerationjob-detail', args=[job.id]))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_api_rejects_unknown_method(self, manager_user):
+        client = APIClient()
+        client.force_authenticate(user=manager_user)
+
+        response = client.post(
+            reverse('schedule-generate-schedule'),
+            {'start_date': '2025-03-03', 'end_date': '2025-03-09', 'method': 'magic'},
+            format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not ScheduleGenerationJob.objects.exists()
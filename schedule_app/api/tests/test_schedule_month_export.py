@@ -0,0 +1,144 @@
+import json
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import Employee, Equipment, Schedule, ScheduleChangeCounter
+from api.scheduling.cache import invalidate_schedule_months
+from api.scheduling.export import month_columns
+
+User = get_user_model()
+
+MARCH = {'year': 2025, 'month': 3}
+
+@pytest.fixture
+def month_schedule():
+    mri = Equipment.objects.create(name='MRI', equipment_type='mrt')
+    ct = Equipment.objects.create(name='CT GE', equipment_type='rkt_ge', shift_night=True)
+    employees = [
+        Employee.objects.create(full_name=f'Employee {index}', email=f'employee{index}@example.com')
+        for index in range(6)
+    ]
+    shift_types = ['morning', 'evening', 'night']
+    Schedule.objects.bulk_create([
+        Schedule(
+            employee=employees[(day + slot) % 6],
+            equipment=ct if slot == 2 else mri,
+            date=date(2025, 3, 1) + timedelta(days=day),
+            shift_type=shift_types[slot]
+        )
+        for day in range(31)
+        for slot in range(3)
+    ])
+    Schedule.objects.create(employee=employees[0], equipment=mri, date=date(2025, 4, 1), shift_type='morning')
+    return {'employees': employees, 'mri': mri, 'ct': ct}
+
+def api_client(email, role='staff'):
+    user = User.objects.create_user(email=email)
+    employee = Employee.objects.create(user=user, full_name=email, email=email, role=role)
+    client = APIClient()
+    client.force_authenticate(user)
+    return client, employee
+
+@pytest.mark.django_db
+class TestMonthColumns:
+    def test_columns_decode_to_entries(self, month_schedule):
+        payload = month_columns(Schedule.objects.all(), 2025, 3)
+        shift_names = {code: name for name, code in payload['shift_codes'].items()}
+        shifts = payload['shifts']
+
+        decoded = {
+            (
+                shifts['id'][position],
+                payload['employees']['id'][shifts['employee'][position]],
+                payload['equipment']['id'][shifts['equipment'][position]],
+                date(2025, 3, 1) + timedelta(days=shifts['day'][position]),
+                shift_names[shifts['shift'][position]]
+            )
+            for position in range(len(shifts['id']))
+        }
+
+        assert payload['days'] == 31
+        assert len(payload['employees']['id']) == 6
+        assert payload['equipment']['name'] == ['MRI', 'CT GE']
+        assert decoded == set(Schedule.objects.filter(date__month=3).values_list(
+            'id', 'employee_id', 'equipment_id', 'date', 'shift_type'
+        ))
+
+    def test_single_query(self, month_schedule, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            month_columns(Schedule.objects.all(), 2025, 3)
+
+@pytest.mark.django_db
+class TestMonthEndpoint:
+    def test_payload_is_much_smaller_than_list(self, month_schedule):
+        client, _ = api_client('manager@example.com', role='manager')
+
+        month = client.get(reverse('schedule-month'), MARCH)
+        listing = client.get(reverse('schedule-list'), {
+            'start_date': '2025-03-01', 'end_date': '2025-03-31', 'page_size': 500
+        })
+
+        assert month.status_code == 200
+        assert len(month.json()['shifts']['id']) == listing.json()['count'] == 93
+        assert len(month.content) * 4 < len(listing.content)
+
+    def test_conditional_requests(self, month_schedule):
+        client, _ = api_client('manager@example.com', role='manager')
+        url = reverse('schedule-month')
+        invalidate_schedule_months(date(2025, 3, 1))
+        ScheduleChangeCounter.objects.update(changed_at=timezone.now() - timedelta(minutes=5))
+        response = client.get(url, MARCH)
+        etag = response['ETag']
+
+        not_modified = client.get(url, MARCH, HTTP_IF_NONE_MATCH=etag)
+        assert not_modified.status_code == 304
+        assert not_modified['ETag'] == etag
+        assert client.get(url, MARCH, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code == 304
+
+        invalidate_schedule_months(date(2025, 4, 1))
+        assert client.get(url, MARCH, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        invalidate_schedule_months(date(2025, 3, 20))
+        assert client.get(url, MARCH, HTTP_IF_NONE_MATCH=etag).status_code == 200
+        assert client.get(url, MARCH, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code == 200
+
+    def test_no_last_modified_within_the_second_of_a_change(self, month_schedule):
+        client, _ = api_client('manager@example.com', role='manager')
+        invalidate_schedule_months(date(2025, 3, 1))
+
+        response = client.get(reverse('schedule-month'), MARCH)
+
+        assert 'ETag' in response
+        assert 'Last-Modified' not in response
+
+    def test_not_modified_does_not_read_schedule(self, month_schedule, django_assert_num_queries):
+        client, _ = api_client('manager@example.com', role='manager')
+        url = reverse('schedule-month')
+        etag = client.get(url, MARCH)['ETag']
+
+        # The requesting employee and the change counters
+        with django_assert_num_queries(2) as context:
+            assert client.get(url, MARCH, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert not any('"api_schedule"' in query['sql'] for query in context.captured_queries)
+
+    def test_staff_see_own_shifts_with_own_etag(self, month_schedule):
+        manager, _ = api_client('manager@example.com', role='manager')
+        staff, employee = api_client('staff@example.com')
+        Schedule.objects.create(employee=employee, equipment=month_schedule['mri'], date=date(2025, 3, 5), shift_type='night')
+        manager_etag = manager.get(reverse('schedule-month'), MARCH)['ETag']
+
+        response = staff.get(reverse('schedule-month'), MARCH, HTTP_IF_NONE_MATCH=manager_etag)
+
+        assert response.status_code == 200
+        payload = json.loads(response.content)
+        assert payload['employees']['id'] == [employee.id]
+        assert payload['shifts']['day'] == [4]
+
+    def test_invalid_month(self, month_schedule):
+        client, _ = api_client('manager@example.com', role='manager')
+
+        assert client.get(reverse('schedule-month'), {'year': 2025, 'month': 13}).status_code == 400
+        assert client.get(reverse('schedule-month'), {'year': 'x', 'month': 1}).status_code == 400
@@ -0,0 +1,127 @@
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from django.core.exceptions import ImproperlyConfigured
+from api.scheduling import assignment
+from api.scheduling.assignment import (
+    HungarianAssignmentEngine, MinCostFlowAssignmentEngine, get_assignment_engine,
+    solve_by_component, split_by_component
+)
+
+MONDAY = date(2025, 3, 3)
+TUESDAY = date(2025, 3, 4)
+
+ENGINES = [HungarianAssignmentEngine, MinCostFlowAssignmentEngine]
+
+def total_weight(edges, assignment):
+    return sum(edges[(employee_id, shift_node)] for shift_node, employee_id in assignment.items())
+
+@pytest.mark.parametrize('engine_class', ENGINES)
+class TestAssignmentEngines:
+    def test_optimal_weight(self, engine_class):
+        morning = (MONDAY, 1, 'morning')
+        evening = (MONDAY, 1, 'evening')
+        edges = {
+            (1, morning): 10,
+            (1, evening): 8,
+            (2, morning): 9,
+            (2, evening): 1,
+        }
+
+        assignment = engine_class().solve(edges)
+
+        assert assignment == {morning: 2, evening: 1}
+        assert total_weight(edges, assignment) == 17
+
+    def test_prefers_covering_more_shifts(self, engine_class):
+        morning = (MONDAY, 1, 'morning')
+        evening = (MONDAY, 1, 'evening')
+        edges = {
+            (1, morning): 1000,
+            (1, evening): 10,
+            (2, morning): -500,
+        }
+
+        assignment = engine_class().solve(edges)
+
+        assert assignment == {morning: 2, evening: 1}
+
+    def test_one_shift_per_employee_per_day(self, engine_class):
+        edges = {
+            (1, (MONDAY, 1, 'morning')): 10,
+            (1, (MONDAY, 2, 'morning')): 10,
+            (1, (TUESDAY, 1, 'morning')): 10,
+        }
+
+        assignment = engine_class().solve(edges)
+
+        assert len(assignment) == 2
+        assert {shift_node[0] for shift_node in assignment} == {MONDAY, TUESDAY}
+
+    def test_empty_edges(self, engine_class):
+        assert engine_class().solve({}) == {}
+
+def test_engines_agree_on_larger_instance():
+    edges = {}
+    for day in range(3, 8):
+        for equipment_id in range(1, 5):
+            for shift_type in ['morning', 'evening', 'night']:
+                shift_node = (date(2025, 3, day), equipment_id, shift_type)
+                for employee_id in range(1, 10):
+                    if (employee_id * 7 + equipment_id * 3 + day) % 4:
+                        edges[(employee_id, shift_node)] = (employee_id * 37 + equipment_id * 11 + day * 5) % 90
+
+    hungarian = HungarianAssignmentEngine().solve(edges)
+    min_cost_flow = MinCostFlowAssignmentEngine().solve(edges)
+
+    assert len(hungarian) == len(min_cost_flow)
+    assert total_weight(edges, hungarian) == total_weight(edges, min_cost_flow)
+
+def test_get_assignment_engine(settings):
+    settings.SCHEDULE_ASSIGNMENT_ENGINE = 'min_cost_flow'
+
+    assert isinstance(get_assignment_engine(), MinCostFlowAssignmentEngine)
+    assert isinstance(get_assignment_engine('hungarian'), HungarianAssignmentEngine)
+
+    with pytest.raises(ImproperlyConfigured):
+        get_assignment_engine('unknown')
+
+def test_components_are_solved_apart_with_the_same_result():
+    # Two teams: employees 1-4 on equipment 1-2, employees 5-8 on equipment 3-4
+    components = [({1, 2, 3, 4}, {1, 2}), ({5, 6, 7, 8}, {3, 4}), ({9}, {5})]
+    edges = {}
+    for day in range(3, 6):
+        for equipment_id in range(1, 5):
+            for shift_type in ['morning', 'evening']:
+                shift_node = (date(2025, 3, day), equipment_id, shift_type)
+                team = range(1, 5) if equipment_id <= 2 else range(5, 9)
+                for employee_id in team:
+                    edges[(employee_id, shift_node)] = employee_id * 100 + equipment_id * 10 + day
+
+    parts = split_by_component(edges, components)
+    engine = HungarianAssignmentEngine()
+
+    assert [len(part) for part in parts] == [48, 48]
+    assert solve_by_component(engine, edges, components, processes=1) == engine.solve(edges)
+    assert solve_by_component(engine, edges, components, processes=2) == engine.solve(edges)
+
+def test_broken_process_pool_falls_back_to_this_process(monkeypatch):
+    class BrokenPool:
+        shut_down = False
+
+        def map(self, function, parts):
+            raise BrokenProcessPool('worker died')
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    pool = BrokenPool()
+    monkeypatch.setattr(assignment, '_process_pool', pool)
+    monkeypatch.setattr(assignment, '_process_pool_size', 2)
+    components = [({1}, {1}), ({2}, {2})]
+    edges = {(1, (MONDAY, 1, 'morning')): 10, (2, (MONDAY, 2, 'morning')): 20}
+    engine = HungarianAssignmentEngine()
+
+    assert solve_by_component(engine, edges, components, processes=2) == engine.solve(edges)
+    assert pool.shut_down
+    assert assignment._process_pool is None
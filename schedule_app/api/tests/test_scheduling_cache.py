@@ -0,0 +1,133 @@
+import pytest
+from datetime import date
+from django.urls import reverse
+from api.models import Equipment, Schedule
+from api.scheduling.cache import (
+    calendar_cache_key, get_or_build_calendar, invalidate_all_schedule_months,
+    invalidate_schedule_dates, invalidate_schedule_months, months_between
+)
+
+@pytest.fixture
+def schedule_entry(make_employee):
+    equipment = Equipment.objects.create(name='MRI', equipment_type='mrt')
+    employee = make_employee('Employee', {equipment: 'primary'})
+    return Schedule.objects.create(employee=employee, equipment=equipment, date=date(2025, 3, 10), shift_type='morning')
+
+def calendar_shifts(response):
+    return [
+        shift['employee_name']
+        for row in response.context['calendar_rows']
+        for cell in row
+        for shift in cell.get('shifts', [])
+    ]
+
+@pytest.mark.django_db
+class TestCalendarCacheKey:
+    def test_months_between(self):
+        assert list(months_between(date(2024, 11, 20), date(2025, 2, 1))) == [(2024, 11), (2024, 12), (2025, 1), (2025, 2)]
+
+    def test_invalidation_is_per_month(self):
+        march = calendar_cache_key(date(2025, 3, 1), date(2025, 3, 31))
+        april = calendar_cache_key(date(2025, 4, 1), date(2025, 4, 30))
+
+        invalidate_schedule_months(date(2025, 3, 15))
+
+        assert calendar_cache_key(date(2025, 3, 1), date(2025, 3, 31)) != march
+        assert calendar_cache_key(date(2025, 4, 1), date(2025, 4, 30)) == april
+
+    def test_week_over_two_months(self):
+        week = (date(2025, 3, 31), date(2025, 4, 6))
+        key = calendar_cache_key(*week)
+
+        invalidate_schedule_months(date(2025, 4, 2))
+
+        assert calendar_cache_key(*week) != key
+        key = calendar_cache_key(*week)
+        invalidate_schedule_months(date(2025, 5, 2))
+        assert calendar_cache_key(*week) == key
+
+    def test_scattered_dates_leave_the_months_between(self):
+        january = calendar_cache_key(date(2025, 1, 1), date(2025, 1, 31))
+        june = calendar_cache_key(date(2025, 6, 1), date(2025, 6, 30))
+        december = calendar_cache_key(date(2025, 12, 1), date(2025, 12, 31))
+
+        invalidate_schedule_dates([date(2025, 1, 3), date(2025, 12, 28), date(2025, 1, 20)])
+
+        assert calendar_cache_key(date(2025, 1, 1), date(2025, 1, 31)) != january
+        assert calendar_cache_key(date(2025, 6, 1), date(2025, 6, 30)) == june
+        assert calendar_cache_key(date(2025, 12, 1), date(2025, 12, 31)) != december
+
+    def test_variant_and_global_invalidation(self):
+        period = (date(2025, 3, 1), date(2025, 3, 31))
+        key = calendar_cache_key(*period, ('month',))
+
+        assert calendar_cache_key(*period, ('week',)) != key
+
+        invalidate_all_schedule_months()
+
+        assert calendar_cache_key(*period, ('month',)) != key
+
+    def test_build_runs_once(self):
+        period = (date(2025, 3, 1), date(2025, 3, 31))
+        calls = []
+
+        def build():
+            calls.append(1)
+            return [[{'day': 1}]]
+
+        assert get_or_build_calendar(*period, ('month',), build) == [[{'day': 1}]]
+        assert get_or_build_calendar(*period, ('month',), build) == [[{'day': 1}]]
+        assert len(calls) == 1
+
+        invalidate_schedule_months(date(2025, 3, 31))
+        get_or_build_calendar(*period, ('month',), build)
+        assert len(calls) == 2
+
+@pytest.mark.django_db
+class TestCalendarCacheInvalidation:
+    def test_manager_schedule_is_served_from_cache(self, client, manager_user, schedule_entry):
+        client.force_login(manager_user)
+        url = reverse('manager_schedule')
+        params = {'view': 'month', 'date': '2025-03-10'}
+
+        assert calendar_shifts(client.get(url, params)) == ['Employee']
+
+        # A direct write bypasses the hooks, so the cached calendar is still served
+        Schedule.objects.filter(id=schedule_entry.id).delete()
+        assert calendar_shifts(client.get(url, params)) == ['Employee']
+
+        invalidate_schedule_months(schedule_entry.date)
+        assert calendar_shifts(client.get(url, params)) == []
+
+    def test_edit_hooks_invalidate_affected_months(self, client, manager_user, schedule_entry):
+        client.force_login(manager_user)
+        url = reverse('manager_schedule')
+        march = {'view': 'month', 'date': '2025-03-10'}
+        april = {'view': 'month', 'date': '2025-04-10'}
+        client.get(url, march)
+        client.get(url, april)
+
+        response = client.post(reverse('move_schedule_entry', args=[schedule_entry.id]), {'new_date': '2025-04-02'})
+
+        assert response.status_code == 302
+        assert calendar_shifts(client.get(url, march)) == []
+        assert calendar_shifts(client.get(url, april)) == ['Employee']
+
+        client.post(reverse('delete_schedule_entry', args=[schedule_entry.id]))
+
+        assert calendar_shifts(client.get(url, april)) == []
+
+    def test_employee_rename_invalidates_everything(self, client, manager_user, schedule_entry):
+        client.force_login(manager_user)
+        url = reverse('manager_schedule')
+        params = {'view': 'month', 'date': '2025-03-10'}
+        client.get(url, params)
+
+        client.post(reverse('update_employee', args=[schedule_entry.employee.id]), {
+            'full_name': 'Renamed',
+            'phone': '',
+            'rate': '1.0',
+            'role': 'staff'
+        })
+
+        assert calendar_shifts(client.get(url, params)) == ['Renamed']
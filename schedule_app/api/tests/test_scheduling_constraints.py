@@ -0,0 +1,121 @@
+import pytest
+from datetime import date, timedelta
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import Equipment, Schedule, TimeOffRequest
+from api.scheduling.constraints import ScheduleConstraintChecker, check_assignments, make_assignment
+
+START = date(2025, 3, 3)
+
+@pytest.fixture
+def staff(make_employee):
+    mri = Equipment.objects.create(name='MRI', equipment_type='mrt')
+    ct = Equipment.objects.create(name='CT GE', equipment_type='rkt_ge', shift_night=True)
+    employees = [
+        make_employee('Employee 0', {mri: 'primary'}),
+        make_employee('Employee 1', {mri: 'secondary'}, shift_availability='day_only'),
+        make_employee('Employee 2', {ct: 'primary'}),
+    ]
+    return {'employees': employees, 'mri': mri, 'ct': ct}
+
+def codes(violations):
+    return [violation['code'] for violation in violations]
+
+@pytest.mark.django_db
+class TestScheduleConstraintChecker:
+    def test_each_rule(self, staff):
+        first, second, third = staff['employees']
+        mri = staff['mri']
+        Schedule.objects.create(employee=first, equipment=mri, date=START, shift_type='morning')
+        TimeOffRequest.objects.create(employee=third, start_date=START, end_date=START + timedelta(days=2), reason='Vacation', status='approved')
+
+        assert codes(check_assignments([make_assignment(first.id, mri.id, START, 'evening')])) == ['same_day']
+        assert codes(check_assignments([make_assignment(second.id, mri.id, START, 'night')])) == ['no_night_shifts']
+        assert codes(check_assignments([make_assignment(third.id, mri.id, START + timedelta(days=1), 'morning')])) == ['no_skill', 'time_off']
+        assert codes(check_assignments([make_assignment(first.id, 0, START, 'morning')])) == ['unknown_equipment']
+        assert codes(check_assignments([make_assignment(first.id, mri.id, START, 'lunch')])) == ['unknown_shift_type']
+        # Secondary skills are enough, as for generated schedules
+        assert check_assignments([make_assignment(second.id, mri.id, START, 'evening')]) == []
+
+    def test_batch_is_checked_as_a_whole(self, staff):
+        first = staff['employees'][0]
+        mri = staff['mri']
+        monday = Schedule.objects.create(employee=first, equipment=mri, date=START, shift_type='morning')
+        tuesday = Schedule.objects.create(employee=first, equipment=mri, date=START + timedelta(days=1), shift_type='evening')
+
+        swap = [
+            make_assignment(first.id, mri.id, START + timedelta(days=1), 'morning', schedule_id=monday.id),
+            make_assignment(first.id, mri.id, START, 'evening', schedule_id=tuesday.id),
+        ]
+        assert check_assignments(swap) == []
+
+        clash = [
+            make_assignment(first.id, mri.id, START + timedelta(days=5), 'morning'),
+            make_assignment(first.id, mri.id, START + timedelta(days=5), 'evening'),
+        ]
+        violations = check_assignments(clash)
+        assert [(violation['index'], violation['code']) for violation in violations] == [(0, 'same_day'), (1, 'same_day')]
+
+    def test_query_count_does_not_depend_on_batch_size(self, staff, django_assert_num_queries):
+        first, second, _ = staff['employees']
+        mri = staff['mri']
+        entries = [
+            Schedule.objects.create(employee=staff['employees'][day % 2], equipment=mri, date=START + timedelta(days=day), shift_type='morning')
+            for day in range(50)
+        ]
+        moves = [
+            make_assignment(entry.employee_id, mri.id, entry.date + timedelta(days=50), 'morning', schedule_id=entry.id)
+            for entry in entries
+        ]
+
+        # skills, schedules, employees, equipment, time off
+        with django_assert_num_queries(5):
+            violations = ScheduleConstraintChecker.load(moves).validate(moves)
+
+        assert violations == []
+
+@pytest.mark.django_db
+class TestConstraintsInViews:
+    def test_move_checks_availability(self, client, staff, manager_user):
+        second = staff['employees'][1]
+        entry = Schedule.objects.create(employee=second, equipment=staff['ct'], date=START, shift_type='night')
+        client.force_login(manager_user)
+
+        client.post(reverse('move_schedule_entry', args=[entry.id]), {'new_date': str(START + timedelta(days=1))})
+
+        entry.refresh_from_db()
+        assert entry.date == START
+
+    def test_create_accepts_secondary_skill(self, client, staff, manager_user):
+        second = staff['employees'][1]
+        client.force_login(manager_user)
+
+        client.post(reverse('create_schedule_entry'), {
+            'date': str(START),
+            'employee': second.id,
+            'equipment': staff['mri'].id,
+            'shift_type': 'morning'
+        })
+
+        assert Schedule.objects.filter(employee=second, date=START).exists()
+
+    def test_api_validate_and_create(self, staff, manager_user):
+        first, second, _ = staff['employees']
+        api_client = APIClient()
+        api_client.force_authenticate(manager_user)
+
+        response = api_client.post(reverse('schedule-validate'), {'assignments': [
+            {'employee': first.id, 'equipment': staff['mri'].id, 'date': str(START), 'shift_type': 'morning'},
+            {'employee': second.id, 'equipment': staff['mri'].id, 'date': str(START), 'shift_type': 'night'},
+        ]}, format='json')
+
+        assert response.status_code == 200
+        assert response.json()['valid'] is False
+        assert codes(response.json()['violations']) == ['no_night_shifts']
+
+        response = api_client.post(reverse('schedule-list'), {
+            'employee': second.id, 'equipment': staff['mri'].id, 'date': str(START), 'shift_type': 'night'
+        }, format='json')
+
+        assert response.status_code == 400
+        assert not Schedule.objects.exists()
@@ -0,0 +1,78 @@
+import pytest
+from datetime import date
+from django.db import IntegrityError
+from django.urls import reverse
+from api.models import Equipment, Schedule, ScheduleVersion
+from api.scheduling.generator import generate_random_schedule, generate_schedule
+
+START = date(2025, 3, 3)
+END = date(2025, 3, 16)
+
+@pytest.fixture
+def staff(make_employee):
+    equipment = [
+        Equipment.objects.create(name='CT GE', equipment_type='rkt_ge', shift_night=True),
+        Equipment.objects.create(name='MRI', equipment_type='mrt'),
+    ]
+    employees = [
+        make_employee(f'Employee {index}', {equipment[index % 2]: 'primary'}, shift_availability='all_shifts' if index % 3 == 0 else 'day_only')
+        for index in range(12)
+    ]
+    return {'employees': employees, 'equipment': equipment}
+
+@pytest.mark.django_db
+class TestSchedulePersistence:
+    def test_generation_writes_in_bulk(self, staff, django_assert_max_num_queries):
+        # snapshot, savepoint, delete and a single bulk insert, independent of the number of shifts
+        with django_assert_max_num_queries(15):
+            created_count = generate_schedule(START, END)
+
+        assert created_count == Schedule.objects.count() > 0
+
+    def test_failed_save_keeps_previous_schedule(self, staff, manager_user, monkeypatch):
+        old = Schedule.objects.create(employee=staff['employees'][0], equipment=staff['equipment'][0], date=START, shift_type='morning')
+
+        def broken_bulk_create(objs, *args, **kwargs):
+            raise IntegrityError('duplicate schedule entry')
+
+        monkeypatch.setattr(Schedule.objects, 'bulk_create', broken_bulk_create)
+
+        with pytest.raises(IntegrityError):
+            generate_schedule(START, END, created_by=manager_user)
+
+        assert list(Schedule.objects.all()) == [old]
+        assert not ScheduleVersion.objects.exists()
+
+    def test_previous_schedule_is_versioned(self, staff, manager_user):
+        Schedule.objects.create(employee=staff['employees'][0], equipment=staff['equipment'][0], date=START, shift_type='morning')
+
+        generate_schedule(START, END, created_by=manager_user)
+
+        version = ScheduleVersion.objects.get()
+        assert version.entry_count == 1
+        assert version.created_by == manager_user
+
+    def test_random_generation_respects_same_and_previous_day(self, staff):
+        created_count = generate_random_schedule(START, END)
+
+        assert created_count == Schedule.objects.count() > 0
+        worked = set(Schedule.objects.values_list('employee_id', 'date'))
+        for employee_id, day in worked:
+            assert (employee_id, date.fromordinal(day.toordinal() - 1)) not in worked
+
+    def test_restore_version_replaces_period(self, client, staff, manager_user):
+        employee = staff['employees'][0]
+        equipment = staff['equipment'][0]
+        version = ScheduleVersion.objects.create(name='Backup', created_by=manager_user, start_date=START, end_date=END)
+        version.entries.create(employee=employee, equipment=equipment, date=START, shift_type='morning')
+        version.entries.create(employee=employee, equipment=equipment, date=END, shift_type='evening')
+        Schedule.objects.create(employee=staff['employees'][1], equipment=staff['equipment'][1], date=START, shift_type='morning')
+        client.force_login(manager_user)
+
+        response = client.post(reverse('restore_schedule_version', args=[version.id]))
+
+        assert response.status_code == 302
+        assert set(Schedule.objects.values_list('employee_id', 'equipment_id', 'date', 'shift_type')) == {
+            (employee.id, equipment.id, START, 'morning'),
+            (employee.id, equipment.id, END, 'evening'),
+        }
@@ -0,0 +1,49 @@
+import pytest
+from datetime import date
+from api.scheduling.graph import ShiftGraph
+
+MORNING = (date(2025, 3, 3), 1, 'morning')
+EVENING = (date(2025, 3, 3), 1, 'evening')
+NIGHT = (date(2025, 3, 3), 1, 'night')
+
+@pytest.fixture
+def graph():
+    graph = ShiftGraph([MORNING, EVENING, NIGHT])
+    graph.add_edge(10, NIGHT, 30)
+    graph.add_edge(10, MORNING, 10)
+    graph.add_edge(20, EVENING, -5)
+    return graph
+
+class TestShiftGraph:
+    def test_mapping_protocol(self, graph):
+        assert len(graph) == 3
+        assert (10, MORNING) in graph
+        assert (10, EVENING) not in graph
+        assert (99, MORNING) not in graph
+        assert graph[(10, NIGHT)] == 30
+        assert graph.get((20, MORNING)) is None
+        assert graph.get((20, MORNING), 0) == 0
+
+        with pytest.raises(KeyError):
+            graph[(20, NIGHT)]
+
+    def test_items_are_ordered_by_employee_then_shift(self, graph):
+        assert list(graph.items()) == [
+            ((10, MORNING), 10),
+            ((10, NIGHT), 30),
+            ((20, EVENING), -5),
+        ]
+
+    def test_adjacency(self, graph):
+        assert graph.shifts_for(10) == [MORNING, NIGHT]
+        assert graph.employees_for(EVENING) == [20]
+        assert graph.employees_for((date(2025, 3, 4), 1, 'morning')) == []
+        assert graph.degree(10) == 2
+        assert graph.degree(99) == 0
+
+    def test_replacing_weight_keeps_single_edge(self, graph):
+        graph[(10, MORNING)] = 15
+
+        assert graph[(10, MORNING)] == 15
+        assert len(graph) == 3
+        assert graph.employees_for(MORNING) == [10]
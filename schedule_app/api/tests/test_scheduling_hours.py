@@ -0,0 +1,50 @@
+import pytest
+from datetime import date
+from api.models import Employee
+from api.scheduling.hours import HoursLedger
+from api.scheduling.work_calendar import get_required_hours, get_working_days_in_month
+
+class TestHoursLedger:
+    def test_add_and_remove(self):
+        ledger = HoursLedger()
+        ledger.add(1, (date(2025, 3, 31), 10, 'night'))
+        ledger.add(1, (date(2025, 4, 1), 10, 'morning'))
+        ledger.add(2, (date(2025, 3, 31), 11, 'evening'))
+
+        assert ledger.month_hours(1, 2025, 3) == 12
+        assert ledger.month_hours(1, 2025, 4) == 6
+        assert ledger.total_hours(1) == 18
+        assert ledger.total_hours(2) == 6
+
+        ledger.remove(1, (date(2025, 3, 31), 10, 'night'))
+
+        assert ledger.month_hours(1, 2025, 3) == 0
+        assert ledger.total_hours(1) == 6
+
+    def test_repeated_updates_are_ignored(self):
+        ledger = HoursLedger()
+        shift_node = (date(2025, 3, 3), 10, 'evening')
+
+        ledger.add(1, shift_node)
+        ledger.add(1, shift_node)
+        assert ledger.total_hours(1) == 6
+
+        ledger.remove(1, shift_node)
+        ledger.remove(1, shift_node)
+        assert ledger.total_hours(1) == 0
+
+    def test_unknown_employee(self):
+        ledger = HoursLedger()
+
+        assert ledger.month_hours(99, 2025, 3) == 0
+        assert ledger.total_hours(99) == 0
+
+@pytest.mark.django_db
+class TestRequiredHours:
+    def test_required_hours_depend_on_rate(self):
+        full_time = Employee.objects.create(full_name='Full', email='full@example.com', rate=1.0)
+        extended = Employee.objects.create(full_name='Extended', email='extended@example.com', rate=1.5)
+
+        assert get_working_days_in_month(2025, 3) == 21
+        assert get_required_hours(full_time, 2025, 3) == 126
+        assert get_required_hours(extended, 2025, 3) == 189
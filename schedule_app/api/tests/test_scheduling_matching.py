@@ -0,0 +1,58 @@
+import random
+from datetime import date, timedelta
+from api.scheduling.matching import MatchingState
+
+MONDAY = date(2025, 3, 3)
+
+def shift(day, equipment_id=10, shift_type='morning'):
+    return (MONDAY + timedelta(days=day), equipment_id, shift_type)
+
+class TestMatchingState:
+    def test_initial_matching(self):
+        state = MatchingState([(1, shift(0)), (2, shift(0, 11, 'night')), (1, shift(1))], employee_ids=[1, 2, 3])
+
+        assert state[shift(0)] == 1
+        assert state.workload(1) == 2
+        assert state.workload(3) == 0
+        assert state.total_hours(2) == 12
+        assert state.works_on(1, MONDAY + timedelta(days=1))
+        assert not state.works_on(2, MONDAY + timedelta(days=1))
+
+    def test_reassign_and_unassign_keep_counters(self):
+        state = MatchingState([(1, shift(0)), (1, shift(0, 10, 'evening'))], employee_ids=[1, 2])
+
+        state.assign(shift(0), 2)
+
+        assert state[shift(0)] == 2
+        assert (state.workload(1), state.workload(2)) == (1, 1)
+        assert (state.total_hours(1), state.total_hours(2)) == (6, 6)
+        assert state.works_on(1, MONDAY) and state.works_on(2, MONDAY)
+
+        state.unassign(shift(0, 10, 'evening'))
+
+        assert shift(0, 10, 'evening') not in state
+        assert state.workload(1) == 0
+        assert state.total_hours(1) == 0
+        assert not state.works_on(1, MONDAY)
+        assert state.shifts_of(1) == []
+
+    def test_order_follows_dict_semantics(self):
+        # Reassigning keeps the place of a shift, unassigning and assigning again moves it last
+        matching = {}
+        state = MatchingState()
+        rng = random.Random(5)
+        shifts = [shift(day, equipment_id) for day in range(4) for equipment_id in (10, 11)]
+        for _ in range(200):
+            shift_node = rng.choice(shifts)
+            if shift_node in matching and rng.random() < 0.3:
+                del matching[shift_node]
+                state.unassign(shift_node)
+            else:
+                employee_id = rng.randint(1, 4)
+                matching[shift_node] = employee_id
+                state.assign(shift_node, employee_id)
+
+        assert state.pairs() == [(employee_id, shift_node) for shift_node, employee_id in matching.items()]
+        for employee_id in range(1, 5):
+            assert state.shifts_of(employee_id) == [node for node, owner in matching.items() if owner == employee_id]
+            assert state.workload(employee_id) == len(state.shifts_of(employee_id))
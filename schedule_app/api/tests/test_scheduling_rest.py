@@ -0,0 +1,66 @@
+import random
+import pytest
+from datetime import date, timedelta
+from api.models import Employee, Equipment, Schedule, EmployeeEquipmentSkill
+from api.scheduling.generator import get_available_employees
+from api.scheduling.rest import RestCalendar
+
+ORIGIN = date(2025, 3, 1)
+
+class TestRestCalendar:
+    def test_windows_match_day_by_day_checks(self):
+        rng = random.Random(3)
+        rest = RestCalendar(ORIGIN)
+        worked, nights = set(), set()
+        for _ in range(60):
+            day = ORIGIN + timedelta(days=rng.randint(-3, 40))
+            shift_type = rng.choice(['morning', 'evening', 'night'])
+            rest.add(1, day, shift_type)
+            if day >= ORIGIN:
+                worked.add(day)
+                if shift_type == 'night':
+                    nights.add(day)
+
+        for offset in range(-2, 45):
+            day = ORIGIN + timedelta(days=offset)
+            assert rest.worked_on(1, day) == (day in worked)
+            for days_back in range(1, 4):
+                previous = {day - timedelta(days=back) for back in range(1, days_back + 1)}
+                assert rest.worked_within(1, day, days_back) == bool(previous & worked)
+                assert rest.night_within(1, day, days_back) == bool(previous & nights)
+            assert rest.last_night_before(1, day) == max((night for night in nights if night < day), default=None)
+
+        assert not rest.worked_within(2, ORIGIN + timedelta(days=5), 3)
+
+    def test_carried_over_only_from_the_last_day_of_a_month(self):
+        rest = RestCalendar(ORIGIN)
+        rest.carry_over(Employee(id=1, last_work_day_prev_month=date(2025, 2, 28)))
+        rest.carry_over(Employee(id=2, last_work_day_prev_month=date(2025, 2, 27)))
+
+        assert rest.carried_over(1, ORIGIN)
+        assert not rest.carried_over(1, ORIGIN + timedelta(days=1))
+        assert not rest.carried_over(2, ORIGIN)
+        assert not rest.worked_on(1, date(2025, 2, 28))
+
+@pytest.mark.django_db
+class TestAvailableEmployees:
+    def test_rest_rules(self, django_assert_num_queries):
+        mri = Equipment.objects.create(name='MRI', equipment_type='mrt')
+        employees = [
+            Employee.objects.create(full_name=f'Employee {index}', email=f'employee{index}@example.com')
+            for index in range(4)
+        ]
+        for employee in employees:
+            EmployeeEquipmentSkill.objects.create(employee=employee, equipment=mri, skill_level='primary')
+        employees[1].last_work_day_prev_month = date(2025, 2, 28)
+        Schedule.objects.create(employee=employees[2], equipment=mri, date=date(2025, 2, 28), shift_type='night')
+
+        rest = RestCalendar.load(date(2025, 2, 28), date(2025, 3, 31), employees)
+        rest.add(employees[3].id, ORIGIN, 'morning')
+
+        # The skills and the time off, the rest rules read nothing
+        with django_assert_num_queries(2):
+            available = get_available_employees(employees, ORIGIN, 'morning', mri, rest)
+
+        assert available == [employees[0]]
+        assert get_available_employees(employees, ORIGIN + timedelta(days=2), 'morning', mri, rest) == employees
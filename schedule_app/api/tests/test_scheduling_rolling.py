@@ -0,0 +1,130 @@
+import pytest
+from collections import Counter
+from datetime import date, timedelta
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.models import Equipment, Schedule, ScheduleGenerationJob
+from api.scheduling.rolling import generate_schedule_by_weeks, rolling_windows, window_required_hours
+from api.scheduling.snapshot import SchedulingSnapshot
+
+START = date(2025, 3, 1)
+
+@pytest.fixture
+def staff(manager_user, make_employee):
+    ct = Equipment.objects.create(name='CT GE', equipment_type='rkt_ge', shift_night=True)
+    mri = Equipment.objects.create(name='MRI', equipment_type='mrt')
+    return [
+        make_employee(f'Employee {index}', {ct if index < 5 else mri: 'primary'}, shift_availability='all_shifts' if index % 2 else 'day_only')
+        for index in range(8)
+    ]
+
+class TestRollingWindows:
+    def test_windows_cover_the_period_once(self):
+        windows = rolling_windows(START, date(2025, 3, 14))
+
+        assert windows == [
+            (date(2025, 3, 1), date(2025, 3, 7), date(2025, 3, 10)),
+            (date(2025, 3, 8), date(2025, 3, 14), date(2025, 3, 14)),
+        ]
+
+    def test_short_tail_is_kept_by_the_last_window(self):
+        windows = rolling_windows(START, date(2025, 3, 16))
+
+        assert windows[-1] == (date(2025, 3, 8), date(2025, 3, 16), date(2025, 3, 16))
+        assert rolling_windows(START, date(2025, 3, 2)) == [(START, date(2025, 3, 2), date(2025, 3, 2))]
+
+@pytest.mark.django_db
+class TestWindowRequiredHours:
+    def test_share_of_the_norm_with_the_hours_behind(self, staff, settings):
+        settings.SCHEDULE_HOLIDAY_CALENDAR = 'none'
+        employee = staff[0]
+        snapshot = SchedulingSnapshot.load(START, date(2025, 3, 31))
+
+        # 10 working days from March 1 to 16, 6 hours each
+        assert window_required_hours(snapshot, [employee.id], date(2025, 3, 10), date(2025, 3, 16)) == {employee.id: 60}
+
+        snapshot.add_schedule(employee.id, Equipment.objects.get(name='CT GE').id, date(2025, 3, 3), 'night')
+
+        assert window_required_hours(snapshot, [employee.id], date(2025, 3, 10), date(2025, 3, 16)) == {employee.id: 48}
+
+    def test_window_across_months(self, staff, settings):
+        settings.SCHEDULE_HOLIDAY_CALENDAR = 'none'
+        employee = staff[0]
+        snapshot = SchedulingSnapshot.load(date(2025, 3, 29), date(2025, 4, 6))
+
+        # 21 working days in March and 22 in April, the window has March 31 and April 1-4
+        required_hours = window_required_hours(snapshot, [employee.id], date(2025, 3, 29), date(2025, 4, 6))
+
+        assert required_hours == {employee.id: 6 + 20 * 6 + 4 * 6}
+
+@pytest.mark.django_db
+class TestWeeklyGeneration:
+    def test_period_longer_than_a_month(self, staff):
+        end_date = START + timedelta(days=59)
+
+        created_count = generate_schedule_by_weeks(START, end_date)
+
+        schedules = Schedule.objects.filter(date__gte=START, date__lte=end_date)
+        assert created_count == schedules.count() > 0
+        assert max(Counter(schedules.values_list('employee_id', 'date')).values()) == 1
+        assert {day.month for day in schedules.values_list('date', flat=True)} == {3, 4}
+
+    def test_progress_reaches_save_once(self, staff):
+        phases = []
+
+        generate_schedule_by_weeks(START, START + timedelta(days=20), progress=lambda phase, percent: phases.append((phase, percent)))
+
+        assert phases[0] == ('snapshot', 0)
+        assert phases[-1] == ('save', 90)
+        assert [phase for phase, _ in phases].count('save') == 1
+        assert all(percent <= 90 for _, percent in phases)
+
+    def test_generator_page_limits_the_period_by_method(self, client, staff, manager_user):
+        client.force_login(manager_user)
+        period = {'start_date': '2025-03-01', 'end_date': '2025-04-29'}
+
+        response = client.post(reverse('schedule_generator'), {**period, 'method': 'matching'})
+
+        assert response.status_code == 200
+        assert "Период не должен превышать 31 день" in response.content.decode()
+        assert not ScheduleGenerationJob.objects.exists()
+
+        response = client.post(reverse('schedule_generator'), {**period, 'method': 'weekly'})
+
+        assert response.status_code == 302
+        assert ScheduleGenerationJob.objects.get().method == 'weekly'
+
+    def test_api_accepts_weekly_method(self, staff, manager_user, settings):
+        settings.SCHEDULE_JOBS_RUN_INLINE = True
+        client = APIClient()
+        client.force_authenticate(user=manager_user)
+
+        response = client.post(
+            reverse('schedule-generate-schedule'),
+            {'start_date': '2025-03-01', 'end_date': '2025-04-29', 'method': 'weekly'},
+            format='json'
+        )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == 'completed'
+        assert response.data['created_count'] == Schedule.objects.count() > 0
+
+    def test_api_limits_the_period_by_method(self, staff, manager_user):
+        client = APIClient()
+        client.force_authenticate(user=manager_user)
+        url = reverse('schedule-generate-schedule')
+
+        response = client.post(url, {'start_date': '2025-03-01', 'end_date': '2025-04-29', 'method': 'matching'}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.post(url, {'start_date': '2025-03-01', 'end_date': '2025-06-01', 'method': 'weekly'}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not ScheduleGenerationJob.objects.exists()
+
+        # The random method keeps accepting periods of any length
+        response = client.post(url, {'start_date': '2025-03-01', 'end_date': '2025-12-31', 'method': 'random'}, format='json')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
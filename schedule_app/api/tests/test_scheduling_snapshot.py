@@ -0,0 +1,120 @@
+import pytest
+from datetime import date, timedelta
+from api.models import (
+    Employee, Equipment, Schedule, EmployeeEquipmentSkill,
+    TimeOffRequest
+)
+from api.scheduling.snapshot import SchedulingSnapshot
+
+@pytest.fixture
+def snapshot_data():
+    start_date = date(2025, 3, 3)
+    end_date = date(2025, 3, 9)
+
+    mri = Equipment.objects.create(name='MRI', equipment_type='mrt')
+    ct = Equipment.objects.create(name='CT', equipment_type='rkt_ge', shift_night=True)
+
+    employee = Employee.objects.create(
+        full_name='Employee One',
+        email='one@example.com',
+        shift_availability='all_shifts'
+    )
+    unskilled = Employee.objects.create(
+        full_name='Employee Two',
+        email='two@example.com'
+    )
+
+    EmployeeEquipmentSkill.objects.create(employee=employee, equipment=mri, skill_level='primary')
+    EmployeeEquipmentSkill.objects.create(employee=employee, equipment=ct, skill_level='secondary')
+
+    Schedule.objects.create(employee=employee, equipment=ct, shift_type='night', date=start_date - timedelta(days=2))
+    Schedule.objects.create(employee=employee, equipment=mri, shift_type='morning', date=start_date + timedelta(days=1))
+
+    TimeOffRequest.objects.create(
+        employee=employee,
+        start_date=start_date + timedelta(days=2),
+        end_date=start_date + timedelta(days=3),
+        reason='Vacation',
+        status='approved'
+    )
+    TimeOffRequest.objects.create(
+        employee=employee,
+        start_date=start_date + timedelta(days=3),
+        end_date=start_date + timedelta(days=4),
+        reason='Family',
+        priority='high',
+        status='pending'
+    )
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'employee': employee,
+        'unskilled': unskilled,
+        'mri': mri,
+        'ct': ct
+    }
+
+@pytest.mark.django_db
+class TestSchedulingSnapshot:
+    def test_lookups(self, snapshot_data):
+        data = snapshot_data
+        start_date = data['start_date']
+        employee = data['employee']
+        snapshot = SchedulingSnapshot.load(start_date, data['end_date'])
+
+        assert snapshot.skilled_employees == [employee]
+        assert snapshot.skill_level(employee.id, data['mri'].id) == 'primary'
+        assert snapshot.skill_level(employee.id, data['ct'].id) == 'secondary'
+        assert snapshot.skill_level(data['unskilled'].id, data['mri'].id) is None
+        assert snapshot.employees_with_skill(data['mri'].id, 'primary') == [employee.id]
+
+        assert snapshot.has_approved_time_off(employee.id, start_date + timedelta(days=2))
+        assert not snapshot.has_approved_time_off(employee.id, start_date + timedelta(days=4))
+        assert snapshot.has_pending_time_off(employee.id, start_date + timedelta(days=4), 'high')
+        assert snapshot.pending_time_off(employee.id, start_date + timedelta(days=3)).priority == 'high'
+
+        night_date = start_date - timedelta(days=2)
+        assert snapshot.has_shift(employee.id, night_date, 'night', data['ct'].id)
+        assert snapshot.last_night_before(employee.id, start_date) == night_date
+        assert snapshot.month_night_count(employee.id, night_date.year, night_date.month) == 1
+
+    def test_skill_components(self, snapshot_data):
+        data = snapshot_data
+        separate = Equipment.objects.create(name='X-ray', equipment_type='mrt')
+        other = Employee.objects.create(full_name='Employee Three', email='three@example.com')
+        EmployeeEquipmentSkill.objects.create(employee=other, equipment=separate, skill_level='primary')
+        snapshot = SchedulingSnapshot.load(data['start_date'], data['end_date'])
+
+        assert snapshot.skill_components() == [
+            ({data['employee'].id}, {data['mri'].id, data['ct'].id}),
+            ({other.id}, {separate.id})
+        ]
+
+    def test_period_schedules_are_ignored(self, snapshot_data):
+        data = snapshot_data
+        snapshot = SchedulingSnapshot.load(data['start_date'], data['end_date'])
+
+        assert not snapshot.worked_on(data['employee'].id, data['start_date'] + timedelta(days=1))
+
+    def test_missing_employee_raises_does_not_exist(self, snapshot_data):
+        data = snapshot_data
+        snapshot = SchedulingSnapshot.load(data['start_date'], data['end_date'])
+
+        with pytest.raises(Employee.DoesNotExist):
+            snapshot.get_employee(-1)
+
+    def test_query_count_does_not_depend_on_data_size(self, snapshot_data, django_assert_num_queries):
+        data = snapshot_data
+        for i in range(20):
+            extra = Employee.objects.create(full_name=f'Extra {i}', email=f'extra{i}@example.com')
+            EmployeeEquipmentSkill.objects.create(employee=extra, equipment=data['mri'])
+            Schedule.objects.create(
+                employee=extra,
+                equipment=data['mri'],
+                shift_type='morning',
+                date=data['start_date'] - timedelta(days=1 + i % 5)
+            )
+
+        with django_assert_num_queries(5):
+            SchedulingSnapshot.load(data['start_date'], data['end_date'] + timedelta(days=60))
@@ -0,0 +1,102 @@
+import pytest
+import random
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from api.models import Employee, Equipment, Schedule, EmployeeEquipmentSkill, TimeOffRequest
+from api.scheduling.time_off import TimeOffIndex, overlapping_time_off
+
+User = get_user_model()
+
+START = date(2025, 3, 1)
+
+@pytest.fixture
+def employees():
+    return [
+        Employee.objects.create(full_name=f'Employee {index}', email=f'employee{index}@example.com')
+        for index in range(3)
+    ]
+
+def add_time_off(employee, start_offset, length, status='approved', priority='low'):
+    return TimeOffRequest.objects.create(
+        employee=employee,
+        start_date=START + timedelta(days=start_offset),
+        end_date=START + timedelta(days=start_offset + length),
+        reason='Vacation',
+        status=status,
+        priority=priority
+    )
+
+@pytest.mark.django_db
+class TestTimeOffIndex:
+    def test_matches_scan_over_all_requests(self, employees):
+        rng = random.Random(7)
+        requests = [
+            add_time_off(
+                rng.choice(employees),
+                rng.randrange(60),
+                rng.randrange(20),
+                status=rng.choice(['pending', 'approved', 'rejected']),
+                priority=rng.choice(['low', 'medium', 'high'])
+            )
+            for _ in range(40)
+        ]
+
+        index = TimeOffIndex.load(START, START + timedelta(days=90))
+
+        for employee in employees:
+            for offset in range(-2, 92):
+                day = START + timedelta(days=offset)
+                expected = sorted(
+                    (r for r in requests if r.employee_id == employee.id and r.start_date <= day <= r.end_date),
+                    key=lambda r: r.id
+                )
+                assert index.requests_on(employee.id, day) == expected
+                assert index.has_approved(employee.id, day) == any(r.status == 'approved' for r in expected)
+                assert index.has_pending(employee.id, day, 'high') == any(
+                    r.status == 'pending' and r.priority == 'high' for r in expected
+                )
+
+    def test_nested_intervals(self, employees):
+        long = add_time_off(employees[0], 0, 30, status='pending', priority='medium')
+        short = add_time_off(employees[0], 5, 1)
+        index = TimeOffIndex([long, short])
+
+        assert index.requests_on(employees[0].id, START + timedelta(days=20)) == [long]
+        assert index.requests_on(employees[0].id, START + timedelta(days=6)) == [long, short]
+        assert index.pending(employees[0].id, START + timedelta(days=6)) == long
+        assert index.first(employees[1].id, START) is None
+
+    def test_load_is_one_query(self, employees, django_assert_num_queries):
+        add_time_off(employees[0], 0, 3)
+        add_time_off(employees[1], 10, 3)
+        add_time_off(employees[1], 40, 3)
+
+        with django_assert_num_queries(1):
+            index = TimeOffIndex.load(START, START + timedelta(days=20), [employees[1].id])
+            assert not index.has_approved(employees[0].id, START)
+            assert index.has_approved(employees[1].id, START + timedelta(days=12))
+            assert not index.has_approved(employees[1].id, START + timedelta(days=41))
+
+    def test_overlapping_time_off(self, employees):
+        inside = add_time_off(employees[0], 5, 2)
+        touching = add_time_off(employees[1], 9, 5)
+        add_time_off(employees[2], 11, 5)
+
+        assert set(overlapping_time_off(START, START + timedelta(days=10))) == {inside, touching}
+
+@pytest.mark.django_db
+class TestTimeOffChecksInViews:
+    def test_move_onto_approved_time_off_is_rejected(self, client, employees):
+        user = User.objects.create_user(email='manager@example.com', password='password123')
+        Employee.objects.create(user=user, full_name='Manager', email='manager@example.com', role='manager')
+        equipment = Equipment.objects.create(name='MRI', equipment_type='mrt')
+        EmployeeEquipmentSkill.objects.create(employee=employees[0], equipment=equipment, skill_level='primary')
+        entry = Schedule.objects.create(employee=employees[0], equipment=equipment, date=START, shift_type='morning')
+        add_time_off(employees[0], 3, 2)
+        client.force_login(user)
+
+        client.post(reverse('move_schedule_entry', args=[entry.id]), {'new_date': str(START + timedelta(days=4))})
+
+        entry.refresh_from_db()
+        assert entry.date == START
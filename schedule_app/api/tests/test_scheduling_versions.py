@@ -0,0 +1,260 @@
+import pytest
+from datetime import date, timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from api.models import Equipment, Schedule, ScheduleVersion, ScheduleVersionEntry
+from api.scheduling.versions import (
+    compact_schedule_versions, create_schedule_version, diff_version, get_version_entries,
+    pack_entries, restore_version, unpack_entries
+)
+
+User = get_user_model()
+
+START = date(2025, 3, 1)
+END = date(2025, 3, 31)
+
+@pytest.fixture
+def month_schedule(make_employee):
+    equipment = Equipment.objects.create(name='MRI', equipment_type='mrt')
+    employees = [make_employee(f'Employee {index}') for index in range(5)]
+    for day in range(31):
+        Schedule.objects.create(
+            employee=employees[day % 5],
+            equipment=equipment,
+            date=START + timedelta(days=day),
+            shift_type='morning'
+        )
+    Schedule.objects.create(employee=employees[0], equipment=equipment, date=END + timedelta(days=1), shift_type='morning')
+    return {'employees': employees, 'equipment': equipment}
+
+def current_entries():
+    return set(
+        Schedule.objects.filter(date__gte=START, date__lte=END)
+        .values_list('employee_id', 'equipment_id', 'date', 'shift_type')
+    )
+
+def reassign(schedule_date, employee):
+    Schedule.objects.filter(date=schedule_date).update(employee=employee)
+
+@pytest.mark.django_db
+class TestCreateScheduleVersion:
+    def test_pack_round_trip(self):
+        entries = {(7, 2, START, 'night'), (3, 1, END, 'morning'), (3, 2, START + timedelta(days=1), 'evening')}
+
+        blob = pack_entries(entries, START)
+
+        assert len(blob) == 3 * 16
+        assert unpack_entries(blob, START) == entries
+        assert unpack_entries(b'', START) == set()
+
+    def test_first_version_is_full_copy(self, month_schedule, manager_user, django_assert_num_queries):
+        # select rows, look up the previous version, insert the version
+        with django_assert_num_queries(3):
+            version, entry_count = create_schedule_version('Backup', START, END, manager_user)
+
+        assert entry_count == 31
+        assert version.storage == 'packed'
+        assert version.entry_count == 31
+        assert not ScheduleVersionEntry.objects.exists()
+        assert get_version_entries(version) == current_entries()
+
+    def test_next_versions_store_changes(self, month_schedule, manager_user):
+        employees = month_schedule['employees']
+        first, _ = create_schedule_version('First', START, END, manager_user)
+        first_entries = current_entries()
+        reassign(START, employees[4])
+        Schedule.objects.filter(date=END).delete()
+
+        second, entry_count = create_schedule_version('Second', START, END, manager_user)
+
+        assert entry_count == 30
+        assert second.storage == 'delta'
+        assert second.base_version == first
+        assert len(unpack_entries(second.packed_added, START)) == 1
+        assert len(unpack_entries(second.packed_removed, START)) == 2
+        assert get_version_entries(second) == current_entries()
+        assert get_version_entries(first) == first_entries
+
+    def test_chain_length_is_capped(self, month_schedule, manager_user, settings):
+        settings.SCHEDULE_VERSION_MAX_CHAIN = 3
+        employees = month_schedule['employees']
+
+        versions = []
+        for index in range(5):
+            reassign(START, employees[index])
+            versions.append(create_schedule_version(f'Version {index}', START, END, manager_user)[0])
+
+        assert [version.storage for version in versions] == ['packed', 'delta', 'delta', 'packed', 'delta']
+
+    def test_empty_period_creates_nothing(self, month_schedule, manager_user):
+        version, entry_count = create_schedule_version('Backup', date(2025, 5, 1), date(2025, 5, 31), manager_user)
+
+        assert version is None
+        assert entry_count == 0
+        assert not ScheduleVersion.objects.exists()
+
+    def test_deleting_a_base_rebases_its_derived_versions(self, month_schedule, manager_user):
+        employees = month_schedule['employees']
+        other_user = User.objects.create_user(email='other@example.com', password='password123')
+        first, _ = create_schedule_version('First', START, END, manager_user)
+        reassign(START, employees[4])
+        second, _ = create_schedule_version('Second', START, END, other_user)
+        reassign(START + timedelta(days=1), employees[4])
+        third, _ = create_schedule_version('Third', START, END, other_user)
+        expected = {version.id: get_version_entries(version) for version in (second, third)}
+
+        # The versions of a deleted user go with it, the ones built on them stay
+        manager_user.delete()
+
+        assert not ScheduleVersion.objects.filter(id=first.id).exists()
+        second = ScheduleVersion.objects.get(id=second.id)
+        assert second.storage == 'packed'
+        assert second.base_version is None
+        assert get_version_entries(second) == expected[second.id]
+
+        second.delete()
+
+        third = ScheduleVersion.objects.get(id=third.id)
+        assert third.storage == 'packed'
+        assert get_version_entries(third) == expected[third.id]
+
+@pytest.mark.django_db
+class TestCompactScheduleVersions:
+    def test_retention_rebases_kept_versions(self, month_schedule, manager_user):
+        employees = month_schedule['employees']
+        versions = []
+        expected = []
+        for index in range(4):
+            reassign(START, employees[index])
+            versions.append(create_schedule_version(f'Version {index}', START, END, manager_user)[0])
+            expected.append(current_entries())
+
+        stats = compact_schedule_versions(keep=2)
+
+        assert stats == {'packed': 0, 'rebased': 1, 'deleted': 2}
+        assert list(ScheduleVersion.objects.order_by('created_at', 'id')) == versions[2:]
+        kept = ScheduleVersion.objects.get(id=versions[2].id)
+        assert kept.storage == 'packed'
+        assert kept.base_version is None
+        assert get_version_entries(kept) == expected[2]
+        assert get_version_entries(ScheduleVersion.objects.get(id=versions[3].id)) == expected[3]
+
+    def test_max_age(self, month_schedule, manager_user):
+        old, _ = create_schedule_version('Old', START, END, manager_user)
+        create_schedule_version('Other period', END + timedelta(days=1), END + timedelta(days=1), manager_user)
+        ScheduleVersion.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=400))
+
+        stats = compact_schedule_versions(keep=10, max_age_days=365)
+
+        assert stats['deleted'] == 1
+        assert not ScheduleVersion.objects.filter(id=old.id).exists()
+
+    def test_legacy_entries_are_packed(self, month_schedule, manager_user):
+        equipment = month_schedule['equipment']
+        legacy = ScheduleVersion.objects.create(name='Legacy', created_by=manager_user, start_date=START, end_date=END)
+        for employee in month_schedule['employees'][:2]:
+            legacy.entries.create(employee=employee, equipment=equipment, date=START, shift_type='morning')
+        expected = get_version_entries(legacy)
+
+        stats = compact_schedule_versions(keep=10)
+
+        legacy.refresh_from_db()
+        assert stats['packed'] == 1
+        assert legacy.storage == 'packed'
+        assert legacy.entry_count == 2
+        assert not legacy.entries.exists()
+        assert get_version_entries(legacy) == expected
+
+    def test_command_dry_run(self, month_schedule, manager_user):
+        for index in range(3):
+            reassign(START, month_schedule['employees'][index])
+            create_schedule_version(f'Version {index}', START, END, manager_user)
+        out = StringIO()
+
+        call_command('compact_schedule_versions', '--keep', '1', '--dry-run', stdout=out)
+
+        assert 'Dry run: packed 0, rebased 1, deleted 2 schedule versions' in out.getvalue()
+        assert ScheduleVersion.objects.count() == 3
+
+        call_command('compact_schedule_versions', '--keep', '1', stdout=StringIO())
+
+        assert ScheduleVersion.objects.count() == 1
+
+@pytest.mark.django_db
+class TestRestoreVersion:
+    def test_applies_only_the_difference(self, month_schedule, manager_user, django_assert_num_queries):
+        employees = month_schedule['employees']
+        equipment = month_schedule['equipment']
+        version, _ = create_schedule_version('Backup', START, END, manager_user)
+        expected = current_entries()
+        untouched_ids = set(Schedule.objects.filter(date__gt=START + timedelta(days=2)).values_list('id', flat=True))
+
+        Schedule.objects.filter(date=START).update(shift_type='evening')
+        Schedule.objects.filter(date=START + timedelta(days=1)).delete()
+        Schedule.objects.filter(date=START + timedelta(days=2)).update(employee=employees[0])
+        Schedule.objects.create(employee=employees[3], equipment=equipment, date=START, shift_type='night')
+
+        diff = diff_version(version)
+
+        assert len(diff['insert']) == 2
+        assert len(diff['update']) == 1
+        assert len(diff['delete']) == 2
+
+        # current rows and the existing employees and equipment, then delete, update and insert inside a savepoint
+        with django_assert_num_queries(8):
+            restore_version(version)
+
+        assert current_entries() == expected
+        assert untouched_ids <= set(Schedule.objects.values_list('id', flat=True))
+
+    def test_dry_run_writes_nothing(self, month_schedule, manager_user):
+        version, _ = create_schedule_version('Backup', START, END, manager_user)
+        Schedule.objects.filter(date=START).delete()
+
+        diff = restore_version(version, dry_run=True)
+
+        assert len(diff['insert']) == 1
+        assert not Schedule.objects.filter(date=START).exists()
+        assert restore_version(version) == diff
+        assert diff_version(version) == {'insert': [], 'update': [], 'delete': [], 'skipped': []}
+
+    def test_entries_of_deleted_employees_are_skipped(self, month_schedule, manager_user):
+        deleted_id = month_schedule['employees'][1].id
+        version, _ = create_schedule_version('Backup', START, END, manager_user)
+        Schedule.objects.filter(date__gte=START, date__lte=END).delete()
+        month_schedule['employees'][1].delete()
+
+        diff = restore_version(version)
+
+        assert len(diff['skipped']) == 6
+        assert {entry[0] for entry in diff['skipped']} == {deleted_id}
+        assert current_entries() == get_version_entries(version) - set(diff['skipped'])
+        assert len(current_entries()) == 25
+
+    def test_view_dry_run_and_restore(self, client, month_schedule, manager_user):
+        version, _ = create_schedule_version('Backup', START, END, manager_user)
+        Schedule.objects.filter(date=END).delete()
+        client.force_login(manager_user)
+        url = reverse('restore_schedule_version', args=[version.id])
+
+        response = client.get(url, {'dry_run': '1'})
+
+        assert response.status_code == 200
+        assert response.json()['insert'] == [{
+            'schedule_id': None,
+            'employee_id': month_schedule['employees'][0].id,
+            'employee_name': 'Employee 0',
+            'equipment_id': month_schedule['equipment'].id,
+            'equipment_name': 'MRI',
+            'date': '2025-03-31',
+            'shift_type': 'morning'
+        }]
+        assert not Schedule.objects.filter(date=END).exists()
+
+        response = client.get(url)
+
+        assert response.status_code == 302
+        assert current_entries() == get_version_entries(version)
@@ -0,0 +1,115 @@
+import math
+import pytest
+from datetime import date, timedelta
+from api.models import Equipment, Schedule, TimeOffRequest
+from api.scheduling.snapshot import SchedulingSnapshot
+from api.scheduling.weights import build_weight_matrix
+
+MONDAY = date(2025, 3, 3)
+SATURDAY = date(2025, 3, 8)
+
+@pytest.fixture
+def equipment():
+    return {
+        'mrt': Equipment.objects.create(name='MRI', equipment_type='mrt'),
+        'rkt_ge': Equipment.objects.create(name='CT GE', equipment_type='rkt_ge', shift_night=True),
+    }
+
+def weights_for(employees, shift_nodes):
+    snapshot = SchedulingSnapshot.load(MONDAY, SATURDAY)
+    return build_weight_matrix(snapshot, employees, shift_nodes)
+
+@pytest.mark.django_db
+class TestBuildWeightMatrix:
+    def test_morning_only_weights(self, equipment, make_employee):
+        employee = make_employee('Morning', {equipment['mrt']: 'primary'}, shift_availability='morning_only')
+        mri = equipment['mrt'].id
+        shift_nodes = [
+            (MONDAY, mri, 'morning'),
+            (MONDAY, mri, 'evening'),
+            (SATURDAY, mri, 'morning'),
+        ]
+
+        matrix = weights_for([employee], shift_nodes)
+
+        # primary 500 + morning_only 300 + far below the monthly norm 300
+        assert matrix[0, 0] == 1100
+        assert math.isinf(matrix[0, 1])
+        assert math.isinf(matrix[0, 2])
+
+    def test_secondary_skill_and_rkt_ge_bonus(self, equipment, make_employee):
+        employee = make_employee('Day', {equipment['rkt_ge']: 'secondary'}, shift_availability='day_only')
+        ct = equipment['rkt_ge'].id
+
+        matrix = weights_for([employee], [(MONDAY, ct, 'evening'), (MONDAY, ct, 'night')])
+
+        assert matrix[0, 0] == 50 + 100 + 300 + 20
+        assert math.isinf(matrix[0, 1])
+
+    def test_unskilled_and_time_off_are_infeasible(self, equipment, make_employee):
+        employee = make_employee('Regular', {equipment['mrt']: 'primary'}, shift_availability='day_only')
+        TimeOffRequest.objects.create(
+            employee=employee,
+            start_date=MONDAY,
+            end_date=MONDAY,
+            reason='Vacation',
+            status='approved'
+        )
+        shift_nodes = [
+            (MONDAY, equipment['mrt'].id, 'morning'),
+            (MONDAY + timedelta(days=1), equipment['mrt'].id, 'morning'),
+            (MONDAY + timedelta(days=1), equipment['rkt_ge'].id, 'morning'),
+        ]
+
+        matrix = weights_for([employee], shift_nodes)
+
+        assert math.isinf(matrix[0, 0])
+        assert matrix[0, 1] == 500 + 100 + 300
+        assert math.isinf(matrix[0, 2])
+
+    def test_pending_time_off_and_previous_day(self, equipment, make_employee):
+        employee = make_employee('Pending', {equipment['mrt']: 'primary'}, shift_availability='day_only')
+        mri = equipment['mrt'].id
+        TimeOffRequest.objects.create(
+            employee=employee,
+            start_date=MONDAY,
+            end_date=MONDAY,
+            reason='Family',
+            priority='medium',
+            status='pending'
+        )
+        Schedule.objects.create(employee=employee, equipment=equipment['mrt'], date=MONDAY - timedelta(days=1), shift_type='morning')
+
+        matrix = weights_for([employee], [(MONDAY, mri, 'morning')])
+
+        assert matrix[0, 0] == 500 + 100 - 500 - 300 + 300
+
+    def test_monthly_norm_caps_later_shifts(self, equipment, make_employee):
+        employee = make_employee('Busy', {equipment['mrt']: 'primary'}, shift_availability='day_only')
+        mri = equipment['mrt'].id
+        for day in range(10, 31):
+            Schedule.objects.create(employee=employee, equipment=equipment['mrt'], date=date(2025, 3, day), shift_type='morning')
+        shift_nodes = [(MONDAY, mri, 'morning'), (MONDAY + timedelta(days=1), mri, 'morning'),
+                       (MONDAY + timedelta(days=2), mri, 'morning'), (MONDAY + timedelta(days=3), mri, 'morning')]
+
+        matrix = weights_for([employee], shift_nodes)
+
+        # 126 planned hours already, so the first two shifts overshoot by 6 and 12, the rest by more
+        assert matrix[0, 0] == 500 + 100 - 6 * 30
+        assert matrix[0, 1] == 500 + 100 - 12 * 50
+        assert math.isinf(matrix[0, 2])
+        assert math.isinf(matrix[0, 3])
+
+    def test_weekend_on_call(self, equipment, make_employee):
+        employee = make_employee('OnCall', {equipment['rkt_ge']: 'primary'}, shift_availability='all_shifts')
+        ct = equipment['rkt_ge'].id
+
+        matrix = weights_for([employee], [(SATURDAY, ct, 'morning'), (SATURDAY, ct, 'night'), (MONDAY, ct, 'morning')])
+
+        assert matrix[0, 0] == 500 + 1000 + 300 + 20
+        # the only on-call employee is expected to take the single night, so no balance adjustment
+        assert matrix[0, 1] == 500 + 800 + 300 + 20
+        assert math.isinf(matrix[0, 2])
+
+    def test_empty(self):
+        assert weights_for([], []).shape == (0, 0)
@@ -0,0 +1,50 @@
+import pytest
+from datetime import date
+from django.core.exceptions import ImproperlyConfigured
+from api.models import Employee
+from api.scheduling.work_calendar import (
+    get_holiday_calendar, get_required_hours, get_working_days_in_month, holidays,
+    is_working_day, month_after, month_before, month_bounds, period_bounds
+)
+
+class TestHolidayCalendar:
+    def test_weekend_holidays_move_to_the_next_working_day(self):
+        days_off = holidays(2025, 'ru')
+
+        assert date(2025, 2, 24) in days_off
+        assert date(2025, 3, 10) in days_off
+        # New Year holidays are not moved
+        assert date(2025, 1, 9) not in days_off
+        assert not is_working_day(date(2025, 5, 9), 'ru')
+        assert is_working_day(date(2025, 5, 9), 'none')
+
+    def test_holidays_reduce_required_hours(self, settings):
+        employee = Employee(full_name='Extended', rate=1.5)
+
+        assert get_working_days_in_month(2025, 3, 'none') == 21
+        assert get_working_days_in_month(2025, 3, 'ru') == 20
+        assert get_working_days_in_month(2025, 1, 'ru') == 17
+
+        settings.SCHEDULE_HOLIDAY_CALENDAR = 'ru'
+        assert get_required_hours(employee, 2025, 3) == 180
+        settings.SCHEDULE_HOLIDAY_CALENDAR = 'none'
+        assert get_required_hours(employee, 2025, 3) == 189
+
+    def test_weekdays_only_by_default(self, settings):
+        del settings.SCHEDULE_HOLIDAY_CALENDAR
+
+        assert get_holiday_calendar().name == 'none'
+
+    def test_unknown_calendar(self, settings):
+        settings.SCHEDULE_HOLIDAY_CALENDAR = 'mars'
+
+        with pytest.raises(ImproperlyConfigured):
+            get_holiday_calendar()
+
+class TestMonthBounds:
+    def test_bounds_and_navigation(self):
+        assert month_bounds(2024, 2) == (date(2024, 2, 1), date(2024, 2, 29))
+        assert month_before(2025, 1) == (2024, 12)
+        assert month_after(2025, 12) == (2026, 1)
+        assert period_bounds(date(2025, 3, 31), 'month') == (date(2025, 3, 1), date(2025, 3, 31))
+        assert period_bounds(date(2025, 3, 31), 'week') == (date(2025, 3, 31), date(2025, 4, 6))
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
 from .models import CustomUser, Employee, Equipment, Schedule, EmployeeEquipmentSkill, TimeOffRequest
+from .scheduling.cache import invalidate_schedule_dates, invalidate_schedule_months
 
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
@@ -21,9 +22,27 @@ class CustomUserAdmin(UserAdmin):
     search_fields = ('email',)
     ordering = ('email',)
 
+class ScheduleAdmin(admin.ModelAdmin):
+    """Records admin edits in the schedule change counters like every other write path"""
+    
+    def save_model(self, request, obj, form, change):
+        old_date = form.initial.get('date') if change else None
+        super().save_model(request, obj, form, change)
+        invalidate_schedule_months(old_date)
+        invalidate_schedule_months(obj.date)
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_schedule_months(obj.date)
+    
+    def delete_queryset(self, request, queryset):
+        dates = list(queryset.values_list('date', flat=True))
+        super().delete_queryset(request, queryset)
+        invalidate_schedule_dates(dates)
+
 admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(Employee)
 admin.site.register(Equipment)
-admin.site.register(Schedule)
+admin.site.register(Schedule, ScheduleAdmin)
 admin.site.register(EmployeeEquipmentSkill)
 admin.site.register(TimeOffRequest)
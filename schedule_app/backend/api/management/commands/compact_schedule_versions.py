@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.scheduling.versions import compact_schedule_versions
+
+class Command(BaseCommand):
+    help = 'Apply the schedule version retention policy and repack the remaining versions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=getattr(settings, 'SCHEDULE_VERSION_KEEP', 20),
+            help='Number of newest versions to keep for each period'
+        )
+        parser.add_argument(
+            '--max-age-days',
+            type=int,
+            default=None,
+            help='Also delete versions older than this many days'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        stats = compact_schedule_versions(
+            keep=options['keep'],
+            max_age_days=options['max_age_days'],
+            dry_run=options['dry_run']
+        )
+        
+        prefix = 'Dry run: ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}packed {stats['packed']}, rebased {stats['rebased']}, deleted {stats['deleted']} schedule versions"
+        ))
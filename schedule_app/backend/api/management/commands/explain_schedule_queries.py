@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.models import Employee, Equipment, Schedule, TimeOffRequest
+from api.scheduling.time_off import overlapping_time_off
+from api.scheduling.work_calendar import month_bounds
+
+
+def hot_queries(employee_id, day):
+    """The lookups the scheduler and the schedule views run most often"""
+    first_day, last_day = month_bounds(day.year, day.month)
+    return [
+        ('schedule by employee and date',
+         Schedule.objects.filter(employee_id=employee_id, date=day).values('id')[:1]),
+        ('schedule by employee, date and shift',
+         Schedule.objects.filter(employee_id=employee_id, date=day, shift_type='night').values('id')[:1]),
+        ('schedule by employee and month',
+         Schedule.objects.filter(employee_id=employee_id, date__gte=first_day, date__lte=last_day).values_list('date', 'shift_type')),
+        ('schedule by date range',
+         Schedule.objects.filter(date__gte=first_day, date__lte=last_day).values_list('employee_id', 'equipment_id', 'date', 'shift_type')),
+        ('approved time off of employee on date',
+         TimeOffRequest.objects.filter(employee_id=employee_id, status='approved', start_date__lte=day, end_date__gte=day).values('id')[:1]),
+        ('time off overlapping period',
+         overlapping_time_off(first_day, last_day).values_list('employee_id', 'start_date', 'end_date')),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway dataset and print query plans of the hot schedule queries with and without the scheduler indexes. '
+        'Everything is rolled back, but the indexes are dropped inside the transaction, which on PostgreSQL locks '
+        'the schedule and time off tables until the command ends. Run it against a dedicated database: '
+        'it refuses to run unless DEBUG is on or --force is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=200, help='Number of seeded employees')
+        parser.add_argument('--equipment', type=int, default=10, help='Number of seeded equipment units')
+        parser.add_argument('--days', type=int, default=365, help='Number of seeded schedule days')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the dataset')
+        parser.add_argument('--force', action='store_true', help='Run even with DEBUG off, blocking schedule reads and writes meanwhile')
+
+    def handle(self, *args, **options):
+        if not (options['force'] or settings.DEBUG):
+            raise CommandError(
+                'DROP INDEX locks the schedule and time off tables until the command ends. '
+                'Run it against a dedicated database with DEBUG on, or pass --force.'
+            )
+
+        # Everything happens in a transaction that is rolled back, so the command never changes the database
+        with transaction.atomic():
+            employee_id, day = self._seed(options)
+            self._analyze()
+
+            self.stdout.write(self.style.SUCCESS('With scheduler indexes'))
+            self._explain(employee_id, day)
+
+            with connection.cursor() as cursor:
+                for index in Schedule._meta.indexes + TimeOffRequest._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+            self._analyze()
+
+            self.stdout.write(self.style.SUCCESS('Without scheduler indexes'))
+            self._explain(employee_id, day)
+
+            transaction.set_rollback(True)
+
+    def _seed(self, options):
+        rng = random.Random(options['seed'])
+        start_date = date(2025, 1, 1)
+
+        employees = Employee.objects.bulk_create([
+            Employee(full_name=f'Benchmark {index}', email=f'benchmark{index}@example.com')
+            for index in range(options['employees'])
+        ])
+        equipment_list = Equipment.objects.bulk_create([
+            Equipment(name=f'Benchmark {index}', equipment_type='mrt', shift_night=index % 2 == 0)
+            for index in range(options['equipment'])
+        ])
+        shifts = [
+            (equipment, shift_type)
+            for equipment in equipment_list
+            for shift_type, enabled in [('morning', True), ('evening', True), ('night', equipment.shift_night)]
+            if enabled
+        ]
+
+        schedules = []
+        for offset in range(options['days']):
+            day = start_date + timedelta(days=offset)
+            for employee, (equipment, shift_type) in zip(rng.sample(employees, min(len(shifts), len(employees))), shifts):
+                schedules.append(Schedule(employee_id=employee.id, equipment_id=equipment.id, date=day, shift_type=shift_type))
+        Schedule.objects.bulk_create(schedules, batch_size=1000)
+
+        time_off = []
+        for employee in employees:
+            for _ in range(4):
+                first_day = start_date + timedelta(days=rng.randrange(options['days']))
+                time_off.append(TimeOffRequest(
+                    employee_id=employee.id,
+                    start_date=first_day,
+                    end_date=first_day + timedelta(days=rng.randrange(1, 14)),
+                    reason='Benchmark',
+                    status=rng.choice(['pending', 'approved', 'rejected'])
+                ))
+        TimeOffRequest.objects.bulk_create(time_off, batch_size=1000)
+
+        self.stdout.write(f'Seeded {len(schedules)} schedule entries and {len(time_off)} time off requests')
+        return employees[0].id, start_date + timedelta(days=options['days'] // 2)
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def _explain(self, employee_id, day):
+        for name, queryset in hot_queries(employee_id, day):
+            self.stdout.write(f'-- {name}')
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_customuser'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleGenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('matching', 'Взвешенное паросочетание'), ('random', 'Случайное распределение')], default='matching', max_length=20, verbose_name='Метод генерации')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('completed', 'Завершено'), ('failed', 'Ошибка')], default='queued', max_length=20, verbose_name='Статус')),
+                ('start_date', models.DateField(verbose_name='Дата начала периода')),
+                ('end_date', models.DateField(verbose_name='Дата окончания периода')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Прогресс, %')),
+                ('phase', models.CharField(blank=True, max_length=50, verbose_name='Текущий этап')),
+                ('phase_timings', models.JSONField(blank=True, default=dict, verbose_name='Длительность этапов, с')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Создано записей')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Время запуска')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Время завершения')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='schedule_generation_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Задача генерации расписания',
+                'verbose_name_plural': 'Задачи генерации расписания',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_schedulegenerationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Название версии')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('start_date', models.DateField(verbose_name='Дата начала периода')),
+                ('end_date', models.DateField(verbose_name='Дата окончания периода')),
+                ('storage', models.CharField(choices=[('entries', 'Отдельные записи'), ('packed', 'Полная упакованная копия'), ('delta', 'Изменения относительно базовой версии')], default='entries', max_length=10, verbose_name='Формат хранения')),
+                ('packed_added', models.BinaryField(blank=True, default=b'', verbose_name='Добавленные записи')),
+                ('packed_removed', models.BinaryField(blank=True, default=b'', verbose_name='Удалённые записи')),
+                ('entry_count', models.PositiveIntegerField(default=0, verbose_name='Количество записей')),
+                ('base_version', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='derived_versions', to='api.scheduleversion', verbose_name='Базовая версия')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_versions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Версия расписания',
+                'verbose_name_plural': 'Версии расписания',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleVersionEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shift_type', models.CharField(choices=[('morning', 'Утро (8:00-14:00)'), ('evening', 'Вечер (14:00-20:00)'), ('night', 'Ночь (20:00-8:00)')], max_length=50, verbose_name='Тип смены')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.employee')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.equipment')),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='api.scheduleversion')),
+            ],
+        ),
+    ]
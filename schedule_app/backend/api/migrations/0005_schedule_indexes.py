@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+# api_timeoffrequest is created by init_db.sql and has no migration state yet, so
+# the indexes are created with plain SQL that is safe to run after init_db.sql.
+INDEXES = [
+    ('schedule_employee_day_shift', 'api_schedule', '"employee_id", "date", "shift_type"'),
+    ('schedule_day_covering', 'api_schedule', '"date", "employee_id", "equipment_id", "shift_type"'),
+    ('timeoff_employee_status_dates', 'api_timeoffrequest', '"employee_id", "status", "start_date", "end_date"'),
+    ('timeoff_dates', 'api_timeoffrequest', '"start_date", "end_date"'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_scheduleversion'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({columns});' for name, table, columns in INDEXES],
+            reverse_sql=[f'DROP INDEX IF EXISTS "{name}";' for name, _, _ in INDEXES],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='schedule',
+                    index=models.Index(fields=['employee', 'date', 'shift_type'], name='schedule_employee_day_shift'),
+                ),
+                migrations.AddIndex(
+                    model_name='schedule',
+                    index=models.Index(fields=['date', 'employee', 'equipment', 'shift_type'], name='schedule_day_covering'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# Serves overlapping_time_off() on PostgreSQL; the expression must stay in
+# sync with api.scheduling.time_off.PERIOD_TEMPLATE.
+CREATE_INDEX = [
+    'CREATE EXTENSION IF NOT EXISTS btree_gist;',
+    'CREATE INDEX IF NOT EXISTS "timeoff_employee_period_gist" ON "api_timeoffrequest" '
+    'USING gist ("employee_id", daterange("start_date", "end_date", \'[]\'));',
+]
+DROP_INDEX = ['DROP INDEX IF EXISTS "timeoff_employee_period_gist";']
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in CREATE_INDEX:
+            schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in DROP_INDEX:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_schedule_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
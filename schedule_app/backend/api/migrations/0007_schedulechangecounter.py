@@ -0,0 +1,25 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_timeoff_period_gist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleChangeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=7, unique=True, verbose_name='Месяц')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время изменения')),
+            ],
+            options={
+                'verbose_name': 'Счётчик изменений расписания',
+                'verbose_name_plural': 'Счётчики изменений расписания',
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_schedulechangecounter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='schedulegenerationjob',
+            name='method',
+            field=models.CharField(choices=[('matching', 'Взвешенное паросочетание'), ('random', 'Случайное распределение'), ('weekly', 'Взвешенное паросочетание по неделям')], default='matching', max_length=20, verbose_name='Метод генерации'),
+        ),
+    ]
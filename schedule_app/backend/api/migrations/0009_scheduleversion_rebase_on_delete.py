@@ -0,0 +1,17 @@
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_schedulegenerationjob_weekly_method'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduleversion',
+            name='base_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=api.models.REBASE_AS_FULL_COPY, related_name='derived_versions', to='api.scheduleversion', verbose_name='Базовая версия'),
+        ),
+    ]
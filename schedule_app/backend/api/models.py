@@ -120,6 +120,12 @@ class Schedule(models.Model):
     
     class Meta:
         unique_together = ('employee', 'date')
+        indexes = [
+            # Availability checks by employee, day and shift; (employee, date) ranges cover monthly hours
+            models.Index(fields=['employee', 'date', 'shift_type'], name='schedule_employee_day_shift'),
+            # Period scans (calendars, snapshots, versions) read every column they need from the index
+            models.Index(fields=['date', 'employee', 'equipment', 'shift_type'], name='schedule_day_covering'),
+        ]
         verbose_name = "Расписание"
         verbose_name_plural = "Расписания"
 
@@ -148,16 +154,38 @@ class TimeOffRequest(models.Model):
     manager_comment = models.TextField(blank=True, null=True, verbose_name="Комментарий руководителя")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee', 'status', 'start_date', 'end_date'], name='timeoff_employee_status_dates'),
+            models.Index(fields=['start_date', 'end_date'], name='timeoff_dates'),
+        ]
+
     def __str__(self):
         return f"{self.employee.full_name} - {self.start_date} to {self.end_date} - {self.get_status_display()}"
 
+def REBASE_AS_FULL_COPY(collector, field, sub_objs, using):
+    """on_delete of ScheduleVersion.base_version: versions built on a deleted version become full copies"""
+    from api.scheduling.versions import rebase_versions
+    rebase_versions(sub_objs)
+
 class ScheduleVersion(models.Model):
     """Model to store versions of schedules for later restoration"""
+    STORAGE_CHOICES = [
+        ('entries', 'Отдельные записи'),
+        ('packed', 'Полная упакованная копия'),
+        ('delta', 'Изменения относительно базовой версии'),
+    ]
+    
     name = models.CharField(max_length=255, verbose_name="Название версии")
     created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='schedule_versions')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     start_date = models.DateField(verbose_name="Дата начала периода")
     end_date = models.DateField(verbose_name="Дата окончания периода")
+    storage = models.CharField(max_length=10, choices=STORAGE_CHOICES, default='entries', verbose_name="Формат хранения")
+    base_version = models.ForeignKey('self', on_delete=REBASE_AS_FULL_COPY, null=True, blank=True, related_name='derived_versions', verbose_name="Базовая версия")
+    packed_added = models.BinaryField(default=b'', blank=True, verbose_name="Добавленные записи")
+    packed_removed = models.BinaryField(default=b'', blank=True, verbose_name="Удалённые записи")
+    entry_count = models.PositiveIntegerField(default=0, verbose_name="Количество записей")
     
     def __str__(self):
         return f"{self.name} ({self.start_date} - {self.end_date})"
@@ -177,3 +205,64 @@ class ScheduleVersionEntry(models.Model):
     
     def __str__(self):
         return f"{self.employee.full_name} - {self.equipment.name} - {self.get_shift_type_display()} - {self.date}"
+
+class ScheduleGenerationJob(models.Model):
+    """Background schedule generation run with its progress"""
+    STATUS_CHOICES = [
+        ('queued', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('completed', 'Завершено'),
+        ('failed', 'Ошибка'),
+    ]
+    
+    METHOD_CHOICES = [
+        ('matching', 'Взвешенное паросочетание'),
+        ('random', 'Случайное распределение'),
+        ('weekly', 'Взвешенное паросочетание по неделям'),
+    ]
+    
+    ACTIVE_STATUSES = ['queued', 'running']
+    
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES, default='matching', verbose_name="Метод генерации")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', verbose_name="Статус")
+    start_date = models.DateField(verbose_name="Дата начала периода")
+    end_date = models.DateField(verbose_name="Дата окончания периода")
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='schedule_generation_jobs')
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="Прогресс, %")
+    phase = models.CharField(max_length=50, blank=True, verbose_name="Текущий этап")
+    phase_timings = models.JSONField(default=dict, blank=True, verbose_name="Длительность этапов, с")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="Создано записей")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Время запуска")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Время завершения")
+    
+    def __str__(self):
+        return f"{self.get_method_display()} ({self.start_date} - {self.end_date}) - {self.get_status_display()}"
+    
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+    
+    class Meta:
+        verbose_name = "Задача генерации расписания"
+        verbose_name_plural = "Задачи генерации расписания"
+        ordering = ['-created_at']
+
+class ScheduleChangeCounter(models.Model):
+    """Change counter of one month of the schedule ('YYYY-MM') or of all of it ('all').
+
+    Every write path bumps the counters of the months it changed, see
+    api.scheduling.cache; calendar cache keys and ETags are derived from
+    them, so they are shared by all worker processes.
+    """
+    scope = models.CharField(max_length=7, unique=True, verbose_name="Месяц")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Версия")
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name="Время изменения")
+    
+    def __str__(self):
+        return f"{self.scope}: {self.version}"
+    
+    class Meta:
+        verbose_name = "Счётчик изменений расписания"
+        verbose_name_plural = "Счётчики изменений расписания"
@@ -0,0 +1,79 @@
+import base64
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class DateKeysetPagination(PageNumberPagination):
+    """Page numbers by default, keyset pages over (date_field, id) with ?pagination=cursor.
+
+    A keyset page continues right after the last row of the previous page,
+    so any page of a long history costs one index range scan instead of an
+    OFFSET over every earlier row. The response then has only 'next' and
+    'results'; follow 'next' until it is null.
+    """
+    date_field = 'date'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+
+    keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = request.query_params.get(self.mode_query_param) == 'cursor'
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        queryset = queryset.order_by(self.date_field, 'id')
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            day, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f'{self.date_field}__gt': day}) | Q(**{self.date_field: day, 'id__gt': pk})
+            )
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        self.next_cursor = self.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        return None if self.keyset else super().get_previous_link()
+
+    def encode_cursor(self, row):
+        position = f'{getattr(row, self.date_field).isoformat()}|{row.id}'
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            day, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return date.fromisoformat(day), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor")
+
+
+class ScheduleKeysetPagination(DateKeysetPagination):
+    date_field = 'date'
+
+
+class TimeOffKeysetPagination(DateKeysetPagination):
+    date_field = 'start_date'
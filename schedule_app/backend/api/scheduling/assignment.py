@@ -0,0 +1,301 @@
+import atexit
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ASSIGNMENT_ENGINE = 'hungarian'
+
+
+class AssignmentEngine:
+    """Optimal assignment of shift nodes to employees.
+
+    Edges map (employee_id, shift_node) to a weight, where a shift node is
+    (date, equipment_id, shift_type). Every shift gets at most one employee and
+    every employee at most one shift per day. Among the assignments covering
+    the largest possible number of shifts, the one with the largest total
+    weight is returned as a dict shift_node -> employee_id.
+
+    With one shift per employee-day the problem splits into independent days,
+    so the adjacency is grouped by date once and each day is solved separately.
+    """
+
+    name = None
+
+    def solve(self, edges):
+        days = {}
+        for (employee_id, shift_node), weight in edges.items():
+            day = days.setdefault(shift_node[0], {'employees': {}, 'shifts': {}, 'weights': {}})
+            day['employees'].setdefault(employee_id, len(day['employees']))
+            day['shifts'].setdefault(shift_node, len(day['shifts']))
+            day['weights'][(employee_id, shift_node)] = weight
+
+        assignment = {}
+        for date in sorted(days):
+            day = days[date]
+            assignment.update(self.solve_day(list(day['employees']), list(day['shifts']), day['weights']))
+        return assignment
+
+    def solve_day(self, employee_ids, shift_nodes, weights):
+        raise NotImplementedError
+
+
+class HungarianAssignmentEngine(AssignmentEngine):
+    """Hungarian algorithm over a dense NumPy weight matrix per day.
+
+    Missing edges get value 0 and present edges are shifted by a bonus larger
+    than any possible weight difference, so a maximum-value assignment always
+    covers as many shifts as possible before it maximises the weight.
+    """
+
+    name = 'hungarian'
+
+    def solve_day(self, employee_ids, shift_nodes, weights):
+        n_shifts = len(shift_nodes)
+        n_employees = len(employee_ids)
+        if not n_shifts or not n_employees:
+            return {}
+
+        present = np.zeros((n_shifts, n_employees), dtype=bool)
+        raw = np.zeros((n_shifts, n_employees))
+        employee_index = {employee_id: index for index, employee_id in enumerate(employee_ids)}
+        for row, shift_node in enumerate(shift_nodes):
+            for employee_id, column in employee_index.items():
+                weight = weights.get((employee_id, shift_node))
+                if weight is not None:
+                    present[row, column] = True
+                    raw[row, column] = weight
+
+        min_weight = raw[present].min()
+        max_weight = raw[present].max()
+        bonus = (max_weight - min_weight) * min(n_shifts, n_employees) + 1
+        value = np.where(present, raw - min_weight + bonus, 0)
+
+        if n_shifts <= n_employees:
+            pairs = _hungarian(-value)
+        else:
+            pairs = [(row, column) for column, row in _hungarian(-value.T)]
+
+        return {
+            shift_nodes[row]: employee_ids[column]
+            for row, column in sorted(pairs)
+            if present[row, column]
+        }
+
+
+class MinCostFlowAssignmentEngine(AssignmentEngine):
+    """Successive shortest paths on a per-day flow network.
+
+    Source -> employee (capacity 1) -> shift (capacity 1, cost -weight) -> sink.
+    Augmenting along cheapest paths until no path is left gives a maximum flow
+    of minimum cost, the same optimum as the Hungarian engine. Plain Python
+    reference implementation, slower on large days.
+    """
+
+    name = 'min_cost_flow'
+
+    def solve_day(self, employee_ids, shift_nodes, weights):
+        n_employees = len(employee_ids)
+        source = n_employees + len(shift_nodes)
+        sink = source + 1
+
+        graph = [[] for _ in range(sink + 1)]
+
+        def add_edge(tail, head, cost):
+            graph[tail].append([head, 1, cost, len(graph[head])])
+            graph[head].append([tail, 0, -cost, len(graph[tail]) - 1])
+
+        shift_index = {shift_node: n_employees + index for index, shift_node in enumerate(shift_nodes)}
+        for index in range(n_employees):
+            add_edge(source, index, 0)
+        for shift_node, node in shift_index.items():
+            add_edge(node, sink, 0)
+        for index, employee_id in enumerate(employee_ids):
+            for shift_node, node in shift_index.items():
+                weight = weights.get((employee_id, shift_node))
+                if weight is not None:
+                    add_edge(index, node, -weight)
+
+        while True:
+            dist = [None] * len(graph)
+            prev = [None] * len(graph)
+            in_queue = [False] * len(graph)
+            dist[source] = 0
+            queue = deque([source])
+            while queue:
+                node = queue.popleft()
+                in_queue[node] = False
+                for edge_index, (head, capacity, cost, _) in enumerate(graph[node]):
+                    if capacity and (dist[head] is None or dist[node] + cost < dist[head]):
+                        dist[head] = dist[node] + cost
+                        prev[head] = (node, edge_index)
+                        if not in_queue[head]:
+                            in_queue[head] = True
+                            queue.append(head)
+
+            if dist[sink] is None:
+                break
+
+            node = sink
+            while node != source:
+                tail, edge_index = prev[node]
+                edge = graph[tail][edge_index]
+                edge[1] -= 1
+                graph[node][edge[3]][1] += 1
+                node = tail
+
+        assignment = {}
+        for shift_node, node in shift_index.items():
+            for head, capacity, _, _ in graph[node]:
+                if head < n_employees and capacity:
+                    assignment[shift_node] = employee_ids[head]
+        return assignment
+
+
+def _hungarian(cost):
+    """Column for every row of an n x m cost matrix (n <= m) with minimum total cost"""
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            reduced = np.full(m + 1, np.inf)
+            reduced[1:] = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free & (reduced < minv)
+            minv[improve] = reduced[improve]
+            way[improve] = j0
+            candidates = np.where(free, minv, np.inf)
+            j1 = int(np.argmin(candidates))
+            delta = candidates[j1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    return [(int(p[j]) - 1, j - 1) for j in range(1, m + 1) if p[j]]
+
+
+ASSIGNMENT_ENGINES = {
+    HungarianAssignmentEngine.name: HungarianAssignmentEngine,
+    MinCostFlowAssignmentEngine.name: MinCostFlowAssignmentEngine,
+}
+
+
+def get_assignment_engine(name=None):
+    """Engine instance by name, defaulting to settings.SCHEDULE_ASSIGNMENT_ENGINE"""
+    if name is None:
+        name = getattr(settings, 'SCHEDULE_ASSIGNMENT_ENGINE', DEFAULT_ASSIGNMENT_ENGINE)
+    try:
+        return ASSIGNMENT_ENGINES[name]()
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown schedule assignment engine: {name}")
+
+
+_process_pool = None
+_process_pool_size = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(processes):
+    """Shared pool of `processes` workers, replaced when a different size is asked for"""
+    global _process_pool, _process_pool_size
+    with _process_pool_lock:
+        if _process_pool is not None and _process_pool_size != processes:
+            _process_pool.shutdown(wait=False)
+            _process_pool = None
+        if _process_pool is None:
+            # Spawned workers only import this module, nothing of the parent process is copied
+            _process_pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _process_pool_size = processes
+        return _process_pool
+
+
+def _discard_process_pool(pool):
+    """Forget a pool whose worker died, so the next call starts a fresh one"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def split_by_component(edges, components):
+    """Edges grouped by the component of the equipment of their shift.
+
+    components are (employee_ids, equipment_ids) pairs as returned by
+    SchedulingSnapshot.skill_components(); groups without edges are dropped.
+    """
+    component_of = {
+        equipment_id: index
+        for index, (_, equipment_ids) in enumerate(components)
+        for equipment_id in equipment_ids
+    }
+    parts = [{} for _ in components]
+    for (employee_id, shift_node), weight in edges.items():
+        parts[component_of[shift_node[1]]][(employee_id, shift_node)] = weight
+    return [part for part in parts if part]
+
+
+def solve_by_component(engine, edges, components, processes=None):
+    """Solve every component of the edges on its own and merge the assignments.
+
+    Components share no employees, so the merged assignment is as good as
+    solving all edges at once. With more than one component and processes
+    (settings.SCHEDULE_GENERATION_PROCESSES by default) above 1 the
+    components are solved in a process pool. If a worker of the pool dies,
+    the pool is dropped and the components are solved in this process.
+    """
+    if processes is None:
+        processes = getattr(settings, 'SCHEDULE_GENERATION_PROCESSES', 1)
+    parts = split_by_component(edges, components)
+    results = None
+    if processes > 1 and len(parts) > 1:
+        pool = _get_process_pool(processes)
+        try:
+            results = list(pool.map(engine.solve, parts))
+        except BrokenProcessPool:
+            logger.warning("Schedule assignment process pool is broken, solving the components in process")
+            _discard_process_pool(pool)
+    if results is None:
+        results = map(engine.solve, parts)
+
+    assignment = {}
+    for part in results:
+        assignment.update(part)
+    return assignment
@@ -0,0 +1,137 @@
+from django.db import IntegrityError, transaction
+
+from api.models import Schedule
+from api.scheduling.cache import invalidate_schedule_dates
+from api.scheduling.constraints import check_assignments, make_assignment
+
+OPERATIONS = ('create', 'update', 'move', 'delete')
+
+
+def _planned_assignment(operation, entry):
+    """Entry state after the operation, as a constraint checker assignment"""
+    if operation['op'] == 'create':
+        return make_assignment(operation['employee'], operation['equipment'], operation['date'], operation['shift_type'])
+    if operation['op'] == 'move':
+        return make_assignment(entry.employee_id, entry.equipment_id, operation['date'], entry.shift_type, schedule_id=entry.id)
+    return make_assignment(
+        operation.get('employee') or entry.employee_id,
+        operation.get('equipment') or entry.equipment_id,
+        entry.date,
+        operation.get('shift_type') or entry.shift_type,
+        schedule_id=entry.id
+    )
+
+
+def apply_schedule_operations(operations):
+    """Validate a batch of schedule edits together and apply it in one transaction.
+
+    operations are dicts with 'op' (create, update, move or delete) and:
+    create - employee, equipment, date, shift_type;
+    update - id and any of employee, equipment, shift_type;
+    move - id and date;
+    delete - id.
+
+    The batch is all or nothing: when any operation is invalid nothing is
+    written. Returns (applied, results), results holding one dict per
+    operation with its index, op, id, status ('ok', 'error' or 'skipped'
+    when another operation failed) and the error messages and codes. A batch
+    that loses a race for an (employee, date) slot to a concurrent write fails
+    with the 'conflict' code on its writing operations.
+    """
+    operations = list(operations)
+    results = [
+        {'index': index, 'op': operation['op'], 'id': operation.get('id'), 'status': 'ok', 'errors': [], 'codes': []}
+        for index, operation in enumerate(operations)
+    ]
+
+    def fail(index, code, message):
+        results[index]['status'] = 'error'
+        results[index]['codes'].append(code)
+        results[index]['errors'].append(message)
+
+    def reject():
+        for result in results:
+            if result['status'] == 'ok':
+                result['status'] = 'skipped'
+        return False, results
+
+    # Validation and writes share one transaction with the edited rows locked,
+    # so a concurrent edit of the same rows waits instead of slipping between them
+    with transaction.atomic():
+        entries = Schedule.objects.select_for_update().in_bulk(
+            [operation['id'] for operation in operations if operation['op'] != 'create']
+        )
+
+        seen_ids = set()
+        removed_ids = set()
+        planned = []
+        for index, operation in enumerate(operations):
+            if operation['op'] == 'create':
+                planned.append((index, _planned_assignment(operation, None)))
+                continue
+
+            entry = entries.get(operation['id'])
+            if entry is None:
+                fail(index, 'not_found', "Смена не найдена.")
+            elif entry.id in seen_ids:
+                fail(index, 'duplicate', "Смена изменяется в пакете несколько раз.")
+            elif operation['op'] == 'delete':
+                removed_ids.add(entry.id)
+            else:
+                planned.append((index, _planned_assignment(operation, entry)))
+            seen_ids.add(operation['id'])
+
+        violations = check_assignments([assignment for _, assignment in planned], removed_ids)
+        for violation in violations:
+            fail(planned[violation['index']][0], violation['code'], violation['message'])
+
+        if any(result['status'] == 'error' for result in results):
+            return reject()
+
+        touched_dates = {entries[schedule_id].date for schedule_id in removed_ids}
+        new_entries = []
+        rekeyed_entries = []
+        updated_entries = []
+        for index, assignment in planned:
+            schedule = Schedule(
+                id=assignment['schedule_id'],
+                employee_id=assignment['employee_id'],
+                equipment_id=assignment['equipment_id'],
+                date=assignment['date'],
+                shift_type=assignment['shift_type']
+            )
+            touched_dates.add(assignment['date'])
+            if schedule.id is None:
+                new_entries.append((index, schedule))
+                continue
+
+            entry = entries[schedule.id]
+            touched_dates.add(entry.date)
+            if (entry.employee_id, entry.date) != (schedule.employee_id, schedule.date):
+                # A row that changes its (employee, date) key is deleted and inserted
+                # again under the same id, so swaps never hit the unique constraint
+                # halfway through a multi-row UPDATE
+                rekeyed_entries.append(schedule)
+            else:
+                updated_entries.append(schedule)
+
+        try:
+            with transaction.atomic():
+                deleted_ids = removed_ids | {schedule.id for schedule in rekeyed_entries}
+                if deleted_ids:
+                    Schedule.objects.filter(id__in=deleted_ids).delete()
+                if updated_entries:
+                    Schedule.objects.bulk_update(updated_entries, ['equipment', 'shift_type'])
+                created = Schedule.objects.bulk_create(rekeyed_entries + [schedule for _, schedule in new_entries])
+        except IntegrityError:
+            # Another request took one of the (employee, date) slots after the checks
+            for index, _ in planned:
+                fail(index, 'conflict', "Смена была изменена другим запросом, повторите попытку.")
+            return reject()
+
+    # Ids of new rows are only known after bulk_create on databases that return them
+    for (index, _), schedule in zip(new_entries, created[len(rekeyed_entries):]):
+        results[index]['id'] = schedule.id
+
+    invalidate_schedule_dates(touched_dates)
+    return True, results
@@ -0,0 +1,100 @@
+from datetime import date
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max, Q, Sum
+from django.utils import timezone
+
+from api.models import ScheduleChangeCounter
+
+CALENDAR_CACHE_PREFIX = 'schedule_calendar'
+ALL_MONTHS = 'all'
+
+
+def months_between(start_date, end_date):
+    """(year, month) of every month touched by the period"""
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _bump(scopes):
+    now = timezone.now()
+    ScheduleChangeCounter.objects.bulk_create(
+        [ScheduleChangeCounter(scope=scope, changed_at=now) for scope in scopes],
+        ignore_conflicts=True
+    )
+    ScheduleChangeCounter.objects.filter(scope__in=scopes).update(version=F('version') + 1, changed_at=now)
+
+
+def invalidate_schedule_months(*dates):
+    """Record a change of the months containing the dates, dropping their cached calendars and ETags.
+
+    Pass the start and end of a period to bump every month in between.
+    """
+    dates = [day for day in dates if day is not None]
+    if not dates:
+        return
+    _bump([f'{year}-{month:02d}' for year, month in months_between(min(dates), max(dates))])
+
+
+def invalidate_months(months):
+    """Record a change of each (year, month) given, leaving the months between them alone"""
+    months = sorted(set(months))
+    if not months:
+        return
+    _bump([f'{year}-{month:02d}' for year, month in months])
+
+
+def invalidate_schedule_dates(dates):
+    """Record a change of the distinct months of the dates, e.g. of a batch of scattered edits"""
+    invalidate_months((day.year, day.month) for day in dates if day is not None)
+
+
+def invalidate_all_schedule_months():
+    """Record a change of every month, e.g. after an employee or equipment was renamed"""
+    _bump([ALL_MONTHS])
+
+
+def schedule_version(start_date=None, end_date=None):
+    """(version, changed_at) of the schedule between the dates, in one query on the counters.
+
+    Either date may be None for an open period. The version is the sum of
+    the counters of the months in the period and of 'all', so any bump
+    changes it; changed_at is the time of the latest bump, None if there
+    was none yet.
+    """
+    counters = ScheduleChangeCounter.objects.all()
+    if start_date:
+        counters = counters.filter(Q(scope=ALL_MONTHS) | Q(scope__gte=f'{start_date.year:04d}-{start_date.month:02d}'))
+    if end_date:
+        counters = counters.filter(Q(scope=ALL_MONTHS) | Q(scope__lte=f'{end_date.year:04d}-{end_date.month:02d}'))
+    counters = counters.aggregate(version=Sum('version'), changed_at=Max('changed_at'))
+    changed_at = counters['changed_at']
+    # The timestamp keeps versions unique even if the counters table is ever emptied
+    version = f'{counters["version"] or 0}.{changed_at.timestamp() if changed_at else 0}'
+    return version, changed_at
+
+
+def calendar_cache_key(start_date, end_date, variant=()):
+    """Cache key of a calendar built from the schedule between the dates.
+
+    The key embeds the schedule version of the period, so bumping any of
+    its months makes every calendar over it unreachable. `variant` holds
+    whatever else the calendar depends on, such as view mode and filters.
+    """
+    version, _ = schedule_version(start_date, end_date)
+    digest = hashlib.md5(repr((tuple(variant), date.today())).encode()).hexdigest()
+    return f'{CALENDAR_CACHE_PREFIX}:{start_date}:{end_date}:{version}:{digest}'
+
+
+def get_or_build_calendar(start_date, end_date, variant, build):
+    """Cached result of build() for the period, see calendar_cache_key()"""
+    key = calendar_cache_key(start_date, end_date, variant)
+    calendar = cache.get(key)
+    if calendar is None:
+        calendar = build()
+        cache.set(key, calendar, getattr(settings, 'SCHEDULE_CALENDAR_CACHE_TIMEOUT', 3600))
+    return calendar
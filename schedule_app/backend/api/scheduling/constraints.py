@@ -0,0 +1,130 @@
+from collections import Counter, defaultdict
+
+from api.models import Employee, Equipment, Schedule, EmployeeEquipmentSkill
+from api.scheduling.time_off import TimeOffIndex
+
+SHIFT_TYPES = {shift_type for shift_type, _ in Schedule.SHIFT_TYPES}
+
+
+def make_assignment(employee_id, equipment_id, date, shift_type, schedule_id=None):
+    """A proposed schedule entry; schedule_id is set when an existing entry is changed"""
+    return {
+        'schedule_id': schedule_id,
+        'employee_id': employee_id,
+        'equipment_id': equipment_id,
+        'date': date,
+        'shift_type': shift_type
+    }
+
+
+class ScheduleConstraintChecker:
+    """Validates proposed assignments the way a manager's manual edit must be validated.
+
+    Everything the checks need is loaded once for the whole batch (employees,
+    equipment, skills, entries on the affected days and time off), so the
+    number of queries does not depend on the number of assignments.
+
+    Checks: the employee and equipment exist, the shift type is known, the
+    employee has a skill on the equipment, works at most one shift a day, is
+    available for the shift type and has no approved time off on the day.
+    """
+
+    def __init__(self, employees=None, equipment=None, skills=None, schedules=None, time_off=None):
+        self.employees = employees or {}
+        self.equipment = equipment or {}
+        self._skills = skills or {}
+        self._schedules = schedules or {}
+        self._time_off = time_off or TimeOffIndex()
+
+    @classmethod
+    def load(cls, assignments):
+        assignments = list(assignments)
+        if not assignments:
+            return cls()
+
+        employee_ids = {assignment['employee_id'] for assignment in assignments}
+        equipment_ids = {assignment['equipment_id'] for assignment in assignments}
+        days = {assignment['date'] for assignment in assignments}
+
+        skills = {
+            (employee_id, equipment_id): skill_level
+            for employee_id, equipment_id, skill_level in EmployeeEquipmentSkill.objects.filter(
+                employee_id__in=employee_ids
+            ).values_list('employee_id', 'equipment_id', 'skill_level')
+        }
+        schedules = defaultdict(list)
+        for schedule_id, employee_id, day in Schedule.objects.filter(
+            employee_id__in=employee_ids,
+            date__in=days
+        ).values_list('id', 'employee_id', 'date'):
+            schedules[(employee_id, day)].append(schedule_id)
+
+        return cls(
+            employees=Employee.objects.in_bulk(employee_ids),
+            equipment=Equipment.objects.in_bulk(equipment_ids),
+            skills=skills,
+            schedules=schedules,
+            time_off=TimeOffIndex.load(min(days), max(days), employee_ids)
+        )
+
+    def validate(self, assignments, removed_ids=()):
+        """Violations of the batch as a list of dicts with the assignment index, a code and a message.
+
+        The batch is checked as a whole: entries changed by the batch, or
+        deleted by it (removed_ids), no longer occupy their old day, and two
+        assignments of one employee on the same day conflict with each other.
+        """
+        assignments = list(assignments)
+        changed_ids = ({assignment['schedule_id'] for assignment in assignments} | set(removed_ids)) - {None}
+        proposed = Counter((assignment['employee_id'], assignment['date']) for assignment in assignments)
+
+        violations = []
+        for index, assignment in enumerate(assignments):
+            for code, message in self._check(assignment, changed_ids, proposed):
+                violations.append({
+                    'index': index,
+                    'schedule_id': assignment['schedule_id'],
+                    'code': code,
+                    'message': message
+                })
+        return violations
+
+    def _check(self, assignment, changed_ids, proposed):
+        employee = self.employees.get(assignment['employee_id'])
+        equipment = self.equipment.get(assignment['equipment_id'])
+        day = assignment['date']
+        shift_type = assignment['shift_type']
+
+        if employee is None:
+            yield 'unknown_employee', "Сотрудник не найден."
+            return
+        if equipment is None:
+            yield 'unknown_equipment', "Оборудование не найдено."
+            return
+        if shift_type not in SHIFT_TYPES:
+            yield 'unknown_shift_type', "Неизвестный тип смены."
+            return
+
+        if (employee.id, equipment.id) not in self._skills:
+            yield 'no_skill', f"Сотрудник {employee.full_name} не имеет навыка для работы на аппарате {equipment.name}."
+
+        kept = [
+            schedule_id for schedule_id in self._schedules.get((employee.id, day), [])
+            if schedule_id not in changed_ids
+        ]
+        if kept or proposed[(employee.id, day)] > 1:
+            yield 'same_day', f"Сотрудник {employee.full_name} уже имеет смену на {day.strftime('%d.%m.%Y')}."
+
+        if employee.shift_availability == 'morning_only' and shift_type != 'morning':
+            yield 'morning_only', f"Сотрудник {employee.full_name} может работать только в утреннюю смену."
+        if employee.shift_availability == 'day_only' and shift_type == 'night':
+            yield 'no_night_shifts', f"Сотрудник {employee.full_name} не может работать в ночную смену."
+
+        if self._time_off.has_approved(employee.id, day):
+            yield 'time_off', f"Сотрудник {employee.full_name} имеет одобренный отгул на {day.strftime('%d.%m.%Y')}."
+
+
+def check_assignments(assignments, removed_ids=()):
+    """Load a checker for the batch and return its violations"""
+    assignments = list(assignments)
+    return ScheduleConstraintChecker.load(assignments).validate(assignments, removed_ids)
@@ -0,0 +1,48 @@
+from api.scheduling.weights import SHIFT_TYPE_CODES, UNKNOWN_SHIFT_TYPE
+from api.scheduling.work_calendar import month_bounds
+
+
+def month_columns(queryset, year, month):
+    """Schedule entries of the month as a compact columnar payload.
+
+    Employees and equipment are listed once in 'employees' and 'equipment'
+    (parallel 'id' and 'name' arrays); 'shifts' holds parallel arrays with
+    one position per entry: schedule id, day offset from the first of the
+    month, employee index, equipment index and shift code ('shift_codes'
+    maps shift types to codes). Read in one query.
+    """
+    start_date, end_date = month_bounds(year, month)
+    rows = queryset.filter(date__range=(start_date, end_date)).order_by(
+        'date', 'equipment_id', 'shift_type', 'id'
+    ).values_list(
+        'id', 'date', 'employee_id', 'employee__full_name', 'equipment_id', 'equipment__name', 'shift_type'
+    )
+
+    employees = {}
+    equipment = {}
+    shifts = {'id': [], 'day': [], 'employee': [], 'equipment': [], 'shift': []}
+    for schedule_id, day, employee_id, employee_name, equipment_id, equipment_name, shift_type in rows:
+        employee_index = employees.setdefault(employee_id, (len(employees), employee_name))[0]
+        equipment_index = equipment.setdefault(equipment_id, (len(equipment), equipment_name))[0]
+        shifts['id'].append(schedule_id)
+        shifts['day'].append((day - start_date).days)
+        shifts['employee'].append(employee_index)
+        shifts['equipment'].append(equipment_index)
+        shifts['shift'].append(SHIFT_TYPE_CODES.get(shift_type, UNKNOWN_SHIFT_TYPE))
+
+    return {
+        'year': year,
+        'month': month,
+        'start_date': start_date.isoformat(),
+        'days': end_date.day,
+        'shift_codes': SHIFT_TYPE_CODES,
+        'employees': {
+            'id': list(employees),
+            'name': [name for _, name in employees.values()]
+        },
+        'equipment': {
+            'id': list(equipment),
+            'name': [name for _, name in equipment.values()]
+        },
+        'shifts': shifts
+    }
@@ -0,0 +1,1508 @@
+from datetime import datetime, timedelta
+import logging
+import random
+
+import numpy as np
+from django.db import transaction
+
+from api.models import (
+    Employee, Equipment, Schedule, EmployeeEquipmentSkill
+)
+from api.scheduling.assignment import get_assignment_engine, solve_by_component
+from api.scheduling.cache import invalidate_schedule_months
+from api.scheduling.graph import ShiftGraph
+from api.scheduling.hours import HoursLedger
+from api.scheduling.matching import MatchingState
+from api.scheduling.rest import RestCalendar
+from api.scheduling.snapshot import SchedulingSnapshot
+from api.scheduling.time_off import TimeOffIndex
+from api.scheduling.versions import create_schedule_version
+from api.scheduling.weights import build_weight_matrix
+from api.scheduling.work_calendar import get_required_hours
+
+logger = logging.getLogger(__name__)
+
+def _no_progress(phase, percent):
+    pass
+
+def generate_schedule(start_date, end_date, created_by=None, progress=None):
+    """
+    Generate the schedule for the period with the weighted matching pipeline.
+    The current schedule of the period is saved as a ScheduleVersion and replaced
+    in one transaction once the new assignments are computed.
+    progress(phase, percent) is called when each phase starts.
+    Returns the number of created schedule entries.
+    """
+    progress = progress or _no_progress
+    
+    progress('snapshot', 0)
+    snapshot = SchedulingSnapshot.load(start_date, end_date)
+    resolved_matching = plan_schedule(snapshot, start_date, end_date, progress)
+    
+    return save_generated_schedule(resolved_matching, start_date, end_date, created_by, progress)
+
+def plan_schedule(snapshot, start_date, end_date, progress=None, required_hours=None):
+    """
+    Assignments for the days from start_date to end_date as (employee_id, shift_node) pairs,
+    computed from the snapshot without writing anything.
+    required_hours maps employee ids to the hours the rules pass balances towards,
+    the monthly norm of the first month when not given.
+    progress(phase, percent) is called when each phase starts, with percents below 90.
+    """
+    progress = progress or _no_progress
+    employees = snapshot.skilled_employees
+    equipment_list = snapshot.equipment_list
+    day_workers = []
+    on_call_workers = []
+    regular_workers = []
+    
+    for employee in employees:
+        if employee.shift_availability == 'morning_only':
+            day_workers.append(employee)
+        elif employee.shift_availability == 'all_shifts':
+            on_call_workers.append(employee)
+        else:
+            regular_workers.append(employee)
+    
+    employee_nodes = []
+    shift_nodes = []
+    
+    current_date = start_date
+    while current_date <= end_date:
+        is_weekend = current_date.weekday() >= 5
+        
+        for equipment in equipment_list:
+            if is_weekend and equipment.equipment_type != 'rkt_ge':
+                continue
+            
+            if equipment.shift_morning:
+                shift_nodes.append((current_date, equipment.id, 'morning'))
+            if equipment.shift_evening:
+                shift_nodes.append((current_date, equipment.id, 'evening'))
+            if equipment.shift_night:
+                shift_nodes.append((current_date, equipment.id, 'night'))
+        
+        current_date += timedelta(days=1)
+    
+    progress('weights', 15)
+    weight_matrix = build_weight_matrix(snapshot, employees, shift_nodes)
+    edges = ShiftGraph(shift_nodes)
+    
+    for employee in employees:
+        employee_nodes.append(employee.id)
+    
+    for row, column in zip(*np.nonzero(np.isfinite(weight_matrix))):
+        edges.add_edge(employees[row].id, shift_nodes[column], int(weight_matrix[row, column]))
+    
+    progress('matching', 35)
+    initial_matching = find_maximum_weighted_matching(employee_nodes, shift_nodes, edges, snapshot)
+    progress('rules', 60)
+    final_matching = apply_scheduling_rules(
+        initial_matching,
+        employee_nodes,
+        shift_nodes,
+        edges,
+        day_workers,
+        on_call_workers,
+        snapshot,
+        required_hours
+    )
+    
+    progress('resolve', 80)
+    shifts_by_date_type = {}
+    for employee_id, shift_node in final_matching:
+        date, equipment_id, shift_type = shift_node
+        key = (date, shift_type)
+        if key not in shifts_by_date_type:
+            shifts_by_date_type[key] = []
+        shifts_by_date_type[key].append((employee_id, equipment_id))
+    
+    resolved_matching = []
+    assigned_employees = {}
+    
+    sorted_matching = sorted(final_matching, key=lambda x: x[1][0])
+    
+    for employee_id, shift_node in sorted_matching:
+        date, equipment_id, shift_type = shift_node
+        
+        if date not in assigned_employees:
+            assigned_employees[date] = set()
+        
+        if employee_id in assigned_employees[date]:
+            continue
+        
+        conflict = False
+        for res_employee_id, res_shift_node in resolved_matching:
+            res_date, res_equipment_id, res_shift_type = res_shift_node
+            if res_date == date and res_equipment_id == equipment_id and res_shift_type == shift_type:
+                conflict = True
+                break
+        
+        if not conflict:
+            resolved_matching.append((employee_id, shift_node))
+            assigned_employees[date].add(employee_id)
+    
+    assigned_shifts = set(shift_node for _, shift_node in resolved_matching)
+    unassigned_shifts = [s for s in shift_nodes if s not in assigned_shifts]
+    
+    if unassigned_shifts:
+        logger.warning(f"{len(unassigned_shifts)} shifts are unassigned after conflict resolution. Assigning them now.")
+        
+        for shift_node in unassigned_shifts:
+            date, equipment_id, shift_type = shift_node
+            
+            available_employees = []
+            for employee_id in employee_nodes:
+                if employee_id not in assigned_employees.get(date, set()):
+                    if snapshot.skill_level(employee_id, equipment_id):
+                        available_employees.append(employee_id)
+            
+            if available_employees:
+                employee_counts = {}
+                for e_id in available_employees:
+                    employee_counts[e_id] = sum(1 for _, s in resolved_matching if s[0] == e_id)
+                
+                best_employee_id = min(employee_counts.items(), key=lambda x: x[1])[0]
+                resolved_matching.append((best_employee_id, shift_node))
+                
+                if date not in assigned_employees:
+                    assigned_employees[date] = set()
+                assigned_employees[date].add(best_employee_id)
+            else:
+                employee_counts = {}
+                for e_id in employee_nodes:
+                    employee_counts[e_id] = sum(1 for _, s in resolved_matching if s[0] == e_id)
+                
+                best_employee_id = min(employee_counts.items(), key=lambda x: x[1])[0]
+                resolved_matching.append((best_employee_id, shift_node))
+                
+                if date not in assigned_employees:
+                    assigned_employees[date] = set()
+                assigned_employees[date].add(best_employee_id)
+    
+    return resolved_matching
+
+def save_generated_schedule(resolved_matching, start_date, end_date, created_by=None, progress=None):
+    """
+    Replace the schedule of the period with the assignments in one transaction,
+    keeping the current one as a ScheduleVersion. Returns the number of created entries.
+    progress('save', 90) is called inside the transaction before anything is written,
+    so an exception raised by it leaves the schedule untouched.
+    """
+    progress = progress or _no_progress
+    with transaction.atomic():
+        progress('save', 90)
+        version_name = f"Schedule {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        logger.info(f"Creating schedule version: {version_name}")
+        
+        try:
+            with transaction.atomic():
+                schedule_version, entry_count = create_schedule_version(version_name, start_date, end_date, created_by)
+            if schedule_version:
+                logger.info(f"Saved {entry_count} schedule entries to version {version_name}")
+        except Exception as e:
+            logger.error(f"Failed to create schedule version: {str(e)}")
+        
+        Schedule.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        logger.info(f"Deleted existing schedule for period {start_date} to {end_date}")
+        
+        Schedule.objects.bulk_create([
+            Schedule(
+                employee_id=employee_id,
+                equipment_id=equipment_id,
+                date=date,
+                shift_type=shift_type
+            )
+            for employee_id, (date, equipment_id, shift_type) in resolved_matching
+        ])
+    invalidate_schedule_months(start_date, end_date)
+    
+    logger.info(f"Schedule generation completed successfully for period {start_date} to {end_date}")
+    return len(resolved_matching)
+
+def generate_random_schedule(start_date, end_date, created_by=None, progress=None):
+    """
+    Generate the schedule for the period by picking a random available employee for every shift.
+    Returns the number of created schedule entries.
+    """
+    progress = progress or _no_progress
+    progress('snapshot', 0)
+    
+    employees = list(Employee.objects.all())
+    equipment_list = list(Equipment.objects.all())
+    time_off = TimeOffIndex.load(start_date, end_date)
+    
+    with transaction.atomic():
+        progress('save', 10)
+        Schedule.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        
+        new_schedules = []
+        rest = RestCalendar.load(start_date - timedelta(days=1), end_date, employees)
+        current_date = start_date
+        while current_date <= end_date:
+            for equipment in equipment_list:
+                for shift_type, enabled in [
+                    ('morning', equipment.shift_morning),
+                    ('evening', equipment.shift_evening),
+                    ('night', equipment.shift_night)
+                ]:
+                    if not enabled:
+                        continue
+                    
+                    available_employees = get_available_employees(employees, current_date, shift_type, equipment, rest, time_off)
+                    if available_employees:
+                        employee = random.choice(available_employees)
+                        new_schedules.append(Schedule(
+                            employee_id=employee.id,
+                            equipment_id=equipment.id,
+                            date=current_date,
+                            shift_type=shift_type
+                        ))
+                        rest.add(employee.id, current_date, shift_type)
+            
+            current_date += timedelta(days=1)
+        
+        Schedule.objects.bulk_create(new_schedules)
+    invalidate_schedule_months(start_date, end_date)
+    
+    return len(new_schedules)
+
+def get_available_employees(employees, date, shift_type, equipment, rest=None, time_off=None):
+    """
+    Get available employees for a specific date, shift and equipment.
+    rest is a RestCalendar with the saved shifts and the shifts picked in this run
+    from the day before the date on, time_off is a TimeOffIndex covering the date;
+    both are loaded here when not given.
+    """
+    if rest is None:
+        rest = RestCalendar.load(date - timedelta(days=1), date, employees)
+    if time_off is None:
+        time_off = TimeOffIndex.load(date, date, [employee.id for employee in employees])
+    skilled_ids = set(EmployeeEquipmentSkill.objects.filter(
+        employee__in=[employee.id for employee in employees],
+        equipment=equipment
+    ).values_list('employee_id', flat=True))
+    
+    available_employees = []
+    for employee in employees:
+        if employee.id not in skilled_ids:
+            continue
+        
+        if time_off.has_approved(employee.id, date):
+            continue
+        
+        if rest.worked_on(employee.id, date):
+            continue
+        
+        if rest.carried_over(employee.id, date):
+            continue
+        
+        if rest.worked_within(employee.id, date, 1):
+            continue
+        
+        available_employees.append(employee)
+    
+    return available_employees
+
+def find_maximum_weighted_matching(employee_nodes, shift_nodes, edges, snapshot):
+    import heapq
+    
+    matching = {}           # shift_node -> employee_id
+    reverse_matching = {}   # employee_id -> set of shift_nodes
+    matched_hours = HoursLedger()
+    
+    shifts_by_date = {}
+    shifts_by_date_equipment = {}
+    
+    for shift_node in shift_nodes:
+        date, equipment_id, shift_type = shift_node
+        
+        if date not in shifts_by_date:
+            shifts_by_date[date] = []
+        shifts_by_date[date].append(shift_node)
+        
+        if date not in shifts_by_date_equipment:
+            shifts_by_date_equipment[date] = {}
+        if equipment_id not in shifts_by_date_equipment[date]:
+            shifts_by_date_equipment[date][equipment_id] = []
+        shifts_by_date_equipment[date][equipment_id].append(shift_node)
+    
+    valid_edges = ShiftGraph(shift_nodes)
+    for employee_id in employee_nodes:
+        employee = snapshot.employees_by_id.get(employee_id)
+        
+        if employee is None or not snapshot.has_any_skill(employee_id):
+            continue
+            
+        for shift_node in shift_nodes:
+            date, equipment_id, shift_type = shift_node
+            is_weekend = date.weekday() >= 5
+            
+            skill = snapshot.skill_level(employee.id, equipment_id)
+            
+            if not skill:
+                continue
+            
+            if employee.shift_availability == 'morning_only' and shift_type != 'morning':
+                continue
+                
+            if employee.shift_availability == 'day_only' and shift_type == 'night':
+                continue
+                
+            if employee.shift_availability == 'all_shifts' and not is_weekend and shift_type == 'morning':
+                continue
+                
+            time_off = snapshot.has_approved_time_off(employee.id, date)
+            
+            if time_off:
+                continue
+                
+            weight = edges.weight(employee_id, shift_node, 0)
+            
+            if skill == 'primary':
+                weight += 5000
+            else:
+                continue
+            
+            current_date_month = date.month
+            current_date_year = date.year
+            required_hours = get_required_hours(employee, current_date_year, current_date_month)
+            
+            current_hours = snapshot.month_hours(employee_id, current_date_year, current_date_month)
+            future_hours = matched_hours.month_hours(employee_id, current_date_year, current_date_month)
+            
+            shift_hours = 12 if shift_type == 'night' else 6
+            total_hours = current_hours + future_hours + shift_hours
+            
+            if total_hours > required_hours + 12:
+                weight -= (total_hours - required_hours) * 200
+            elif total_hours > required_hours + 6:
+                weight -= (total_hours - required_hours) * 100
+            elif total_hours > required_hours:
+                weight -= (total_hours - required_hours) * 50
+            elif total_hours == required_hours:
+                weight += 2000
+            elif total_hours >= required_hours - 6:
+                weight += 1500
+            elif total_hours >= required_hours - 12:
+                weight += 1000
+            else:
+                weight += 500
+            
+            if snapshot.night_within(employee.id, date, 2):
+                continue
+            
+            if snapshot.night_within(employee.id, date, 3):
+                weight -= 500
+            
+            prev_day_schedule = snapshot.worked_on(employee.id, date - timedelta(days=1))
+            
+            if prev_day_schedule:
+                weight -= 300
+            
+            if is_weekend and employee.shift_availability == 'all_shifts':
+                if snapshot.worked_within(employee.id, date, 3):
+                    continue
+                
+                for other_shift in shifts_by_date_equipment.get(date, {}).get(equipment_id, []):
+                    if other_shift in matching and matching[other_shift] == employee_id:
+                        weight += 3000
+            
+            if not is_weekend and employee.shift_availability == 'all_shifts':
+                if shift_type == 'evening':
+                    night_shift = None
+                    for s in shifts_by_date_equipment.get(date, {}).get(equipment_id, []):
+                        if s[2] == 'night':
+                            night_shift = s
+                            break
+                    
+                    if night_shift and night_shift in matching and matching[night_shift] == employee_id:
+                        weight += 3000
+                
+                elif shift_type == 'night':
+                    evening_shift = None
+                    for s in shifts_by_date_equipment.get(date, {}).get(equipment_id, []):
+                        if s[2] == 'evening':
+                            evening_shift = s
+                            break
+                    
+                    if evening_shift and evening_shift in matching and matching[evening_shift] == employee_id:
+                        weight += 3000
+                    else:
+                        continue
+            
+            valid_edges.add_edge(employee_id, shift_node, weight)
+    
+    def assign_with_paired_shifts(shift_node, employee_id):
+        """
+        Assign the shift and, for on-call employees, the shifts that go with it:
+        the whole weekend day on the equipment, or the evening+night pair on weekdays.
+        """
+        date, equipment_id, shift_type = shift_node
+        is_weekend = date.weekday() >= 5
+        
+        matching[shift_node] = employee_id
+        if employee_id not in reverse_matching:
+            reverse_matching[employee_id] = set()
+        reverse_matching[employee_id].add(shift_node)
+        matched_hours.add(employee_id, shift_node)
+        
+        employee = snapshot.get_employee(employee_id)
+        if is_weekend and employee.shift_availability == 'all_shifts':
+            for other_shift in shifts_by_date_equipment.get(date, {}).get(equipment_id, []):
+                if other_shift != shift_node and other_shift not in matching:
+                    matching[other_shift] = employee_id
+                    reverse_matching[employee_id].add(other_shift)
+                    matched_hours.add(employee_id, other_shift)
+        
+        if not is_weekend and employee.shift_availability == 'all_shifts':
+            if shift_type == 'evening':
+                for other_shift in shifts_by_date_equipment.get(date, {}).get(equipment_id, []):
+                    if other_shift[2] == 'night' and other_shift not in matching:
+                        matching[other_shift] = employee_id
+                        reverse_matching[employee_id].add(other_shift)
+                        matched_hours.add(employee_id, other_shift)
+            elif shift_type == 'night':
+                for other_shift in shifts_by_date_equipment.get(date, {}).get(equipment_id, []):
+                    if other_shift[2] == 'evening' and other_shift not in matching:
+                        matching[other_shift] = employee_id
+                        reverse_matching[employee_id].add(other_shift)
+                        matched_hours.add(employee_id, other_shift)
+    
+    assignment = solve_by_component(get_assignment_engine(), valid_edges, snapshot.skill_components())
+    
+    for shift_node in shift_nodes:
+        employee_id = assignment.get(shift_node)
+        if employee_id is not None and shift_node not in matching:
+            assign_with_paired_shifts(shift_node, employee_id)
+    
+    unassigned_shifts = [s for s in shift_nodes if s not in matching]
+    
+    if unassigned_shifts:
+        logger.debug(f"Found {len(unassigned_shifts)} unassigned shifts. Attempting to assign with relaxed constraints.")
+        
+        unassigned_shifts.sort(key=lambda s: (s[0], s[2]))
+        
+        for shift_node in unassigned_shifts:
+            date, equipment_id, shift_type = shift_node
+            is_weekend = date.weekday() >= 5
+            
+            candidates = []
+            
+            for employee_id in employee_nodes:
+                employee = snapshot.employees_by_id.get(employee_id)
+                
+                if employee is None or not snapshot.has_any_skill(employee_id):
+                    continue
+                
+                weight = 0
+                
+                skill = snapshot.skill_level(employee.id, equipment_id)
+                
+                if not skill:
+                    continue
+                
+                if skill == 'primary':
+                    weight += 1000
+                else:
+                    weight += 100
+                
+                if employee.shift_availability == 'morning_only' and shift_type != 'morning':
+                    continue
+                    
+                if employee.shift_availability == 'day_only' and shift_type == 'night':
+                    continue
+                    
+                if employee.shift_availability == 'all_shifts' and not is_weekend and shift_type == 'morning':
+                    continue
+                
+                time_off = snapshot.has_approved_time_off(employee.id, date)
+                
+                if time_off:
+                    continue
+                
+                has_shift_on_date = False
+                if employee_id in reverse_matching:
+                    for existing_shift in reverse_matching[employee_id]:
+                        if existing_shift[0] == date:
+                            if is_weekend and employee.shift_availability == 'all_shifts':
+                                if existing_shift[1] != equipment_id:
+                                    has_shift_on_date = True
+                                    break
+                            else:
+                                has_shift_on_date = True
+                                break
+                
+                if has_shift_on_date:
+                    continue
+                
+                has_night_conflict = False
+                if employee_id in reverse_matching:
+                    for existing_shift in reverse_matching[employee_id]:
+                        existing_date, _, existing_shift_type = existing_shift
+                        if existing_shift_type == 'night':
+                            days_diff = (date - existing_date).days
+                            if days_diff < 3:
+                                has_night_conflict = True
+                                break
+                
+                if has_night_conflict:
+                    continue
+                
+                if employee.shift_availability == 'all_shifts':
+                    if is_weekend:
+                        already_assigned_to_other = False
+                        for other_shift in shifts_by_date_equipment.get(date, {}).get(equipment_id, []):
+                            if other_shift in matching and matching[other_shift] != employee_id:
+                                already_assigned_to_other = True
+                                break
+                                
+                        if already_assigned_to_other:
+                            continue
+                            
+                        weight += 2000
+                    else:
+                        if shift_type == 'evening':
+                            night_shift = None
+                            for s in shifts_by_date_equipment.get(date, {}).get(equipment_id, []):
+                                if s[2] == 'night':
+                                    night_shift = s
+                                    break
+                                    
+                            if night_shift and night_shift in matching and matching[night_shift] != employee_id:
+                                continue
+                                
+                        elif shift_type == 'night':
+                            evening_shift = None
+                            for s in shifts_by_date_equipment.get(date, {}).get(equipment_id, []):
+                                if s[2] == 'evening':
+                                    evening_shift = s
+                                    break
+                                    
+                            if evening_shift and evening_shift in matching and matching[evening_shift] != employee_id:
+                                continue
+                
+                heapq.heappush(candidates, (-weight, employee_id))
+            
+            if candidates:
+                _, best_employee_id = heapq.heappop(candidates)
+                assign_with_paired_shifts(shift_node, best_employee_id)
+    
+    try:
+        for date in shifts_by_date_equipment:
+            is_weekend = date.weekday() >= 5
+            if is_weekend:
+                for equipment_id, shifts in shifts_by_date_equipment[date].items():
+                    if not shifts:
+                        continue
+                    
+                    assigned_workers = set()
+                    for shift in shifts:
+                        if shift in matching:
+                            worker_id = matching[shift]
+                            employee = snapshot.employees_by_id.get(worker_id)
+                            if employee is not None and employee.shift_availability == 'all_shifts':
+                                assigned_workers.add(worker_id)
+                    
+                    if len(assigned_workers) > 1:
+                        worker_counts = {w: sum(1 for s in shifts if s in matching and matching[s] == w)
+                                        for w in assigned_workers}
+                        if worker_counts:
+                            best_worker = max(worker_counts.items(), key=lambda x: x[1])[0]
+                            
+                            for shift in shifts:
+                                if shift in matching and matching[shift] in assigned_workers:
+                                    old_worker = matching[shift]
+                                    if old_worker != best_worker:
+                                        if old_worker in reverse_matching:
+                                            reverse_matching[old_worker].remove(shift)
+                                            matched_hours.remove(old_worker, shift)
+                                            if not reverse_matching[old_worker]:
+                                                del reverse_matching[old_worker]
+                                        
+                                        matching[shift] = best_worker
+                                        if best_worker not in reverse_matching:
+                                            reverse_matching[best_worker] = set()
+                                        reverse_matching[best_worker].add(shift)
+                                        matched_hours.add(best_worker, shift)
+    except Exception as e:
+        logger.error(f"Error in weekend shift handling: {e}")
+    
+    try:
+        for date in shifts_by_date_equipment:
+            is_weekend = date.weekday() >= 5
+            if not is_weekend:
+                for equipment_id, shifts in shifts_by_date_equipment[date].items():
+                    evening_shift = None
+                    night_shift = None
+                    for shift in shifts:
+                        if shift[2] == 'evening':
+                            evening_shift = shift
+                        elif shift[2] == 'night':
+                            night_shift = shift
+                    
+                    if not evening_shift or not night_shift:
+                        continue
+                    
+                    if (evening_shift in matching and night_shift in matching and
+                        matching[evening_shift] != matching[night_shift]):
+                        
+                        evening_worker = matching[evening_shift]
+                        night_worker = matching[night_shift]
+                        
+                        evening_worker_skill = snapshot.skill_level(evening_worker, equipment_id)
+                        
+                        night_worker_skill = snapshot.skill_level(night_worker, equipment_id)
+                        
+                        if (evening_worker_skill and evening_worker_skill == 'primary'):
+                            best_worker = evening_worker
+                        elif (night_worker_skill and night_worker_skill == 'primary'):
+                            best_worker = night_worker
+                        else:
+                            best_worker = evening_worker
+                        
+                        for shift in [evening_shift, night_shift]:
+                            old_worker = matching[shift]
+                            if old_worker != best_worker:
+                                if old_worker in reverse_matching:
+                                    reverse_matching[old_worker].remove(shift)
+                                    matched_hours.remove(old_worker, shift)
+                                    if not reverse_matching[old_worker]:
+                                        del reverse_matching[old_worker]
+                                
+                                matching[shift] = best_worker
+                                if best_worker not in reverse_matching:
+                                    reverse_matching[best_worker] = set()
+                                reverse_matching[best_worker].add(shift)
+                                matched_hours.add(best_worker, shift)
+    except Exception as e:
+        logger.error(f"Error in evening/night shift handling: {e}")
+    
+    try:
+        for employee_id in employee_nodes:
+            try:
+                employee = snapshot.get_employee(employee_id)
+                if employee_id not in reverse_matching:
+                    continue
+                    
+                night_shifts = [s for s in reverse_matching[employee_id] if s[2] == 'night']
+                if len(night_shifts) <= 1:
+                    continue
+                    
+                night_shifts.sort(key=lambda x: x[0])
+                
+                violations = []
+                for i in range(1, len(night_shifts)):
+                    days_between = (night_shifts[i][0] - night_shifts[i-1][0]).days
+                    if days_between < 3:
+                        violations.append((night_shifts[i-1], night_shifts[i]))
+                
+                for shift1, shift2 in violations:
+                    date, equipment_id, shift_type = shift2
+                    candidates = []
+                    
+                    for other_id in employee_nodes:
+                        if other_id == employee_id:
+                            continue
+                            
+                        skill = snapshot.skill_level(other_id, equipment_id) is not None
+                        
+                        if not skill:
+                            continue
+                            
+                        has_shift = False
+                        if other_id in reverse_matching:
+                            for s in reverse_matching[other_id]:
+                                if s[0] == date:
+                                    has_shift = True
+                                    break
+                        
+                        if has_shift:
+                            continue
+                            
+                        try:
+                            other_employee = snapshot.get_employee(other_id)
+                            time_off = snapshot.has_approved_time_off(other_employee.id, date)
+                            
+                            if time_off:
+                                continue
+                                
+                            if other_employee.shift_availability == 'morning_only':
+                                continue
+                                
+                            if other_employee.shift_availability == 'day_only':
+                                continue
+                            
+                            candidates.append(other_id)
+                        except Employee.DoesNotExist:
+                            continue
+                    
+                    if candidates:
+                        candidate_counts = {c: len(reverse_matching.get(c, set())) for c in candidates}
+                        best_candidate = min(candidate_counts.items(), key=lambda x: x[1])[0]
+                        
+                        reverse_matching[employee_id].remove(shift2)
+                        matched_hours.remove(employee_id, shift2)
+                        
+                        matching[shift2] = best_candidate
+                        if best_candidate not in reverse_matching:
+                            reverse_matching[best_candidate] = set()
+                        reverse_matching[best_candidate].add(shift2)
+                        matched_hours.add(best_candidate, shift2)
+            except Employee.DoesNotExist:
+                continue
+    except Exception as e:
+        logger.error(f"Error in rest period handling: {e}")
+    
+    try:
+        for date in shifts_by_date_equipment:
+            is_weekend = date.weekday() >= 5
+            if is_weekend:
+                weekend_workers = {}
+                
+                for employee_id in employee_nodes:
+                    try:
+                        employee = snapshot.get_employee(employee_id)
+                        if employee.shift_availability != 'all_shifts':
+                            continue
+                            
+                        if employee_id not in reverse_matching:
+                            continue
+                            
+                        has_weekend_shift = False
+                        for shift in reverse_matching[employee_id]:
+                            if shift[0] == date:
+                                has_weekend_shift = True
+                                break
+                                
+                        if has_weekend_shift:
+                            weekend_workers[employee_id] = []
+                            
+                            for shift in reverse_matching[employee_id]:
+                                if shift[0] == date:
+                                    weekend_workers[employee_id].append(shift)
+                    except Employee.DoesNotExist:
+                        continue
+                
+                for worker_id, shifts in weekend_workers.items():
+                    shift_types = set(shift[2] for shift in shifts)
+                    
+                    if len(shift_types) < 3:
+                        missing_types = set(['morning', 'evening', 'night']) - shift_types
+                        
+                        for missing_type in missing_types:
+                            worker_equipment = set(shift[1] for shift in shifts)
+                            
+                            for equipment_id in worker_equipment:
+                                if equipment_id in shifts_by_date_equipment.get(date, {}):
+                                    for shift in shifts_by_date_equipment[date][equipment_id]:
+                                        if shift[2] == missing_type and shift in matching:
+                                            current_worker = matching[shift]
+                                            
+                                            if current_worker == worker_id:
+                                                continue
+                                                
+                                            if current_worker in reverse_matching:
+                                                reverse_matching[current_worker].remove(shift)
+                                                matched_hours.remove(current_worker, shift)
+                                                if not reverse_matching[current_worker]:
+                                                    del reverse_matching[current_worker]
+                                            
+                                            matching[shift] = worker_id
+                                            reverse_matching[worker_id].add(shift)
+                                            matched_hours.add(worker_id, shift)
+                                            break
+    except Exception as e:
+        logger.error(f"Error in weekend shift pattern handling: {e}")
+    
+    try:
+        for employee_id in employee_nodes:
+            try:
+                employee = snapshot.get_employee(employee_id)
+                if employee.shift_availability != 'all_shifts' or employee_id not in reverse_matching:
+                    continue
+                    
+                all_shifts = list(reverse_matching[employee_id])
+                all_shifts.sort(key=lambda x: x[0])
+                
+                weekend_shifts = [shift for shift in all_shifts if shift[0].weekday() >= 5]
+                
+                for weekend_shift in weekend_shifts:
+                    weekend_date = weekend_shift[0]
+                    
+                    for days_after in range(1, 4):
+                        next_date = weekend_date + timedelta(days=days_after)
+                        
+                        next_date_shifts = [shift for shift in all_shifts if shift[0] == next_date]
+                        
+                        for shift in next_date_shifts:
+                            date, equipment_id, shift_type = shift
+                            
+                            candidates = []
+                            for other_id in employee_nodes:
+                                if other_id == employee_id:
+                                    continue
+                                    
+                                skill = snapshot.skill_level(other_id, equipment_id) is not None
+                                
+                                if not skill:
+                                    continue
+                                    
+                                has_shift = False
+                                if other_id in reverse_matching:
+                                    for s in reverse_matching[other_id]:
+                                        if s[0] == date:
+                                            has_shift = True
+                                            break
+                                
+                                if has_shift:
+                                    continue
+                                    
+                                try:
+                                    other_employee = snapshot.get_employee(other_id)
+                                    time_off = snapshot.has_approved_time_off(other_employee.id, date)
+                                    
+                                    if time_off:
+                                        continue
+                                        
+                                    if shift_type == 'morning' and other_employee.shift_availability not in ['morning_only', 'day_only', 'all_shifts']:
+                                        continue
+                                        
+                                    if shift_type in ['evening', 'night'] and other_employee.shift_availability not in ['day_only', 'all_shifts']:
+                                        continue
+                                        
+                                    if shift_type == 'night' and other_employee.shift_availability == 'day_only':
+                                        continue
+                                    
+                                    candidates.append(other_id)
+                                except Employee.DoesNotExist:
+                                    continue
+                            
+                            if candidates:
+                                candidate_counts = {c: len(reverse_matching.get(c, set())) for c in candidates}
+                                best_candidate = min(candidate_counts.items(), key=lambda x: x[1])[0]
+                                
+                                reverse_matching[employee_id].remove(shift)
+                                matched_hours.remove(employee_id, shift)
+                                
+                                matching[shift] = best_candidate
+                                if best_candidate not in reverse_matching:
+                                    reverse_matching[best_candidate] = set()
+                                reverse_matching[best_candidate].add(shift)
+                                matched_hours.add(best_candidate, shift)
+            except Employee.DoesNotExist:
+                continue
+    except Exception as e:
+        logger.error(f"Error in rest days handling: {e}")
+    
+    try:
+        for employee_id in employee_nodes:
+            try:
+                primary_equipment_ids = snapshot.primary_equipment_ids(employee_id)
+                
+                if not primary_equipment_ids or employee_id not in reverse_matching:
+                    continue
+                
+                employee_shifts = list(reverse_matching[employee_id])
+                
+                non_primary_shifts = [shift for shift in employee_shifts if shift[1] not in primary_equipment_ids]
+                
+                for shift in non_primary_shifts:
+                    date, equipment_id, shift_type = shift
+                    
+                    primary_skilled_employees = snapshot.employees_with_skill(equipment_id, 'primary')
+                    
+                    candidates = []
+                    for other_id in primary_skilled_employees:
+                        if other_id == employee_id:
+                            continue
+                            
+                        has_shift = False
+                        if other_id in reverse_matching:
+                            for s in reverse_matching[other_id]:
+                                if s[0] == date:
+                                    has_shift = True
+                                    break
+                        
+                        if has_shift:
+                            continue
+                            
+                            try:
+                                other_employee = snapshot.get_employee(other_id)
+                                time_off = snapshot.has_approved_time_off(other_employee.id, date)
+                                
+                                if time_off:
+                                    continue
+                                    
+                                if shift_type == 'morning' and other_employee.shift_availability not in ['morning_only', 'day_only', 'all_shifts']:
+                                    continue
+                                    
+                                if shift_type in ['evening', 'night'] and other_employee.shift_availability not in ['day_only', 'all_shifts']:
+                                    continue
+                                    
+                                if shift_type == 'night' and other_employee.shift_availability == 'day_only':
+                                    continue
+                                
+                                candidates.append(other_id)
+                            except Employee.DoesNotExist:
+                                continue
+                    
+                    if candidates:
+                        candidate_counts = {c: len(reverse_matching.get(c, set())) for c in candidates}
+                        best_candidate = min(candidate_counts.items(), key=lambda x: x[1])[0]
+                        
+                        reverse_matching[employee_id].remove(shift)
+                        matched_hours.remove(employee_id, shift)
+                        
+                        matching[shift] = best_candidate
+                        if best_candidate not in reverse_matching:
+                            reverse_matching[best_candidate] = set()
+                        reverse_matching[best_candidate].add(shift)
+                        matched_hours.add(best_candidate, shift)
+            except Exception as e:
+                logger.error(f"Error processing employee {employee_id}: {e}")
+                continue
+    except Exception as e:
+        logger.error(f"Error in primary equipment assignment: {e}")
+    
+    final_unassigned = [s for s in shift_nodes if s not in matching]
+    if final_unassigned:
+        logger.warning(f"Still have {len(final_unassigned)} unassigned shifts after post-processing.")
+        
+        for shift_node in final_unassigned:
+            employee_counts = {e_id: len(reverse_matching.get(e_id, set())) for e_id in employee_nodes}
+            best_employee_id = min(employee_counts.items(), key=lambda x: x[1])[0]
+            
+            matching[shift_node] = best_employee_id
+            if best_employee_id not in reverse_matching:
+                reverse_matching[best_employee_id] = set()
+            reverse_matching[best_employee_id].add(shift_node)
+            matched_hours.add(best_employee_id, shift_node)
+    
+    result = [(employee_id, shift_node) for shift_node, employee_id in matching.items()]
+    return result
+
+def apply_scheduling_rules(initial_matching, employee_nodes, shift_nodes, edges, day_workers, on_call_workers, snapshot, required_hours=None):
+    import heapq
+    
+    day_worker_ids = {worker.id for worker in day_workers}
+    on_call_worker_ids = {worker.id for worker in on_call_workers}
+    state = MatchingState(initial_matching, employee_nodes)
+    
+    shifts_by_date = {}
+    for shift_node in shift_nodes:
+        date, equipment_id, shift_type = shift_node
+        if date not in shifts_by_date:
+            shifts_by_date[date] = []
+        shifts_by_date[date].append(shift_node)
+    
+    shifts_by_date_equipment = {}
+    for date, date_shifts in shifts_by_date.items():
+        shifts_by_date_equipment[date] = {}
+        for shift in date_shifts:
+            _, equipment_id, _ = shift
+            if equipment_id not in shifts_by_date_equipment[date]:
+                shifts_by_date_equipment[date][equipment_id] = []
+            shifts_by_date_equipment[date][equipment_id].append(shift)
+    
+    employee_required_hours = dict(required_hours or {})
+    
+    first_date = min([shift[0] for shift in shift_nodes]) if shift_nodes else datetime.now().date()
+    for employee_id in employee_nodes:
+        if employee_id in employee_required_hours:
+            continue
+        employee = snapshot.get_employee(employee_id)
+        employee_required_hours[employee_id] = get_required_hours(employee, first_date.year, first_date.month)
+    
+    for date, date_shifts in shifts_by_date.items():
+        is_weekend = date.weekday() >= 5
+        
+        if not is_weekend:
+            morning_shifts = [shift for shift in date_shifts if shift[2] == 'morning']
+            
+            for shift in morning_shifts:
+                if shift in state and state[shift] in day_worker_ids:
+                    continue
+                
+                candidates = []
+                for worker in day_workers:
+                    if (worker.id, shift) in edges:
+                        time_off = snapshot.has_approved_time_off(worker.id, shift[0])
+                        
+                        if time_off:
+                            continue
+                        
+                        has_shift_on_date = state.works_on(worker.id, shift[0])
+                        
+                        if has_shift_on_date:
+                            continue
+                        
+                        weight = edges[(worker.id, shift)]
+                        
+                        hours_if_assigned = state.total_hours(worker.id) + 6
+                        hours_diff = abs(hours_if_assigned - employee_required_hours[worker.id])
+                        adjusted_weight = weight - (hours_diff * 2)
+                        
+                        time_off = snapshot.first_time_off(worker.id, shift[0])
+                        
+                        if time_off and time_off.status == 'pending':
+                            if time_off.priority == 'high':
+                                adjusted_weight -= 100
+                            elif time_off.priority == 'medium':
+                                adjusted_weight -= 50
+                            elif time_off.priority == 'low':
+                                adjusted_weight -= 20
+                        
+                        prev_day = shift[0] - timedelta(days=1)
+                        prev_day_schedule = snapshot.worked_on(worker.id, prev_day)
+                        
+                        if prev_day_schedule:
+                            adjusted_weight -= 80
+                        
+                        heapq.heappush(candidates, (-adjusted_weight, worker.id))
+                
+                if candidates:
+                    _, best_worker_id = heapq.heappop(candidates)
+                    
+                    state.assign(shift, best_worker_id)
+    
+    for shift_node in shift_nodes:
+        date, equipment_id, shift_type = shift_node
+        if date.weekday() < 5 and shift_type in ['evening', 'night'] and shift_node in state:
+            state.unassign(shift_node)
+    
+    weekday_assignments = {} 
+    
+    weekday_dates = [date for date in shifts_by_date.keys() if date.weekday() < 5]
+    weekday_dates.sort()
+    
+    for date in weekday_dates:
+        if date not in weekday_assignments:
+            weekday_assignments[date] = set()
+            
+        equipment_shifts = shifts_by_date_equipment.get(date, {})
+        
+        for equipment_id, shifts in equipment_shifts.items():
+            evening_shift = None
+            night_shift = None
+            
+            for shift in shifts:
+                if shift[2] == 'evening':
+                    evening_shift = shift
+                elif shift[2] == 'night':
+                    night_shift = shift
+            
+            if evening_shift and night_shift:
+                candidates = []
+                for worker in on_call_workers:
+                    if worker.id in weekday_assignments.get(date, set()):
+                        continue
+                        
+                    approved_time_off = snapshot.has_approved_time_off(worker.id, date)
+                    
+                    high_priority_time_off = snapshot.has_pending_time_off(worker.id, date, 'high')
+                    
+                    if approved_time_off or high_priority_time_off:
+                        continue
+                    
+                    skill = snapshot.skill_level(worker.id, equipment_id) is not None
+                    
+                    if not skill:
+                        continue
+                    
+                    prev_day = date - timedelta(days=1)
+                    if prev_day in weekday_assignments and worker.id in weekday_assignments[prev_day]:
+                        continue
+                    
+                    next_day = date + timedelta(days=1)
+                    if next_day in weekday_assignments and worker.id in weekday_assignments[next_day]:
+                        continue
+                    
+                    if snapshot.night_within(worker.id, date, 2):
+                        continue
+                    
+                    if (worker.id, evening_shift) not in edges or (worker.id, night_shift) not in edges:
+                        continue
+                        
+                    total_weight = edges[(worker.id, evening_shift)] + edges[(worker.id, night_shift)]
+                    
+                    total_hours = state.total_hours(worker.id) + 18
+                    
+                    hours_diff = abs(total_hours - employee_required_hours[worker.id])
+                    adjusted_weight = total_weight - (hours_diff * 2)
+                    
+                    time_off = snapshot.pending_time_off(worker.id, date)
+                    
+                    if time_off:
+                        if time_off.priority == 'high':
+                            continue
+                        elif time_off.priority == 'medium':
+                            adjusted_weight -= 500 
+                        elif time_off.priority == 'low':
+                            adjusted_weight -= 200
+                    
+                    heapq.heappush(candidates, (-adjusted_weight, worker.id))
+                
+                if candidates:
+                    _, best_worker_id = heapq.heappop(candidates)
+                    
+                    weekday_assignments[date].add(best_worker_id)
+                    
+                    for shift in [evening_shift, night_shift]:
+                        state.assign(shift, best_worker_id)
+                    
+                    logger.debug(f"Assigned worker {best_worker_id} to evening+night shifts on {date} for equipment {equipment_id}")
+                else:
+                    logger.info(f"No suitable worker found for evening+night shifts on {date} for equipment {equipment_id}")
+                    
+                    fallback_candidates = []
+                    for worker in on_call_workers:
+                        if (worker.id, evening_shift) in edges and (worker.id, night_shift) in edges:
+                            approved_time_off = snapshot.has_approved_time_off(worker.id, date)
+                            
+                            high_priority_time_off = snapshot.has_pending_time_off(worker.id, date, 'high')
+                            
+                            if not (approved_time_off or high_priority_time_off):
+                                fallback_candidates.append(worker.id)
+                    
+                    if fallback_candidates:
+                        best_worker_id = min(fallback_candidates, key=lambda w_id: state.workload(w_id))
+                        
+                        weekday_assignments[date].add(best_worker_id)
+                        
+                        for shift in [evening_shift, night_shift]:
+                            state.assign(shift, best_worker_id)
+                        
+                        logger.debug(f"Assigned fallback worker {best_worker_id} to evening+night shifts on {date}")
+                
+                for shift in shifts:
+                    if (shift[2] in ['evening', 'night'] and
+                        shift != evening_shift and shift != night_shift and
+                        (shift not in state or
+                         state[shift] not in on_call_worker_ids)):
+                        
+                        candidates = []
+                        for worker in on_call_workers:
+                            if (worker.id, shift) in edges:
+                                approved_time_off = snapshot.has_approved_time_off(worker.id, shift[0])
+                                
+                                high_priority_time_off = snapshot.has_pending_time_off(worker.id, shift[0], 'high')
+                                
+                                if approved_time_off or high_priority_time_off:
+                                    continue
+                                
+                                has_shift_on_date = state.works_on(worker.id, shift[0])
+                                
+                                if has_shift_on_date:
+                                    continue
+                                
+                                weight = edges[(worker.id, shift)]
+                                
+                                shift_hours = 12 if shift[2] == 'night' else 6
+                                hours_if_assigned = state.total_hours(worker.id) + shift_hours
+                                hours_diff = abs(hours_if_assigned - employee_required_hours[worker.id])
+                                adjusted_weight = weight - (hours_diff * 2)
+                                
+                                time_off = snapshot.pending_time_off(worker.id, shift[0])
+                                
+                                if time_off:
+                                    if time_off.priority == 'high':
+                                        continue
+                                    elif time_off.priority == 'medium':
+                                        adjusted_weight -= 500
+                                    elif time_off.priority == 'low':
+                                        adjusted_weight -= 200
+                                
+                                prev_day = shift[0] - timedelta(days=1)
+                                prev_day_schedule = snapshot.worked_on(worker.id, prev_day)
+                                
+                                if prev_day_schedule:
+                                    adjusted_weight -= 80
+                                
+                                if shift[2] == 'night':
+                                    last_night_date = snapshot.last_night_before(worker.id, shift[0])
+                                    
+                                    if last_night_date is not None:
+                                        days_since_last_night = (shift[0] - last_night_date).days
+                                        
+                                        if days_since_last_night < 3:
+                                            continue
+                                
+                                heapq.heappush(candidates, (-adjusted_weight, worker.id))
+                        
+                        if candidates:
+                            _, best_worker_id = heapq.heappop(candidates)
+                            
+                            state.assign(shift, best_worker_id)
+    
+    for shift_node in shift_nodes:
+        date, equipment_id, _ = shift_node
+        if date.weekday() >= 5:
+            try:
+                equipment = snapshot.get_equipment(equipment_id)
+                if equipment.equipment_type == 'rkt_ge' and shift_node in state:
+                    state.unassign(shift_node)
+            except Exception as e:
+                logger.error(f"Error removing weekend RKT assignment: {e}")
+    
+    weekend_dates = [date for date in shifts_by_date.keys() if date.weekday() >= 5]
+    weekend_dates.sort()
+    
+    weekend_rkt_workers = {}
+    
+    for date in weekend_dates:
+        rkt_shifts_by_equipment = {}
+        for equipment_id, shifts in shifts_by_date_equipment.get(date, {}).items():
+            try:
+                equipment = snapshot.get_equipment(equipment_id)
+                if equipment.equipment_type == 'rkt_ge':
+                    rkt_shifts_by_equipment[equipment_id] = shifts
+            except Exception as e:
+                logger.error(f"Error processing equipment {equipment_id}: {e}")
+        
+        if not rkt_shifts_by_equipment:
+            continue
+        
+        for equipment_id, shifts in rkt_shifts_by_equipment.items():
+            shift_types = [shift[2] for shift in shifts]
+            if len(set(shift_types)) < 3:
+                logger.warning(f"Not all shift types present for RKT equipment {equipment_id} on {date}")
+                continue
+            
+            candidates = []
+            for worker in on_call_workers:
+                already_assigned_weekend = False
+                for w_date, w_id in weekend_rkt_workers.items():
+                    if w_id == worker.id and w_date != date:
+                        already_assigned_weekend = True
+                        break
+                
+                if already_assigned_weekend:
+                    continue
+                
+                approved_time_off = snapshot.has_approved_time_off(worker.id, date)
+                
+                high_priority_time_off = snapshot.has_pending_time_off(worker.id, date, 'high')
+                
+                if approved_time_off or high_priority_time_off:
+                    continue
+                
+                skill = snapshot.skill_level(worker.id, equipment_id) is not None
+                
+                if not skill:
+                    continue
+                
+                total_weight = 0
+                total_hours = state.total_hours(worker.id)
+                can_take_all = True
+                
+                for shift in shifts:
+                    if (worker.id, shift) in edges:
+                        total_weight += edges[(worker.id, shift)]
+                        if shift[2] == 'morning':
+                            total_hours += 6
+                        elif shift[2] == 'evening':
+                            total_hours += 6
+                        elif shift[2] == 'night':
+                            total_hours += 12
+                    else:
+                        can_take_all = False
+                        break
+                
+                if not can_take_all:
+                    continue
+                
+                hours_diff = abs(total_hours - employee_required_hours[worker.id])
+                adjusted_weight = total_weight - (hours_diff * 2)
+                
+                heapq.heappush(candidates, (-adjusted_weight, worker.id))
+            
+            if candidates:
+                _, best_worker_id = heapq.heappop(candidates)
+                
+                weekend_rkt_workers[date] = best_worker_id
+                
+                for shift in shifts:
+                    state.assign(shift, best_worker_id)
+                    
+                logger.debug(f"Assigned worker {best_worker_id} to all RKT shifts on {date} for equipment {equipment_id}")
+            else:
+                logger.warning(f"No suitable worker found for RKT equipment {equipment_id} on {date}")
+                
+                least_busy_worker = min(on_call_workers, key=lambda w: state.workload(w.id))
+                
+                for shift in shifts:
+                    state.assign(shift, least_busy_worker.id)
+                
+                logger.debug(f"Assigned least busy worker {least_busy_worker.id} to all RKT shifts on {date}")
+            
+            for equipment_id, shifts in equipment_shifts.items():
+                equipment = snapshot.get_equipment(equipment_id)
+                
+                if equipment.equipment_type == 'rkt_ge':
+                    continue
+                
+                if equipment.equipment_type != 'rkt_ge' and any(s[2] != 'morning' for s in shifts):
+                    continue
+                
+                equipment_shifts = [s for s in shifts if s[0] == date and s[1] == equipment_id]
+                
+                all_assigned = all(shift in state for shift in equipment_shifts)
+                
+                if not all_assigned:
+                    continue
+                
+                assigned_workers = set()
+                for shift in equipment_shifts:
+                    worker_id = state[shift]
+                    if worker_id in on_call_worker_ids:
+                        assigned_workers.add(worker_id)
+                
+                if len(assigned_workers) == 1:
+                    continue
+                
+                candidates = []
+                for worker in on_call_workers:
+                    total_weight = 0
+                    all_shifts_available = True
+                    
+                    approved_time_off = snapshot.has_approved_time_off(worker.id, date)
+                    
+                    high_priority_time_off = snapshot.has_pending_time_off(worker.id, date, 'high')
+                    
+                    if approved_time_off or high_priority_time_off:
+                        continue
+                        
+                    skill = snapshot.skill_level(worker.id, equipment.id) is not None
+                    
+                    if not skill:
+                        continue
+                    
+                    prev_day = date - timedelta(days=1)
+                    prev_day_schedule = snapshot.worked_on(worker.id, prev_day)
+                    
+                    if prev_day_schedule:
+                        continue 
+                    
+                    if snapshot.night_within(worker.id, date, 3):
+                        continue
+                    
+                    total_hours = state.total_hours(worker.id)
+                    for shift in shifts:
+                        if (worker.id, shift) in edges:
+                            total_weight += edges[(worker.id, shift)]
+                            if shift[2] == 'morning':
+                                total_hours += 6
+                            elif shift[2] == 'evening':
+                                total_hours += 6
+                            elif shift[2] == 'night':
+                                total_hours += 12
+                        else:
+                            all_shifts_available = False
+                            break
+                    
+                    if all_shifts_available:
+                        hours_diff = abs(total_hours - employee_required_hours[worker.id])
+                        adjusted_weight = total_weight - (hours_diff * 2)
+                        
+                        heapq.heappush(candidates, (-adjusted_weight, worker.id))
+                
+                if candidates:
+                    _, best_worker_id = heapq.heappop(candidates)
+                    
+                    for shift in shifts:
+                        state.assign(shift, best_worker_id)
+    
+    for employee_id in employee_nodes:
+        if abs(state.total_hours(employee_id) - employee_required_hours[employee_id]) <= 6:
+            continue
+        
+        is_overloaded = state.total_hours(employee_id) > employee_required_hours[employee_id] + 12
+        
+        if is_overloaded:
+            employee_shifts = state.shifts_of(employee_id)
+            employee_shifts.sort(key=lambda x: x[0], reverse=True)
+            
+            for shift in employee_shifts:
+                if state.total_hours(employee_id) <= employee_required_hours[employee_id] + 6:
+                    break
+                
+                date, equipment_id, shift_type = shift
+                is_weekend = date.weekday() >= 5
+                
+                if is_weekend and employee_id in on_call_worker_ids:
+                    continue
+                
+                if shift_type == 'morning' and employee_id in day_worker_ids:
+                    continue
+                
+                candidates = []
+                for other_id in edges.employees_for(shift):
+                    if other_id == employee_id:
+                        continue
+                    
+                    if state.total_hours(other_id) >= employee_required_hours[other_id]:
+                        continue
+                    
+                    time_off = snapshot.has_approved_time_off(other_id, shift[0])
+                    
+                    if time_off:
+                        continue
+                    
+                    conflict = state.works_on(other_id, date)
+                    
+                    if conflict:
+                        continue
+                    
+                    employee = snapshot.get_employee(other_id)
+                    if not ((shift_type == 'morning' and employee.shift_availability == 'morning_only') or
+                           (shift_type != 'night' and employee.shift_availability == 'day_only') or
+                           employee.shift_availability == 'all_shifts'):
+                        continue
+                    
+                    weight = edges[(other_id, shift)]
+                    
+                    shift_hours = 12 if shift_type == 'night' else 6
+                    hours_if_assigned = state.total_hours(other_id) + shift_hours
+                    hours_diff = abs(hours_if_assigned - employee_required_hours[other_id])
+                    adjusted_weight = weight - (hours_diff * 2)
+                    
+                    heapq.heappush(candidates, (-adjusted_weight, other_id))
+            
+                if candidates:
+                    _, best_employee_id = heapq.heappop(candidates)
+                    
+                    state.assign(shift, best_employee_id)
+    
+    all_shifts_assigned = True
+    for shift_node in shift_nodes:
+        if shift_node not in state:
+            all_shifts_assigned = False
+            logger.warning(f"Shift {shift_node} is not assigned in apply_scheduling_rules")
+            
+            date, equipment_id, shift_type = shift_node
+            candidates = []
+            
+            for employee_id in edges.employees_for(shift_node):
+                weight = edges[(employee_id, shift_node)]
+                
+                has_shift_on_date = state.works_on(employee_id, date)
+                
+                if has_shift_on_date:
+                    weight -= 1000
+                
+                heapq.heappush(candidates, (-weight, employee_id))
+            
+            if candidates:
+                _, best_employee_id = heapq.heappop(candidates)
+                state.assign(shift_node, best_employee_id)
+            else:
+                employee_counts = {e_id: state.workload(e_id) for e_id in employee_nodes}
+                best_employee_id = min(employee_counts.items(), key=lambda x: x[1])[0]
+                
+                state.assign(shift_node, best_employee_id)
+    
+    if not all_shifts_assigned:
+        logger.warning("Some shifts were not assigned during rule application. Emergency assignments were made.")
+    
+    return state.pairs()
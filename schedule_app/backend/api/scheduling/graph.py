@@ -0,0 +1,137 @@
+from array import array
+from bisect import bisect_left
+
+
+class ShiftGraph:
+    """Bipartite graph between employees and shift nodes with integer weights.
+
+    Shift nodes are (date, equipment_id, shift_type) tuples. Employees and
+    shifts are numbered in the order they are added, and edges live in
+    per-employee arrays of sorted shift indices with aligned weights plus
+    per-shift arrays of employee indices. Looking up one edge costs
+    O(log deg), and listing the neighbours of a node costs O(deg) instead of
+    a scan over every edge.
+
+    The graph also behaves like the flat {(employee_id, shift_node): weight}
+    dict it replaces: `in`, `[]`, get(), items() and len() all work on those keys.
+    """
+
+    def __init__(self, shift_nodes=()):
+        self.shift_nodes = []
+        self.shift_index = {}
+        self.employee_ids = []
+        self.employee_index = {}
+        self._employee_shifts = []
+        self._employee_weights = []
+        self._shift_employees = []
+        self._edge_count = 0
+
+        for shift_node in shift_nodes:
+            self.add_shift(shift_node)
+
+    def add_shift(self, shift_node):
+        index = self.shift_index.get(shift_node)
+        if index is None:
+            index = len(self.shift_nodes)
+            self.shift_index[shift_node] = index
+            self.shift_nodes.append(shift_node)
+            self._shift_employees.append(array('l'))
+        return index
+
+    def add_employee(self, employee_id):
+        index = self.employee_index.get(employee_id)
+        if index is None:
+            index = len(self.employee_ids)
+            self.employee_index[employee_id] = index
+            self.employee_ids.append(employee_id)
+            self._employee_shifts.append(array('l'))
+            self._employee_weights.append(array('q'))
+        return index
+
+    def add_edge(self, employee_id, shift_node, weight):
+        """Add the edge, or replace its weight if it already exists"""
+        employee = self.add_employee(employee_id)
+        shift = self.add_shift(shift_node)
+
+        shifts = self._employee_shifts[employee]
+        weights = self._employee_weights[employee]
+        position = bisect_left(shifts, shift)
+        if position < len(shifts) and shifts[position] == shift:
+            weights[position] = weight
+            return
+
+        if position == len(shifts):
+            shifts.append(shift)
+            weights.append(weight)
+        else:
+            shifts.insert(position, shift)
+            weights.insert(position, weight)
+        self._shift_employees[shift].append(employee)
+        self._edge_count += 1
+
+    def _position(self, employee_id, shift_node):
+        employee = self.employee_index.get(employee_id)
+        shift = self.shift_index.get(shift_node)
+        if employee is None or shift is None:
+            return None
+        shifts = self._employee_shifts[employee]
+        position = bisect_left(shifts, shift)
+        if position < len(shifts) and shifts[position] == shift:
+            return employee, position
+        return None
+
+    def weight(self, employee_id, shift_node, default=None):
+        found = self._position(employee_id, shift_node)
+        if found is None:
+            return default
+        employee, position = found
+        return self._employee_weights[employee][position]
+
+    def employees_for(self, shift_node):
+        """Ids of employees with an edge to the shift, in the order they were added"""
+        shift = self.shift_index.get(shift_node)
+        if shift is None:
+            return []
+        return [self.employee_ids[employee] for employee in self._shift_employees[shift]]
+
+    def shifts_for(self, employee_id):
+        """Shift nodes adjacent to the employee, in shift index order"""
+        employee = self.employee_index.get(employee_id)
+        if employee is None:
+            return []
+        return [self.shift_nodes[shift] for shift in self._employee_shifts[employee]]
+
+    def degree(self, employee_id):
+        employee = self.employee_index.get(employee_id)
+        return 0 if employee is None else len(self._employee_shifts[employee])
+
+    def items(self):
+        for employee, employee_id in enumerate(self.employee_ids):
+            for shift, weight in zip(self._employee_shifts[employee], self._employee_weights[employee]):
+                yield (employee_id, self.shift_nodes[shift]), weight
+
+    def keys(self):
+        for key, _ in self.items():
+            yield key
+
+    def get(self, key, default=None):
+        return self.weight(key[0], key[1], default)
+
+    def __getitem__(self, key):
+        found = self._position(key[0], key[1])
+        if found is None:
+            raise KeyError(key)
+        employee, position = found
+        return self._employee_weights[employee][position]
+
+    def __setitem__(self, key, weight):
+        self.add_edge(key[0], key[1], weight)
+
+    def __contains__(self, key):
+        return self._position(key[0], key[1]) is not None
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return self._edge_count
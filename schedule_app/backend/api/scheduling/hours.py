@@ -0,0 +1,45 @@
+from collections import defaultdict
+
+from api.scheduling.snapshot import SHIFT_HOURS
+
+
+class HoursLedger:
+    """Running totals of planned hours per employee, updated as shifts are added and removed.
+
+    Totals are kept both per (employee, year, month) and per employee for the
+    whole period, so reading them is O(1) instead of rescanning every planned
+    shift. A shift node is (date, equipment_id, shift_type); adding the same
+    (employee, shift node) pair twice, or removing one that is not there, is a
+    no-op, so the ledger mirrors set semantics of the matching it follows.
+    """
+
+    def __init__(self):
+        self._shifts = set()
+        self._month_hours = defaultdict(int)
+        self._total_hours = defaultdict(int)
+
+    def add(self, employee_id, shift_node):
+        key = (employee_id, shift_node)
+        if key in self._shifts:
+            return
+        self._shifts.add(key)
+        self._apply(employee_id, shift_node, 1)
+
+    def remove(self, employee_id, shift_node):
+        key = (employee_id, shift_node)
+        if key not in self._shifts:
+            return
+        self._shifts.remove(key)
+        self._apply(employee_id, shift_node, -1)
+
+    def _apply(self, employee_id, shift_node, sign):
+        shift_date, _, shift_type = shift_node
+        hours = SHIFT_HOURS.get(shift_type, 0) * sign
+        self._month_hours[(employee_id, shift_date.year, shift_date.month)] += hours
+        self._total_hours[employee_id] += hours
+
+    def month_hours(self, employee_id, year, month):
+        return self._month_hours.get((employee_id, year, month), 0)
+
+    def total_hours(self, employee_id):
+        return self._total_hours.get(employee_id, 0)
@@ -0,0 +1,211 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import ScheduleGenerationJob
+from api.scheduling.generator import generate_random_schedule, generate_schedule
+from api.scheduling.rolling import MAX_ROLLING_PERIOD_DAYS, generate_schedule_by_weeks
+
+logger = logging.getLogger(__name__)
+
+GENERATORS = {
+    'matching': generate_schedule,
+    'random': generate_random_schedule,
+    'weekly': generate_schedule_by_weeks,
+}
+
+# Longest period in days a method may be asked to generate, methods not listed have no limit
+MAX_PERIOD_DAYS = {
+    'matching': 31,
+    'weekly': MAX_ROLLING_PERIOD_DAYS,
+}
+
+# Key of the PostgreSQL advisory lock held while a job is enqueued
+ENQUEUE_LOCK_KEY = 7301
+
+_executor = None
+_executor_lock = threading.Lock()
+_enqueue_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'SCHEDULE_JOB_WORKERS', 1),
+                thread_name_prefix='schedule-job'
+            )
+        return _executor
+
+
+class JobExpired(Exception):
+    """The job stopped being 'running' before its schedule was written"""
+
+
+class JobProgress:
+    """progress(phase, percent) callback that stores the job progress and how long each phase took.
+
+    The generators report the 'save' phase inside the transaction that writes
+    the schedule. There the job row is locked and a job that is no longer
+    running, e.g. one failed by expire_stale_jobs, aborts the write, so an
+    expired run cannot overwrite the period under a newer job.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self._phase_started = None
+
+    def _close_phase(self, now):
+        if self.job.phase and self._phase_started is not None:
+            timings = self.job.phase_timings
+            timings[self.job.phase] = round(timings.get(self.job.phase, 0) + now - self._phase_started, 3)
+
+    def _ensure_running(self):
+        status = ScheduleGenerationJob.objects.select_for_update().filter(
+            id=self.job.id
+        ).values_list('status', flat=True).first()
+        if status != 'running':
+            raise JobExpired(f"Задача перестала выполняться ({status}) до сохранения расписания")
+
+    def __call__(self, phase, percent):
+        if phase == 'save':
+            self._ensure_running()
+        if phase == self.job.phase and percent == self.job.progress:
+            return
+
+        now = time.monotonic()
+        if phase != self.job.phase:
+            self._close_phase(now)
+            self._phase_started = now
+            self.job.phase = phase
+        self.job.progress = percent
+        self.job.save(update_fields=['phase', 'progress', 'phase_timings'])
+
+    def finish(self):
+        self._close_phase(time.monotonic())
+        self._phase_started = None
+
+
+def run_generation_job(job_id):
+    """Run a queued job in the current thread and record its outcome"""
+    started_at = timezone.now()
+    # Only the worker that moves the job out of 'queued' runs it
+    started = ScheduleGenerationJob.objects.filter(id=job_id, status='queued').update(
+        status='running',
+        started_at=started_at
+    )
+    job = ScheduleGenerationJob.objects.select_related('created_by').get(id=job_id)
+    if not started:
+        return job
+    logger.info(f"Schedule generation job {job.id} started for period {job.start_date} to {job.end_date}")
+
+    progress = JobProgress(job)
+    try:
+        job.created_count = GENERATORS[job.method](
+            job.start_date,
+            job.end_date,
+            created_by=job.created_by,
+            progress=progress
+        )
+    except Exception as e:
+        logger.exception(f"Schedule generation job {job.id} failed")
+        job.status = 'failed'
+        job.error = str(e)
+    else:
+        job.status = 'completed'
+        job.progress = 100
+
+    progress.finish()
+    job.finished_at = timezone.now()
+    # A job expired while it ran stays failed, a newer job may own its period by now
+    finished = ScheduleGenerationJob.objects.filter(id=job.id, status='running').update(
+        status=job.status,
+        progress=job.progress,
+        created_count=job.created_count,
+        error=job.error,
+        phase_timings=job.phase_timings,
+        finished_at=job.finished_at
+    )
+    if not finished:
+        logger.warning(f"Schedule generation job {job.id} expired before it finished with status {job.status}")
+        job.refresh_from_db()
+        return job
+    logger.info(f"Schedule generation job {job.id} finished with status {job.status}")
+    return job
+
+
+def _run_in_worker(job_id):
+    try:
+        run_generation_job(job_id)
+    except Exception:
+        logger.exception(f"Schedule generation job {job_id} could not be run")
+    finally:
+        connections.close_all()
+
+
+def expire_stale_jobs():
+    """Fail active jobs stuck for longer than SCHEDULE_JOB_TIMEOUT, e.g. left behind by a restarted process.
+
+    A queued job is stale when it was created that long ago, a running one
+    when it started that long ago, so waiting in the queue does not count
+    against the run.
+    """
+    timeout = getattr(settings, 'SCHEDULE_JOB_TIMEOUT', 600)
+    now = timezone.now()
+    deadline = now - timedelta(seconds=timeout)
+    return ScheduleGenerationJob.objects.filter(
+        Q(status='queued', created_at__lt=deadline) | Q(status='running', started_at__lt=deadline)
+    ).update(
+        status='failed',
+        error="Задача не завершилась за отведённое время",
+        finished_at=now
+    )
+
+
+def _lock_job_periods():
+    """Serialise enqueues until the end of the transaction, across processes on PostgreSQL"""
+    connection = connections[ScheduleGenerationJob.objects.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [ENQUEUE_LOCK_KEY])
+
+
+def enqueue_generation_job(start_date, end_date, created_by=None, method='matching'):
+    """Queue schedule generation for the period and return the job right away.
+
+    An active job whose period overlaps the requested one is returned instead
+    of starting a second generation over the same dates. The check and the
+    create run under a lock, so concurrent requests cannot both miss it.
+    """
+    with _enqueue_lock, transaction.atomic():
+        _lock_job_periods()
+        expire_stale_jobs()
+
+        active_job = ScheduleGenerationJob.objects.filter(
+            status__in=ScheduleGenerationJob.ACTIVE_STATUSES,
+            start_date__lte=end_date,
+            end_date__gte=start_date
+        ).first()
+        if active_job:
+            return active_job
+
+        job = ScheduleGenerationJob.objects.create(
+            method=method,
+            start_date=start_date,
+            end_date=end_date,
+            created_by=created_by
+        )
+
+    if getattr(settings, 'SCHEDULE_JOBS_RUN_INLINE', False):
+        return run_generation_job(job.id)
+
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, job.id))
+    return job
@@ -0,0 +1,75 @@
+from collections import defaultdict
+from itertools import count
+
+from api.scheduling.hours import HoursLedger
+
+
+class MatchingState:
+    """Current shift -> employee assignment with reverse indexes and running counters.
+
+    A shift node is (date, equipment_id, shift_type). Besides the assignment
+    itself the state keeps the shifts of every employee, the shifts of every
+    (employee, date) pair, the number of shifts per employee (workload) and
+    their hours (an HoursLedger), so "does the employee already work on this
+    day?" and reassigning a shift are O(1) instead of a scan over every
+    assignment. Iteration follows assignment order like a dict would: a
+    reassigned shift keeps its place, an unassigned one loses it.
+    """
+
+    def __init__(self, matching=(), employee_ids=()):
+        self._employee_of = {}
+        self._position = {}
+        self._positions = count()
+        self._shifts_of = defaultdict(set)
+        self._day_shifts = defaultdict(set)
+        self._workload = {employee_id: 0 for employee_id in employee_ids}
+        self.hours = HoursLedger()
+        for employee_id, shift_node in matching:
+            self.assign(shift_node, employee_id)
+
+    def __contains__(self, shift_node):
+        return shift_node in self._employee_of
+
+    def __getitem__(self, shift_node):
+        return self._employee_of[shift_node]
+
+    def assign(self, shift_node, employee_id):
+        """Give the shift to the employee, taking it from its current employee if any"""
+        if shift_node in self._employee_of:
+            self._detach(shift_node)
+        else:
+            self._position[shift_node] = next(self._positions)
+        self._employee_of[shift_node] = employee_id
+        self._shifts_of[employee_id].add(shift_node)
+        self._day_shifts[(employee_id, shift_node[0])].add(shift_node)
+        self._workload[employee_id] = self._workload.get(employee_id, 0) + 1
+        self.hours.add(employee_id, shift_node)
+
+    def unassign(self, shift_node):
+        self._detach(shift_node)
+        del self._employee_of[shift_node]
+        del self._position[shift_node]
+
+    def _detach(self, shift_node):
+        employee_id = self._employee_of[shift_node]
+        self._shifts_of[employee_id].discard(shift_node)
+        self._day_shifts[(employee_id, shift_node[0])].discard(shift_node)
+        self._workload[employee_id] -= 1
+        self.hours.remove(employee_id, shift_node)
+
+    def works_on(self, employee_id, date):
+        return bool(self._day_shifts.get((employee_id, date)))
+
+    def shifts_of(self, employee_id):
+        """Shifts of the employee in assignment order"""
+        return sorted(self._shifts_of.get(employee_id, ()), key=self._position.__getitem__)
+
+    def workload(self, employee_id):
+        return self._workload[employee_id]
+
+    def total_hours(self, employee_id):
+        return self.hours.total_hours(employee_id)
+
+    def pairs(self):
+        """The assignment as a list of (employee_id, shift_node)"""
+        return [(employee_id, shift_node) for shift_node, employee_id in self._employee_of.items()]
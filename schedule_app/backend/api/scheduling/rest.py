@@ -0,0 +1,86 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from api.models import Schedule
+from api.scheduling.work_calendar import is_last_day_of_month
+
+
+class RestCalendar:
+    """Worked days and night shifts of every employee as day-indexed bitmaps.
+
+    Bit i of an employee's mask stands for origin + i days, so "worked on any
+    of the last n days" or "had a night within n days" is a single AND with a
+    shifted mask instead of a lookup per day. Days before the origin are never
+    set. Saved shifts and tentative assignments of the current run go into the
+    same masks through add(). The last work day of the previous month kept on
+    the employee (last_work_day_prev_month) is tracked apart, because it only
+    blocks the first day of the next month.
+    """
+
+    def __init__(self, origin):
+        self.origin = origin
+        self._worked = defaultdict(int)
+        self._nights = defaultdict(int)
+        self._carried = {}
+
+    @classmethod
+    def load(cls, start_date, end_date, employees=()):
+        """Calendar of the saved shifts of the period with the employees' carried over days, read with a single query"""
+        rest = cls(start_date)
+        employee_ids = [employee.id for employee in employees]
+        rows = Schedule.objects.filter(
+            employee_id__in=employee_ids,
+            date__gte=start_date,
+            date__lte=end_date
+        ).values_list('employee_id', 'date', 'shift_type')
+        for employee_id, day, shift_type in rows:
+            rest.add(employee_id, day, shift_type)
+        for employee in employees:
+            rest.carry_over(employee)
+        return rest
+
+    def _index(self, day):
+        return (day - self.origin).days
+
+    def _window(self, day, days_back):
+        """Mask of the days_back days right before the day"""
+        end = self._index(day)
+        start = max(end - days_back, 0)
+        if end <= start:
+            return 0
+        return ((1 << (end - start)) - 1) << start
+
+    def add(self, employee_id, day, shift_type):
+        index = self._index(day)
+        if index < 0:
+            return
+        self._worked[employee_id] |= 1 << index
+        if shift_type == 'night':
+            self._nights[employee_id] |= 1 << index
+
+    def carry_over(self, employee):
+        """Remember the employee's last work day of the previous month when it closed that month"""
+        last_work_day = employee.last_work_day_prev_month
+        if last_work_day and is_last_day_of_month(last_work_day):
+            self._carried[employee.id] = last_work_day
+
+    def worked_on(self, employee_id, day):
+        return bool(self._worked.get(employee_id, 0) & self._window(day + timedelta(days=1), 1))
+
+    def worked_within(self, employee_id, day, days_back):
+        """Whether the employee worked on any of the days_back days before the day"""
+        return bool(self._worked.get(employee_id, 0) & self._window(day, days_back))
+
+    def night_within(self, employee_id, day, days_back):
+        """Whether the employee had a night shift on any of the days_back days before the day"""
+        return bool(self._nights.get(employee_id, 0) & self._window(day, days_back))
+
+    def carried_over(self, employee_id, day):
+        """Whether the day opens a month whose previous last day the employee worked"""
+        return self._carried.get(employee_id) == day - timedelta(days=1)
+
+    def last_night_before(self, employee_id, day):
+        nights = self._nights.get(employee_id, 0) & self._window(day, max(self._index(day), 0))
+        if not nights:
+            return None
+        return self.origin + timedelta(days=nights.bit_length() - 1)
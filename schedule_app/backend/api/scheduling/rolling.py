@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from api.scheduling.generator import plan_schedule, save_generated_schedule
+from api.scheduling.snapshot import SchedulingSnapshot
+from api.scheduling.work_calendar import (
+    get_required_hours, get_working_days_in_month, month_after, month_bounds, working_days_between
+)
+
+ROLLING_WINDOW_DAYS = 7
+ROLLING_OVERLAP_DAYS = 3
+MAX_ROLLING_PERIOD_DAYS = 92
+
+
+def rolling_windows(start_date, end_date, window_days=ROLLING_WINDOW_DAYS, overlap_days=ROLLING_OVERLAP_DAYS):
+    """(window_start, keep_end, plan_end) for every window of the period.
+
+    A window is planned up to plan_end, overlap_days past the window_days it
+    keeps, so its last kept days are chosen knowing what follows them. The
+    next window starts right after keep_end. A tail of overlap_days or less
+    is kept by the last window instead of making a window of a day or two.
+    """
+    windows = []
+    window_start = start_date
+    while window_start <= end_date:
+        keep_end = window_start + timedelta(days=window_days - 1)
+        if (end_date - keep_end).days <= overlap_days:
+            keep_end = end_date
+        plan_end = min(keep_end + timedelta(days=overlap_days), end_date)
+        windows.append((window_start, keep_end, plan_end))
+        window_start = keep_end + timedelta(days=1)
+    return windows
+
+
+def _norm_share(employee, year, month, working_days):
+    """Part of the monthly norm of hours that falls on working_days working days of the month"""
+    month_working_days = get_working_days_in_month(year, month)
+    if not month_working_days:
+        return 0
+    return get_required_hours(employee, year, month) * working_days / month_working_days
+
+
+def window_required_hours(snapshot, employee_ids, start_date, end_date):
+    """Hours each employee should work from start_date to end_date.
+
+    The monthly norm is spread evenly over the working days of the month and
+    the window gets the share of its own working days. On top of that comes
+    what the employee is behind (or, subtracted, ahead) on the days of the
+    month before the window, measured against the hours the snapshot already
+    counts for that month, earlier windows included.
+    """
+    months = []
+    year_month = (start_date.year, start_date.month)
+    while month_bounds(*year_month)[0] <= end_date:
+        months.append(year_month)
+        year_month = month_after(*year_month)
+
+    year, month = months[0]
+    days_before = working_days_between(month_bounds(year, month)[0], start_date - timedelta(days=1))
+
+    required_hours = {}
+    for employee_id in employee_ids:
+        employee = snapshot.get_employee(employee_id)
+        hours = 0
+        for window_year, window_month in months:
+            first_day, last_day = month_bounds(window_year, window_month)
+            working_days = working_days_between(max(start_date, first_day), min(end_date, last_day))
+            hours += _norm_share(employee, window_year, window_month, working_days)
+        hours += _norm_share(employee, year, month, days_before) - snapshot.month_hours(employee_id, year, month)
+        required_hours[employee_id] = max(round(hours), 0)
+    return required_hours
+
+
+def _window_progress(progress, index, count):
+    """progress of one of count windows, with the window's percents below 90 scaled into its slice"""
+    def window_progress(phase, percent):
+        progress(phase, (90 * index + percent) // count)
+    return window_progress
+
+
+def generate_schedule_by_weeks(start_date, end_date, created_by=None, progress=None):
+    """
+    Generate the schedule for a long period with the weighted matching pipeline one week at a time.
+    Each week is planned together with a few days of look-ahead (see rolling_windows), and its
+    kept assignments go into the snapshot as scheduled shifts, so the rest rules and the monthly
+    hours of the next window see them. The cost grows linearly with the number of weeks.
+    The whole period is saved at once like generate_schedule does.
+    Returns the number of created schedule entries.
+    """
+    progress = progress or (lambda phase, percent: None)
+
+    progress('snapshot', 0)
+    snapshot = SchedulingSnapshot.load(start_date, end_date)
+    employee_ids = [employee.id for employee in snapshot.skilled_employees]
+    windows = rolling_windows(start_date, end_date)
+
+    planned = []
+    for index, (window_start, keep_end, plan_end) in enumerate(windows):
+        required_hours = window_required_hours(snapshot, employee_ids, window_start, plan_end)
+        matching = plan_schedule(
+            snapshot,
+            window_start,
+            plan_end,
+            _window_progress(progress, index, len(windows)),
+            required_hours
+        )
+        for employee_id, shift_node in matching:
+            date, equipment_id, shift_type = shift_node
+            if date <= keep_end:
+                planned.append((employee_id, shift_node))
+                snapshot.add_schedule(employee_id, equipment_id, date, shift_type)
+
+    return save_generated_schedule(planned, start_date, end_date, created_by, progress)
@@ -0,0 +1,206 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from api.models import (
+    Employee, Equipment, Schedule, EmployeeEquipmentSkill
+)
+from api.scheduling.rest import RestCalendar
+from api.scheduling.time_off import TimeOffIndex
+
+SHIFT_HOURS = {
+    'morning': 6,
+    'evening': 6,
+    'night': 12
+}
+
+SNAPSHOT_WINDOW_DAYS = 30
+
+
+class SchedulingSnapshot:
+    """In-memory view of everything the schedule generator reads from the database.
+
+    Loaded with a fixed number of bulk queries, so the cost of building the
+    generator graph no longer depends on the number of ORM round-trips per edge.
+    Schedule rows inside the generated period are ignored, because the
+    generator replaces them.
+    """
+
+    def __init__(self, start_date, end_date, window_days=SNAPSHOT_WINDOW_DAYS):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.window_start = start_date - timedelta(days=window_days)
+        self.window_end = end_date + timedelta(days=window_days)
+
+        self.employees = []
+        self.employees_by_id = {}
+        self.equipment_list = []
+        self.equipment_by_id = {}
+
+        self._skills = {}
+        self._skills_by_employee = defaultdict(dict)
+        self._skills_by_equipment = defaultdict(dict)
+        self._time_off = TimeOffIndex()
+        self._schedules = {}
+        self._month_hours = defaultdict(int)
+        self._month_nights = defaultdict(int)
+        self.rest = RestCalendar(self.window_start)
+
+    @classmethod
+    def load(cls, start_date, end_date, window_days=SNAPSHOT_WINDOW_DAYS):
+        snapshot = cls(start_date, end_date, window_days)
+        snapshot._load_employees()
+        snapshot._load_equipment()
+        snapshot._load_skills()
+        snapshot._load_time_off()
+        snapshot._load_schedules()
+        return snapshot
+
+    def _load_employees(self):
+        self.employees = list(Employee.objects.order_by('id'))
+        self.employees_by_id = {employee.id: employee for employee in self.employees}
+
+    def _load_equipment(self):
+        self.equipment_list = list(Equipment.objects.order_by('id'))
+        self.equipment_by_id = {equipment.id: equipment for equipment in self.equipment_list}
+
+    def _load_skills(self):
+        for employee_id, equipment_id, skill_level in EmployeeEquipmentSkill.objects.values_list(
+            'employee_id', 'equipment_id', 'skill_level'
+        ):
+            self._skills[(employee_id, equipment_id)] = skill_level
+            self._skills_by_employee[employee_id][equipment_id] = skill_level
+            self._skills_by_equipment[equipment_id][employee_id] = skill_level
+
+    def _load_time_off(self):
+        self._time_off = TimeOffIndex.load(self.window_start, self.window_end)
+
+    def _load_schedules(self):
+        rows = Schedule.objects.filter(
+            date__gte=self.window_start,
+            date__lte=self.window_end
+        ).exclude(
+            date__gte=self.start_date,
+            date__lte=self.end_date
+        ).values_list('employee_id', 'equipment_id', 'date', 'shift_type')
+
+        for employee_id, equipment_id, day, shift_type in rows:
+            self.add_schedule(employee_id, equipment_id, day, shift_type)
+
+    def add_schedule(self, employee_id, equipment_id, day, shift_type):
+        """Count a shift as already scheduled, e.g. one planned for an earlier part of the period"""
+        self._schedules[(employee_id, day)] = (equipment_id, shift_type)
+        self._month_hours[(employee_id, day.year, day.month)] += SHIFT_HOURS.get(shift_type, 0)
+        self.rest.add(employee_id, day, shift_type)
+        if shift_type == 'night':
+            self._month_nights[(employee_id, day.year, day.month)] += 1
+
+    @property
+    def skilled_employees(self):
+        return [employee for employee in self.employees if self._skills_by_employee.get(employee.id)]
+
+    def get_employee(self, employee_id):
+        """Employee by id, raising Employee.DoesNotExist like the ORM lookup it replaces"""
+        try:
+            return self.employees_by_id[employee_id]
+        except KeyError:
+            raise Employee.DoesNotExist(f"Employee {employee_id} does not exist")
+
+    def get_equipment(self, equipment_id):
+        """Equipment by id, raising Equipment.DoesNotExist like the ORM lookup it replaces"""
+        try:
+            return self.equipment_by_id[equipment_id]
+        except KeyError:
+            raise Equipment.DoesNotExist(f"Equipment {equipment_id} does not exist")
+
+    def skill_level(self, employee_id, equipment_id):
+        """Skill level of the employee on the equipment, or None without a skill"""
+        return self._skills.get((employee_id, equipment_id))
+
+    def has_any_skill(self, employee_id):
+        return bool(self._skills_by_employee.get(employee_id))
+
+    def primary_equipment_ids(self, employee_id):
+        return [
+            equipment_id for equipment_id, level in self._skills_by_employee.get(employee_id, {}).items()
+            if level == 'primary'
+        ]
+
+    def employees_with_skill(self, equipment_id, skill_level=None):
+        return [
+            employee_id for employee_id, level in self._skills_by_equipment.get(equipment_id, {}).items()
+            if skill_level is None or level == skill_level
+        ]
+
+    def skill_components(self):
+        """Equipment grouped so that no employee is skilled on equipment of two groups.
+
+        Returns (employee_ids, equipment_ids) pairs of sets ordered by their
+        smallest equipment id; shifts of different groups never compete for
+        the same employee.
+        """
+        parent = {}
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for equipment_id in self._skills_by_equipment:
+            parent.setdefault(('equipment', equipment_id), ('equipment', equipment_id))
+        for employee_id, equipment_levels in self._skills_by_employee.items():
+            employee = parent.setdefault(('employee', employee_id), ('employee', employee_id))
+            for equipment_id in equipment_levels:
+                parent[find(('equipment', equipment_id))] = find(employee)
+
+        groups = defaultdict(lambda: (set(), set()))
+        for kind, node_id in parent:
+            employee_ids, equipment_ids = groups[find((kind, node_id))]
+            (employee_ids if kind == 'employee' else equipment_ids).add(node_id)
+        return sorted(groups.values(), key=lambda group: min(group[1]))
+
+    def time_off_requests(self, employee_id, day):
+        """Time off requests of any status covering the day, oldest first"""
+        return self._time_off.requests_on(employee_id, day)
+
+    def has_approved_time_off(self, employee_id, day):
+        return self._time_off.has_approved(employee_id, day)
+
+    def has_pending_time_off(self, employee_id, day, priority=None):
+        return self._time_off.has_pending(employee_id, day, priority)
+
+    def pending_time_off(self, employee_id, day):
+        return self._time_off.pending(employee_id, day)
+
+    def first_time_off(self, employee_id, day):
+        return self._time_off.first(employee_id, day)
+
+    def shift_on(self, employee_id, day):
+        """(equipment_id, shift_type) already scheduled for the employee on the day"""
+        return self._schedules.get((employee_id, day))
+
+    def worked_on(self, employee_id, day):
+        return (employee_id, day) in self._schedules
+
+    def has_shift(self, employee_id, day, shift_type, equipment_id=None):
+        scheduled = self._schedules.get((employee_id, day))
+        if scheduled is None or scheduled[1] != shift_type:
+            return False
+        return equipment_id is None or scheduled[0] == equipment_id
+
+    def worked_within(self, employee_id, day, days_back):
+        """Whether the employee worked on any of the days_back days before the day"""
+        return self.rest.worked_within(employee_id, day, days_back)
+
+    def night_within(self, employee_id, day, days_back):
+        """Whether the employee had a night shift on any of the days_back days before the day"""
+        return self.rest.night_within(employee_id, day, days_back)
+
+    def last_night_before(self, employee_id, day):
+        return self.rest.last_night_before(employee_id, day)
+
+    def month_hours(self, employee_id, year, month):
+        return self._month_hours.get((employee_id, year, month), 0)
+
+    def month_night_count(self, employee_id, year, month):
+        return self._month_nights.get((employee_id, year, month), 0)
@@ -0,0 +1,99 @@
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import F, Func
+
+from api.models import TimeOffRequest
+
+# Same expression as the timeoff_employee_period_gist index, so Postgres can use it
+PERIOD_TEMPLATE = "daterange(%(expressions)s, '[]')"
+
+
+def overlapping_time_off(start_date, end_date, queryset=None):
+    """Time off requests of any status that share at least one day with the period.
+
+    On PostgreSQL the check is an overlap of closed date ranges, served by the
+    GiST index over (employee_id, daterange(start_date, end_date)); other
+    databases compare the bounds.
+    """
+    queryset = TimeOffRequest.objects.all() if queryset is None else queryset
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(start_date__lte=end_date, end_date__gte=start_date)
+
+    from django.contrib.postgres.fields import DateRangeField
+    from django.db.backends.postgresql.psycopg_any import DateRange
+
+    period = Func(F('start_date'), F('end_date'), template=PERIOD_TEMPLATE, output_field=DateRangeField())
+    return queryset.alias(period=period).filter(period__overlap=DateRange(start_date, end_date, '[]'))
+
+
+class TimeOffIndex:
+    """Time off requests as per-employee intervals, for availability checks without queries.
+
+    Each employee's requests are sorted by start date next to a running
+    maximum of their end dates, so the requests covering a day are found
+    with a binary search followed by a walk over the overlapping ones only.
+    """
+
+    def __init__(self, requests=()):
+        by_employee = defaultdict(list)
+        for time_off in requests:
+            by_employee[time_off.employee_id].append(time_off)
+
+        self._requests = {}
+        self._starts = {}
+        self._max_ends = {}
+        for employee_id, employee_requests in by_employee.items():
+            employee_requests.sort(key=lambda time_off: (time_off.start_date, time_off.id))
+            max_ends = []
+            for time_off in employee_requests:
+                max_ends.append(max(max_ends[-1], time_off.end_date) if max_ends else time_off.end_date)
+            self._requests[employee_id] = employee_requests
+            self._starts[employee_id] = [time_off.start_date for time_off in employee_requests]
+            self._max_ends[employee_id] = max_ends
+
+    @classmethod
+    def load(cls, start_date, end_date, employee_ids=None):
+        """Index of every request overlapping the period, read with a single query"""
+        queryset = overlapping_time_off(start_date, end_date)
+        if employee_ids is not None:
+            queryset = queryset.filter(employee_id__in=list(employee_ids))
+        return cls(queryset)
+
+    def requests_on(self, employee_id, day):
+        """Time off requests of any status covering the day, oldest first"""
+        starts = self._starts.get(employee_id)
+        if not starts:
+            return []
+
+        requests = self._requests[employee_id]
+        max_ends = self._max_ends[employee_id]
+        covering = []
+        position = bisect_right(starts, day)
+        while position > 0 and max_ends[position - 1] >= day:
+            position -= 1
+            if requests[position].end_date >= day:
+                covering.append(requests[position])
+        covering.sort(key=lambda time_off: time_off.id)
+        return covering
+
+    def has_approved(self, employee_id, day):
+        return any(time_off.status == 'approved' for time_off in self.requests_on(employee_id, day))
+
+    def has_pending(self, employee_id, day, priority=None):
+        return any(
+            time_off.status == 'pending' and (priority is None or time_off.priority == priority)
+            for time_off in self.requests_on(employee_id, day)
+        )
+
+    def pending(self, employee_id, day):
+        """Oldest pending request covering the day, or None"""
+        for time_off in self.requests_on(employee_id, day):
+            if time_off.status == 'pending':
+                return time_off
+        return None
+
+    def first(self, employee_id, day):
+        requests = self.requests_on(employee_id, day)
+        return requests[0] if requests else None
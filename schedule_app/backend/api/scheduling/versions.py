@@ -0,0 +1,238 @@
+from datetime import timedelta
+from itertools import groupby
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Employee, Equipment, Schedule, ScheduleVersion
+from api.scheduling.weights import SHIFT_TYPE_CODES
+
+SHIFT_TYPES_BY_CODE = {code: shift_type for shift_type, code in SHIFT_TYPE_CODES.items()}
+
+# One packed entry is four little-endian int32: day offset from the version
+# start date, employee id, equipment id and shift type code.
+PACKED_DTYPE = np.dtype('<i4')
+PACKED_FIELDS = 4
+
+
+def pack_entries(entries, start_date):
+    """Pack (employee_id, equipment_id, date, shift_type) tuples into bytes"""
+    rows = sorted(
+        ((entry_date - start_date).days, employee_id, equipment_id, SHIFT_TYPE_CODES[shift_type])
+        for employee_id, equipment_id, entry_date, shift_type in entries
+    )
+    return np.array(rows, dtype=PACKED_DTYPE).reshape(-1, PACKED_FIELDS).tobytes()
+
+
+def unpack_entries(blob, start_date):
+    """Inverse of pack_entries(), returns a set of (employee_id, equipment_id, date, shift_type)"""
+    rows = np.frombuffer(bytes(blob), dtype=PACKED_DTYPE).reshape(-1, PACKED_FIELDS).tolist()
+    return {
+        (employee_id, equipment_id, start_date + timedelta(days=offset), SHIFT_TYPES_BY_CODE[code])
+        for offset, employee_id, equipment_id, code in rows
+    }
+
+
+def _version_chain(version):
+    """The version followed by its base versions down to the first full copy"""
+    chain = [version]
+    while chain[-1].storage == 'delta':
+        chain.append(chain[-1].base_version)
+    return chain
+
+
+def _full_entries(version):
+    if version.storage == 'entries':
+        return set(version.entries.values_list('employee_id', 'equipment_id', 'date', 'shift_type'))
+    return unpack_entries(version.packed_added, version.start_date)
+
+
+def get_version_entries(version):
+    """Rebuild the schedule stored in the version as a set of (employee_id, equipment_id, date, shift_type)"""
+    chain = _version_chain(version)
+    entries = _full_entries(chain.pop())
+    for delta in reversed(chain):
+        entries -= unpack_entries(delta.packed_removed, delta.start_date)
+        entries |= unpack_entries(delta.packed_added, delta.start_date)
+    return entries
+
+
+def create_schedule_version(name, start_date, end_date, created_by):
+    """Snapshot the schedule of the period into a new ScheduleVersion.
+
+    The version is stored as the assignments added and removed since the
+    latest version of the same period, so repeated generations of a month
+    only write what changed. The first version of a period, and every
+    SCHEDULE_VERSION_MAX_CHAIN-th one after it, is a full packed copy so
+    that rebuilding a version never walks a long chain.
+    Returns (version, entry_count), or (None, 0) when the period is empty.
+    """
+    entries = set(
+        Schedule.objects.filter(date__gte=start_date, date__lte=end_date)
+        .values_list('employee_id', 'equipment_id', 'date', 'shift_type')
+    )
+    if not entries:
+        return None, 0
+
+    base_version = ScheduleVersion.objects.filter(
+        start_date=start_date,
+        end_date=end_date
+    ).order_by('-created_at', '-id').first()
+    max_chain = getattr(settings, 'SCHEDULE_VERSION_MAX_CHAIN', 10)
+
+    if base_version is not None and len(_version_chain(base_version)) < max_chain:
+        base_entries = get_version_entries(base_version)
+        version = ScheduleVersion.objects.create(
+            name=name,
+            created_by=created_by,
+            start_date=start_date,
+            end_date=end_date,
+            storage='delta',
+            base_version=base_version,
+            packed_added=pack_entries(entries - base_entries, start_date),
+            packed_removed=pack_entries(base_entries - entries, start_date),
+            entry_count=len(entries)
+        )
+    else:
+        version = ScheduleVersion.objects.create(
+            name=name,
+            created_by=created_by,
+            start_date=start_date,
+            end_date=end_date,
+            storage='packed',
+            packed_added=pack_entries(entries, start_date),
+            entry_count=len(entries)
+        )
+    return version, len(entries)
+
+
+def _store_full_copy(version, entries):
+    version.storage = 'packed'
+    version.base_version = None
+    version.packed_added = pack_entries(entries, version.start_date)
+    version.packed_removed = b''
+    version.entry_count = len(entries)
+    version.save(update_fields=['storage', 'base_version', 'packed_added', 'packed_removed', 'entry_count'])
+
+
+def rebase_versions(versions):
+    """Store versions built on another one as full copies, so their base can be deleted"""
+    for version in versions:
+        _store_full_copy(version, get_version_entries(version))
+
+
+def compact_schedule_versions(keep, max_age_days=None, dry_run=False):
+    """Apply the version retention policy and repack what is left.
+
+    Only the `keep` newest versions of each period are kept, and with
+    max_age_days also only the ones created within that many days. Kept
+    versions built on a deleted version become full copies, and versions
+    still stored as ScheduleVersionEntry rows are packed.
+    Returns the number of packed, rebased and deleted versions.
+    """
+    stats = {'packed': 0, 'rebased': 0, 'deleted': 0}
+    cutoff = timezone.now() - timedelta(days=max_age_days) if max_age_days is not None else None
+
+    with transaction.atomic():
+        versions = list(ScheduleVersion.objects.order_by('start_date', 'end_date', '-created_at', '-id'))
+
+        expired = set()
+        for _, period_versions in groupby(versions, key=lambda version: (version.start_date, version.end_date)):
+            for index, version in enumerate(period_versions):
+                if index >= keep or (cutoff is not None and version.created_at < cutoff):
+                    expired.add(version.id)
+
+        # Oldest first, so a kept base is already self-contained when its dependants are checked
+        kept = sorted((version for version in versions if version.id not in expired), key=lambda version: (version.created_at, version.id))
+        for version in kept:
+            if version.storage == 'entries':
+                _store_full_copy(version, _full_entries(version))
+                version.entries.all().delete()
+                stats['packed'] += 1
+            elif version.storage == 'delta' and any(base.id in expired for base in _version_chain(version)[1:]):
+                _store_full_copy(version, get_version_entries(version))
+                stats['rebased'] += 1
+
+        # Newest first, so no deleted version is still the base of another one
+        for version in sorted((version for version in versions if version.id in expired), key=lambda version: (version.created_at, version.id), reverse=True):
+            version.delete()
+            stats['deleted'] += 1
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return stats
+
+
+def diff_version(version):
+    """Changes that turn the current schedule of the version's period back into the version.
+
+    Returns a dict with 'insert' (entries to create), 'update' (pairs of
+    schedule id and new entry, for rows of the same employee and day that
+    move to another equipment or shift), 'delete' (schedule id and entry) and
+    'skipped' (entries of the version whose employee or equipment has been
+    deleted since, which cannot be restored).
+    Entries are (employee_id, equipment_id, date, shift_type) tuples.
+    """
+    target = get_version_entries(version)
+    employee_ids = set(Employee.objects.filter(id__in={entry[0] for entry in target}).values_list('id', flat=True))
+    equipment_ids = set(Equipment.objects.filter(id__in={entry[1] for entry in target}).values_list('id', flat=True))
+    skipped = {entry for entry in target if entry[0] not in employee_ids or entry[1] not in equipment_ids}
+    target -= skipped
+    current = {
+        (employee_id, equipment_id, entry_date, shift_type): schedule_id
+        for schedule_id, employee_id, equipment_id, entry_date, shift_type in Schedule.objects.filter(
+            date__gte=version.start_date,
+            date__lte=version.end_date
+        ).values_list('id', 'employee_id', 'equipment_id', 'date', 'shift_type')
+    }
+
+    removed = {entry: schedule_id for entry, schedule_id in current.items() if entry not in target}
+    removed_by_day = {(entry[0], entry[2]): entry for entry in removed}
+
+    diff = {'insert': [], 'update': [], 'delete': [], 'skipped': sorted(skipped, key=lambda entry: (entry[2], entry[0]))}
+    for entry in sorted(target.difference(current), key=lambda entry: (entry[2], entry[0])):
+        old_entry = removed_by_day.pop((entry[0], entry[2]), None)
+        if old_entry is None:
+            diff['insert'].append(entry)
+        else:
+            diff['update'].append((removed.pop(old_entry), entry))
+    diff['delete'] = sorted(((schedule_id, entry) for entry, schedule_id in removed.items()), key=lambda item: (item[1][2], item[1][0]))
+    return diff
+
+
+def restore_version(version, dry_run=False):
+    """Make the schedule of the version's period match the version.
+
+    Only the rows that differ are touched: one bulk delete, one bulk_update
+    and one bulk_create in a single transaction. Entries of deleted employees
+    or equipment are skipped. With dry_run nothing is written. Returns the diff_version() result that was (or would be) applied.
+    """
+    with transaction.atomic():
+        diff = diff_version(version)
+        if dry_run:
+            return diff
+
+        if diff['delete']:
+            Schedule.objects.filter(id__in=[schedule_id for schedule_id, _ in diff['delete']]).delete()
+        if diff['update']:
+            Schedule.objects.bulk_update(
+                [
+                    Schedule(id=schedule_id, equipment_id=equipment_id, shift_type=shift_type)
+                    for schedule_id, (_, equipment_id, _, shift_type) in diff['update']
+                ],
+                ['equipment', 'shift_type']
+            )
+        if diff['insert']:
+            Schedule.objects.bulk_create([
+                Schedule(
+                    employee_id=employee_id,
+                    equipment_id=equipment_id,
+                    date=entry_date,
+                    shift_type=shift_type
+                )
+                for employee_id, equipment_id, entry_date, shift_type in diff['insert']
+            ])
+    return diff
@@ -0,0 +1,202 @@
+from datetime import timedelta
+
+import numpy as np
+
+from api.scheduling.snapshot import SHIFT_HOURS
+from api.scheduling.work_calendar import get_required_hours
+
+SHIFT_TYPE_CODES = {
+    'morning': 1,
+    'evening': 2,
+    'night': 3
+}
+UNKNOWN_SHIFT_TYPE = 4
+
+PRIORITY_CODES = {
+    'low': 1,
+    'medium': 2,
+    'high': 3
+}
+
+
+def build_weight_matrix(snapshot, employees, shift_nodes):
+    """Edge weights of the schedule generator for every employee x shift node pair.
+
+    Rows follow `employees`, columns follow `shift_nodes`, and infeasible pairs
+    are -inf. Every rule is evaluated with NumPy broadcasting over the whole
+    matrix. The only sequential part is the hours bands: an edge counts toward
+    the planned hours of later shifts in the same month, so the columns are
+    walked in order with the rule vectorised over employees.
+    """
+    n_employees = len(employees)
+    n_shifts = len(shift_nodes)
+    if not n_employees or not n_shifts:
+        return np.full((n_employees, n_shifts), -np.inf)
+
+    employee_ids = [employee.id for employee in employees]
+    availability = [employee.shift_availability for employee in employees]
+    morning_only = np.array([value == 'morning_only' for value in availability])[:, None]
+    day_only = np.array([value == 'day_only' for value in availability])[:, None]
+    all_shifts = np.array([value == 'all_shifts' for value in availability])[:, None]
+
+    shift_node_set = set(shift_nodes)
+    shift_dates = [shift_node[0] for shift_node in shift_nodes]
+    shift_equipment = np.array([shift_node[1] for shift_node in shift_nodes])
+    shift_type = np.array([SHIFT_TYPE_CODES.get(shift_node[2], UNKNOWN_SHIFT_TYPE) for shift_node in shift_nodes])
+    shift_hours = np.array([SHIFT_HOURS.get(shift_node[2], 0) for shift_node in shift_nodes])
+    is_weekend = np.array([shift_date.weekday() >= 5 for shift_date in shift_dates])
+    is_morning = shift_type == SHIFT_TYPE_CODES['morning']
+    is_evening = shift_type == SHIFT_TYPE_CODES['evening']
+    is_night = shift_type == SHIFT_TYPE_CODES['night']
+
+    equipment_types = {}
+    for equipment_id in set(shift_equipment.tolist()):
+        equipment_types[equipment_id] = snapshot.get_equipment(equipment_id).equipment_type
+    is_rkt_ge = np.array([equipment_types[e] == 'rkt_ge' for e in shift_equipment.tolist()])
+    is_mrt_or_toshiba = np.array([equipment_types[e] in ['mrt', 'rkt_toshiba'] for e in shift_equipment.tolist()])
+
+    # Existing schedule around each shift date: the day itself and three days back
+    context_days = sorted({shift_date - timedelta(days=days_back) for shift_date in set(shift_dates) for days_back in range(4)})
+    context_index = {day: index for index, day in enumerate(context_days)}
+    scheduled_type = np.zeros((n_employees, len(context_days)), dtype=np.int8)
+    scheduled_equipment = np.full((n_employees, len(context_days)), -1, dtype=np.int64)
+    for row, employee_id in enumerate(employee_ids):
+        for column, day in enumerate(context_days):
+            scheduled = snapshot.shift_on(employee_id, day)
+            if scheduled is not None:
+                scheduled_equipment[row, column] = scheduled[0]
+                scheduled_type[row, column] = SHIFT_TYPE_CODES.get(scheduled[1], UNKNOWN_SHIFT_TYPE)
+
+    def context_column(days_back):
+        return np.array([context_index[shift_date - timedelta(days=days_back)] for shift_date in shift_dates])
+
+    same_day, one_back, two_back, three_back = (context_column(days_back) for days_back in range(4))
+    worked = scheduled_type != 0
+    worked_same_day = worked[:, same_day]
+    worked_day_before = worked[:, one_back]
+    worked_recently = worked_day_before | worked[:, two_back] | worked[:, three_back]
+
+    def has_shift_on_equipment(type_code):
+        return ((scheduled_type[:, same_day] == type_code) &
+                (scheduled_equipment[:, same_day] == shift_equipment[None, :]))
+
+    # Time off on each shift date
+    days = sorted(set(shift_dates))
+    day_index = {day: index for index, day in enumerate(days)}
+    approved = np.zeros((n_employees, len(days)), dtype=bool)
+    pending_priority = np.zeros((n_employees, len(days)), dtype=np.int8)
+    for row, employee_id in enumerate(employee_ids):
+        for column, day in enumerate(days):
+            approved[row, column] = snapshot.has_approved_time_off(employee_id, day)
+            pending = snapshot.pending_time_off(employee_id, day)
+            if pending:
+                pending_priority[row, column] = PRIORITY_CODES.get(pending.priority, 0)
+    shift_day = np.array([day_index[shift_date] for shift_date in shift_dates])
+    approved = approved[:, shift_day]
+    pending_priority = pending_priority[:, shift_day]
+
+    # Skills
+    equipment_ids = sorted(equipment_types)
+    equipment_column = {equipment_id: index for index, equipment_id in enumerate(equipment_ids)}
+    skill = np.zeros((n_employees, len(equipment_ids)), dtype=np.int8)
+    for row, employee_id in enumerate(employee_ids):
+        for column, equipment_id in enumerate(equipment_ids):
+            level = snapshot.skill_level(employee_id, equipment_id)
+            if level:
+                skill[row, column] = 1 if level == 'primary' else 2
+    skill = skill[:, [equipment_column[e] for e in shift_equipment.tolist()]]
+
+    feasible = skill > 0
+    weight = np.where(skill == 1, 500, 50).astype(np.int64)
+
+    feasible &= ~morning_only | (is_morning & ~is_weekend)
+    weight += np.where(morning_only, 300, 0)
+
+    feasible &= ~day_only | (~is_night & ~is_weekend)
+    weight += np.where(day_only, 100, 0)
+
+    weekend_on_call = all_shifts & is_weekend
+    assigned_to_equipment = np.zeros((n_employees, n_shifts), dtype=bool)
+    for name, type_code in SHIFT_TYPE_CODES.items():
+        other_exists = np.array([
+            shift_node[2] != name and (shift_node[0], shift_node[1], name) in shift_node_set
+            for shift_node in shift_nodes
+        ])
+        assigned_to_equipment |= other_exists & has_shift_on_equipment(type_code)
+    feasible &= ~(weekend_on_call & worked_recently)
+    weight += np.where(
+        weekend_on_call,
+        np.where(assigned_to_equipment, 5000, np.where(is_morning, 1000, 800)),
+        0
+    )
+
+    weekday_on_call = all_shifts & ~is_weekend
+    feasible &= ~(weekday_on_call & is_morning)
+    night_exists = np.array([(shift_node[0], shift_node[1], 'night') in shift_node_set for shift_node in shift_nodes])
+    weekday_evening = weekday_on_call & is_evening
+    feasible &= ~(weekday_evening & worked_recently)
+    weight += np.where(weekday_evening, 1000 + np.where(night_exists, 2000, 0), 0)
+    weekday_night = weekday_on_call & is_night
+    feasible &= ~(weekday_night & ~has_shift_on_equipment(SHIFT_TYPE_CODES['evening']))
+    weight += np.where(weekday_night, 5000, 0)
+
+    feasible &= ~approved
+
+    weight -= np.select(
+        [pending_priority == PRIORITY_CODES['low'],
+         pending_priority == PRIORITY_CODES['medium'],
+         pending_priority == PRIORITY_CODES['high']],
+        [200, 500, 1000],
+        0
+    )
+    feasible &= pending_priority != PRIORITY_CODES['high']
+
+    weight -= np.where(worked_day_before, 300, 0)
+    weight -= np.where(scheduled_type[:, three_back] == SHIFT_TYPE_CODES['night'], 300, 0)
+
+    weight += np.where(worked_same_day, np.where(weekend_on_call, 100, -500), 0)
+    feasible &= ~(worked_same_day & ~weekend_on_call)
+
+    # Hours bands against the monthly norm
+    months = sorted({(shift_date.year, shift_date.month) for shift_date in shift_dates})
+    month_index = {month: index for index, month in enumerate(months)}
+    shift_month = np.array([month_index[(shift_date.year, shift_date.month)] for shift_date in shift_dates])
+    required = np.array([
+        [get_required_hours(employee, year, month) for year, month in months] for employee in employees
+    ])
+    current = np.array([
+        [snapshot.month_hours(employee_id, year, month) for year, month in months] for employee_id in employee_ids
+    ])
+    planned = np.zeros((n_employees, len(months)), dtype=np.int64)
+
+    for column in range(n_shifts):
+        month = shift_month[column]
+        total = current[:, month] + planned[:, month] + shift_hours[column]
+        norm = required[:, month]
+        surplus = total - norm
+        feasible[:, column] &= ~(total > norm + 12)
+        weight[:, column] += np.select(
+            [total > norm + 6, total > norm, total < norm - 12, total < norm],
+            [-surplus * 50, -surplus * 30, np.minimum(-surplus * 15, 300), np.minimum(-surplus * 10, 200)],
+            250
+        )
+        planned[feasible[:, column], month] += shift_hours[column]
+
+    # Night balance among on-call employees
+    on_call_count = int(all_shifts.sum())
+    night_shifts = np.zeros(len(months))
+    np.add.at(night_shifts, shift_month[is_night], 1)
+    average_nights = (night_shifts / (on_call_count or 1))[shift_month]
+    nights = np.array([
+        [snapshot.month_night_count(employee_id, year, month) for year, month in months] for employee_id in employee_ids
+    ])[:, shift_month]
+    weight += np.where(
+        all_shifts & is_night,
+        np.where(nights > average_nights + 1, -200, np.where(nights < average_nights - 1, 50, 0)),
+        0
+    )
+
+    weight += np.where(is_rkt_ge, 20, 0)
+    weight -= np.where(is_mrt_or_toshiba & is_weekend & ~is_morning, 50, 0)
+
+    return np.where(feasible, weight.astype(float), -np.inf)
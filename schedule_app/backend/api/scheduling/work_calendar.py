@@ -0,0 +1,159 @@
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULT_HOLIDAY_CALENDAR = 'none'
+
+HOURS_PER_WORKING_DAY = 6
+
+
+class HolidayCalendar:
+    """Public holidays that are days off on top of Saturdays and Sundays"""
+
+    name = None
+
+    def holidays(self, year):
+        return set()
+
+
+class NoHolidayCalendar(HolidayCalendar):
+    name = 'none'
+
+
+class RussianHolidayCalendar(HolidayCalendar):
+    """Non-working public holidays of the Russian Labour Code (article 112).
+
+    A holiday that falls on a weekend moves to the next working day, except
+    the New Year holidays and Christmas (January 1-8). Extra transfers set by
+    the yearly government decree are not part of the rules and need a
+    calendar of their own.
+    """
+
+    name = 'ru'
+
+    NEW_YEAR_HOLIDAYS = [(1, day) for day in range(1, 9)]
+    PUBLIC_HOLIDAYS = [(2, 23), (3, 8), (5, 1), (5, 9), (6, 12), (11, 4)]
+
+    def holidays(self, year):
+        days = {date(year, month, day) for month, day in self.NEW_YEAR_HOLIDAYS + self.PUBLIC_HOLIDAYS}
+        for month, day in self.PUBLIC_HOLIDAYS:
+            holiday = date(year, month, day)
+            if holiday.weekday() < 5:
+                continue
+            transfer = holiday + timedelta(days=1)
+            while transfer.weekday() >= 5 or transfer in days:
+                transfer += timedelta(days=1)
+            days.add(transfer)
+        return days
+
+
+HOLIDAY_CALENDARS = {
+    NoHolidayCalendar.name: NoHolidayCalendar,
+    RussianHolidayCalendar.name: RussianHolidayCalendar,
+}
+
+
+def _calendar_name(name=None):
+    if name is None:
+        name = getattr(settings, 'SCHEDULE_HOLIDAY_CALENDAR', DEFAULT_HOLIDAY_CALENDAR)
+    return name
+
+
+def get_holiday_calendar(name=None):
+    """Holiday calendar instance by name, defaulting to settings.SCHEDULE_HOLIDAY_CALENDAR"""
+    name = _calendar_name(name)
+    try:
+        return HOLIDAY_CALENDARS[name]()
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown schedule holiday calendar: {name}")
+
+
+@lru_cache(maxsize=None)
+def _holidays(name, year):
+    return frozenset(get_holiday_calendar(name).holidays(year))
+
+
+@lru_cache(maxsize=None)
+def _working_days(name, year, month):
+    holidays = _holidays(name, year)
+    first_day, last_day = month_bounds(year, month)
+    return sum(
+        1 for offset in range(last_day.day)
+        if (first_day.weekday() + offset) % 7 < 5 and first_day + timedelta(days=offset) not in holidays
+    )
+
+
+def holidays(year, name=None):
+    """Public holidays of the year in the holiday calendar, computed once per calendar and year"""
+    return _holidays(_calendar_name(name), year)
+
+
+def is_working_day(day, name=None):
+    return day.weekday() < 5 and day not in holidays(day.year, name)
+
+
+def get_working_days_in_month(year, month, name=None):
+    """Working days of the month: weekdays that are not public holidays of the holiday calendar"""
+    return _working_days(_calendar_name(name), year, month)
+
+
+def working_days_between(start_date, end_date, name=None):
+    """Working days from start_date to end_date inclusive, 0 for an empty range"""
+    return sum(
+        1 for offset in range((end_date - start_date).days + 1)
+        if is_working_day(start_date + timedelta(days=offset), name)
+    )
+
+
+@lru_cache(maxsize=None)
+def _required_hours(working_days, rate):
+    required_hours = working_days * HOURS_PER_WORKING_DAY
+    if float(rate) == 1.5:
+        required_hours = round(required_hours * 1.5)
+    return required_hours
+
+
+def required_hours_for_rate(rate, year, month):
+    """Monthly norm of hours for a rate: 6 hours per working day, one and a half times for the 1.5 rate"""
+    return _required_hours(get_working_days_in_month(year, month), rate)
+
+
+def get_required_hours(employee, year, month):
+    """Monthly norm of hours for the employee: 6 hours per working day, scaled by the rate"""
+    return required_hours_for_rate(employee.rate, year, month)
+
+
+@lru_cache(maxsize=None)
+def month_bounds(year, month):
+    """First and last day of the month"""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def month_before(year, month):
+    """(year, month) of the previous month"""
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def month_after(year, month):
+    """(year, month) of the next month"""
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def is_last_day_of_month(day):
+    return (day + timedelta(days=1)).day == 1
+
+
+def week_bounds(day):
+    """Monday and Sunday of the week of the day"""
+    start_date = day - timedelta(days=day.weekday())
+    return start_date, start_date + timedelta(days=6)
+
+
+def period_bounds(day, view_mode):
+    """First and last day of the month of the day for the 'month' view, of its week otherwise"""
+    if view_mode == 'month':
+        return month_bounds(day.year, day.month)
+    return week_bounds(day)
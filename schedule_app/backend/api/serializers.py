@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Employee, Equipment, Schedule, EmployeeEquipmentSkill, TimeOffRequest
+from .models import (
+    Employee, Equipment, Schedule, EmployeeEquipmentSkill, TimeOffRequest,
+    ScheduleGenerationJob
+)
+from .scheduling.bulk import OPERATIONS
+from .scheduling.constraints import check_assignments, make_assignment
 
 User = get_user_model()
 
@@ -39,6 +44,54 @@ class ScheduleSerializer(serializers.ModelSerializer):
         model = Schedule
         fields = ['id', 'employee', 'employee_name', 'equipment', 'equipment_name', 
                  'shift_type', 'date']
+    
+    def validate(self, attrs):
+        def value(field):
+            return attrs[field] if field in attrs else getattr(self.instance, field)
+        
+        violations = check_assignments([make_assignment(
+            value('employee').id,
+            value('equipment').id,
+            value('date'),
+            value('shift_type'),
+            schedule_id=self.instance.id if self.instance else None
+        )])
+        if violations:
+            raise serializers.ValidationError([violation['message'] for violation in violations])
+        return attrs
+
+class ScheduleAssignmentSerializer(serializers.Serializer):
+    """A proposed assignment to check, id is set when it changes an existing entry"""
+    id = serializers.IntegerField(required=False, allow_null=True)
+    employee = serializers.IntegerField()
+    equipment = serializers.IntegerField()
+    date = serializers.DateField()
+    shift_type = serializers.CharField()
+    
+    def to_assignment(self, data):
+        return make_assignment(data['employee'], data['equipment'], data['date'], data['shift_type'], schedule_id=data.get('id'))
+
+class ScheduleOperationSerializer(serializers.Serializer):
+    """One operation of a bulk schedule edit, see api.scheduling.bulk"""
+    REQUIRED_FIELDS = {
+        'create': ['employee', 'equipment', 'date', 'shift_type'],
+        'update': ['id'],
+        'move': ['id', 'date'],
+        'delete': ['id'],
+    }
+    
+    op = serializers.ChoiceField(choices=OPERATIONS)
+    id = serializers.IntegerField(required=False)
+    employee = serializers.IntegerField(required=False)
+    equipment = serializers.IntegerField(required=False)
+    date = serializers.DateField(required=False)
+    shift_type = serializers.CharField(required=False)
+    
+    def validate(self, attrs):
+        missing = [field for field in self.REQUIRED_FIELDS[attrs['op']] if field not in attrs]
+        if missing:
+            raise serializers.ValidationError({field: "This field is required." for field in missing})
+        return attrs
 
 class TimeOffRequestSerializer(serializers.ModelSerializer):
     employee_name = serializers.ReadOnlyField(source='employee.full_name')
@@ -47,3 +100,13 @@ class TimeOffRequestSerializer(serializers.ModelSerializer):
         model = TimeOffRequest
         fields = ['id', 'employee', 'employee_name', 'start_date', 'end_date', 
                  'reason', 'priority', 'status', 'manager_comment', 'created_at']
+
+class ScheduleGenerationJobSerializer(serializers.ModelSerializer):
+    status_display = serializers.ReadOnlyField(source='get_status_display')
+    
+    class Meta:
+        model = ScheduleGenerationJob
+        fields = ['id', 'method', 'status', 'status_display', 'start_date', 'end_date',
+                 'created_by', 'progress', 'phase', 'phase_timings', 'created_count',
+                 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
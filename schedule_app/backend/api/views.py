@@ -1,57 +1,266 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from datetime import datetime, timedelta
-import random
+from django.db.models import Prefetch, Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from datetime import date, datetime
+from functools import partial
+import hashlib
+import time
 
 from .models import (
-    Employee, Equipment, Schedule, EmployeeEquipmentSkill, TimeOffRequest
+    Employee, Equipment, Schedule, EmployeeEquipmentSkill, TimeOffRequest,
+    ScheduleGenerationJob
 )
+from .pagination import ScheduleKeysetPagination, TimeOffKeysetPagination
+from .scheduling.bulk import apply_schedule_operations
+from .scheduling.cache import invalidate_all_schedule_months, invalidate_schedule_months, schedule_version
+from .scheduling.constraints import check_assignments
+from .scheduling.export import month_columns
+from .scheduling.generator import get_available_employees
+from .scheduling.jobs import MAX_PERIOD_DAYS, enqueue_generation_job
+from .scheduling.time_off import overlapping_time_off
+from .scheduling.work_calendar import month_bounds
 from .serializers import (
     EmployeeSerializer, EquipmentSerializer, ScheduleSerializer,
     EmployeeEquipmentSkillSerializer, TimeOffRequestSerializer,
-    UserSerializer
+    UserSerializer, ScheduleGenerationJobSerializer, ScheduleAssignmentSerializer,
+    ScheduleOperationSerializer
 )
 
 User = get_user_model()
 
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValidationError({name: "Invalid date format, expected YYYY-MM-DD"})
+
+def _ids_param(request, name):
+    """Comma separated ids, e.g. ?employee=3,7"""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return [int(item) for item in value.split(',') if item]
+    except ValueError:
+        raise ValidationError({name: "Expected comma separated ids"})
+
+def _choices_param(request, name, choices):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    values = [item for item in value.split(',') if item]
+    unknown = set(values) - {choice for choice, _ in choices}
+    if unknown:
+        raise ValidationError({name: f"Unknown values: {', '.join(sorted(unknown))}"})
+    return values
+
+def _month_param(request):
+    """?year= and ?month=, the current month by default"""
+    today = date.today()
+    try:
+        year = int(request.query_params.get('year', today.year))
+        month = int(request.query_params.get('month', today.month))
+    except ValueError:
+        raise ValidationError({"month": "Year and month must be numbers"})
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        raise ValidationError({"month": "Invalid year or month"})
+    return year, month
+
+class RequestEmployeeMixin:
+    """Looks the requesting user's employee up once per request instead of once per check"""
+    
+    def get_request_employee(self):
+        if not hasattr(self.request, '_request_employee'):
+            user = self.request.user
+            self.request._request_employee = (
+                Employee.objects.filter(user_id=user.pk).first() if user.is_authenticated else None
+            )
+        return self.request._request_employee
+    
+    def is_manager_request(self):
+        employee = self.get_request_employee()
+        return employee is not None and employee.role == 'manager'
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(RequestEmployeeMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'employee') and user.employee.role == 'manager':
-            return Employee.objects.all()
-        return Employee.objects.filter(user=user)
+        queryset = Employee.objects.select_related('user').prefetch_related(
+            Prefetch('equipment_skills', queryset=EmployeeEquipmentSkill.objects.select_related('equipment'))
+        )
+        if self.is_manager_request():
+            return queryset
+        return queryset.filter(user=self.request.user)
+    
+    # Employees appear on every schedule page, so any change to them is a change of all months
+    def perform_create(self, serializer):
+        serializer.save()
+        invalidate_all_schedule_months()
+    
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate_all_schedule_months()
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_all_schedule_months()
 
 class EquipmentViewSet(viewsets.ModelViewSet):
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    
+    def perform_create(self, serializer):
+        serializer.save()
+        invalidate_all_schedule_months()
+    
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate_all_schedule_months()
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_all_schedule_months()
 
-class ScheduleViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(RequestEmployeeMixin, viewsets.ModelViewSet):
+    """Schedule entries, filtered by ?start_date, end_date, employee, equipment and shift_type"""
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ScheduleKeysetPagination
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'employee') and user.employee.role == 'manager':
-            return Schedule.objects.all()
-        return Schedule.objects.filter(employee__user=user)
+        queryset = Schedule.objects.select_related('employee', 'equipment')
+        if self.is_manager_request():
+            return queryset
+        return queryset.filter(employee=self.get_request_employee())
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+        
+        start_date = _date_param(self.request, 'start_date')
+        end_date = _date_param(self.request, 'end_date')
+        employee_ids = _ids_param(self.request, 'employee')
+        equipment_ids = _ids_param(self.request, 'equipment')
+        shift_types = _choices_param(self.request, 'shift_type', Schedule.SHIFT_TYPES)
+        
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        if employee_ids is not None:
+            queryset = queryset.filter(employee_id__in=employee_ids)
+        if equipment_ids is not None:
+            queryset = queryset.filter(equipment_id__in=equipment_ids)
+        if shift_types is not None:
+            queryset = queryset.filter(shift_type__in=shift_types)
+        return queryset.order_by('date', 'id')
+    
+    def perform_create(self, serializer):
+        schedule = serializer.save()
+        invalidate_schedule_months(schedule.date)
+    
+    def perform_update(self, serializer):
+        old_date = serializer.instance.date
+        schedule = serializer.save()
+        invalidate_schedule_months(old_date)
+        invalidate_schedule_months(schedule.date)
+    
+    def perform_destroy(self, instance):
+        date = instance.date
+        instance.delete()
+        invalidate_schedule_months(date)
+    
+    def conditional_response(self, request, start_date, end_date, build):
+        """build() unless the client's copy of the schedule between the dates is still current, then 304.
+        
+        ETag and Last-Modified come from schedule_version(), so answering a
+        matching revalidation costs the employee lookup and one query on the
+        change counters, the schedule itself is not read.
+        """
+        version, changed_at = schedule_version(start_date, end_date)
+        # Staff only see their own shifts, so the validators differ per employee
+        scope = 'all' if self.is_manager_request() else getattr(self.get_request_employee(), 'id', None)
+        etag = quote_etag(hashlib.md5(f'{scope}:{request.get_full_path()}:{version}'.encode()).hexdigest())
+        # Last-Modified has whole seconds, so it is only sent once the second of
+        # the latest change is over and any later change moves it forward
+        last_modified = None
+        if changed_at and int(changed_at.timestamp()) < int(time.time()):
+            last_modified = int(changed_at.timestamp())
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = build()
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            _date_param(request, 'start_date'),
+            _date_param(request, 'end_date'),
+            partial(super().list, request, *args, **kwargs)
+        )
+    
+    @action(detail=False, methods=['get'])
+    def month(self, request):
+        """The whole month in a compact columnar form, see month_columns(); supports ETag and Last-Modified"""
+        year, month = _month_param(request)
+        start_date, end_date = month_bounds(year, month)
+        return self.conditional_response(
+            request,
+            start_date,
+            end_date,
+            lambda: Response(month_columns(self.get_queryset(), year, month))
+        )
+    
+    @action(detail=False, methods=['post'], url_path='validate', url_name='validate')
+    def validate_assignments(self, request):
+        """Check a batch of proposed assignments without saving them, e.g. a drag-and-drop preview"""
+        serializer = ScheduleAssignmentSerializer(data=request.data.get('assignments', []), many=True)
+        serializer.is_valid(raise_exception=True)
+        
+        violations = check_assignments([serializer.child.to_assignment(data) for data in serializer.validated_data])
+        return Response({"valid": not violations, "violations": violations}, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Apply a batch of create/update/move/delete operations in one transaction, all or nothing"""
+        if not self.is_manager_request():
+            return Response({"error": "Only managers can edit the schedule"}, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = ScheduleOperationSerializer(data=request.data.get('operations', []), many=True)
+        serializer.is_valid(raise_exception=True)
+        
+        applied, results = apply_schedule_operations(serializer.validated_data)
+        return Response(
+            {"applied": applied, "results": results},
+            status=status.HTTP_200_OK if applied else status.HTTP_400_BAD_REQUEST
+        )
     
     @action(detail=False, methods=['post'])
     def generate_schedule(self, request):
-        """Generate schedule for a date range"""
+        """Queue schedule generation for a date range, poll the returned job under schedule-jobs"""
         start_date_str = request.data.get('start_date')
         end_date_str = request.data.get('end_date')
         
@@ -64,126 +273,72 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({"error": "Invalid date format"}, status=status.HTTP_400_BAD_REQUEST)
         
-        Schedule.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        method = request.data.get('method', 'random')
+        if method not in dict(ScheduleGenerationJob.METHOD_CHOICES):
+            return Response({"error": "Unknown generation method"}, status=status.HTTP_400_BAD_REQUEST)
         
-        employees = Employee.objects.all()
-        equipment_list = Equipment.objects.all()
+        if end_date < start_date:
+            return Response({"error": "End date cannot be before start date"}, status=status.HTTP_400_BAD_REQUEST)
         
-        current_date = start_date
-        while current_date <= end_date:
-            for equipment in equipment_list:
-                if equipment.shift_morning:
-                    available_employees = self._get_available_employees(employees, current_date, 'morning', equipment)
-                    if available_employees:
-                        employee = random.choice(available_employees)
-                        Schedule.objects.create(
-                            employee=employee,
-                            equipment=equipment,
-                            date=current_date,
-                            shift_type='morning'
-                        )
-                
-                if equipment.shift_evening:
-                    available_employees = self._get_available_employees(employees, current_date, 'evening', equipment)
-                    if available_employees:
-                        employee = random.choice(available_employees)
-                        Schedule.objects.create(
-                            employee=employee,
-                            equipment=equipment,
-                            date=current_date,
-                            shift_type='evening'
-                        )
-                
-                if equipment.shift_night:
-                    available_employees = self._get_available_employees(employees, current_date, 'night', equipment)
-                    if available_employees:
-                        employee = random.choice(available_employees)
-                        Schedule.objects.create(
-                            employee=employee,
-                            equipment=equipment,
-                            date=current_date,
-                            shift_type='night'
-                        )
-            
-            current_date += timedelta(days=1)
+        max_days = MAX_PERIOD_DAYS.get(method)
+        if max_days is not None and (end_date - start_date).days + 1 > max_days:
+            return Response(
+                {"error": f"Period cannot be longer than {max_days} days for the {method} method"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response({"message": "Schedule generated successfully"}, status=status.HTTP_200_OK)
+        job = enqueue_generation_job(start_date, end_date, created_by=request.user, method=method)
+        return Response(ScheduleGenerationJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
     
     def _get_available_employees(self, employees, date, shift_type, equipment):
         """Get available employees for a specific date, shift and equipment"""
-        skilled_employees = []
-        for employee in employees:
-            skills = EmployeeEquipmentSkill.objects.filter(employee=employee, equipment=equipment)
-            if skills.exists():
-                skilled_employees.append(employee)
-        
-        available_employees = []
-        for employee in skilled_employees:
-            time_off_requests = TimeOffRequest.objects.filter(
-                employee=employee,
-                start_date__lte=date,
-                end_date__gte=date,
-                status='approved'
-            )
-            
-            if time_off_requests.exists():
-                continue
-            
-            schedules = Schedule.objects.filter(employee=employee, date=date)
-            if schedules.exists():
-                continue
-            
-            if employee.last_work_day_prev_month:
-                if date.day == 1:
-                    if date.month == 1: 
-                        prev_month_year = date.year - 1
-                        prev_month = 12  
-                    else:
-                        prev_month_year = date.year
-                        prev_month = date.month - 1
-                    
-                    if prev_month in [4, 6, 9, 11]:
-                        last_day = 30
-                    elif prev_month == 2:
-                        if prev_month_year % 4 == 0 and (prev_month_year % 100 != 0 or prev_month_year % 400 == 0):
-                            last_day = 29
-                        else:
-                            last_day = 28
-                    else:  # 31 день
-                        last_day = 31
-                    
-                    if employee.last_work_day_prev_month.month == prev_month and employee.last_work_day_prev_month.day == last_day:
-                        continue
-            
-            prev_day_schedules = Schedule.objects.filter(employee=employee, date=date - timedelta(days=1))
-            if prev_day_schedules.exists():
-                continue
-            
-            available_employees.append(employee)
-        
-        return available_employees
+        return get_available_employees(employees, date, shift_type, equipment)
 
-class EmployeeEquipmentSkillViewSet(viewsets.ModelViewSet):
+class EmployeeEquipmentSkillViewSet(RequestEmployeeMixin, viewsets.ModelViewSet):
     queryset = EmployeeEquipmentSkill.objects.all()
     serializer_class = EmployeeEquipmentSkillSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'employee') and user.employee.role == 'manager':
-            return EmployeeEquipmentSkill.objects.all()
-        return EmployeeEquipmentSkill.objects.filter(employee__user=user)
+        queryset = EmployeeEquipmentSkill.objects.select_related('equipment')
+        if self.is_manager_request():
+            return queryset
+        return queryset.filter(employee=self.get_request_employee())
 
-class TimeOffRequestViewSet(viewsets.ModelViewSet):
+class TimeOffRequestViewSet(RequestEmployeeMixin, viewsets.ModelViewSet):
+    """Time off requests, filtered by ?start_date and end_date (overlap), employee and status"""
     queryset = TimeOffRequest.objects.all()
     serializer_class = TimeOffRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimeOffKeysetPagination
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'employee') and user.employee.role == 'manager':
-            return TimeOffRequest.objects.all()
-        return TimeOffRequest.objects.filter(employee__user=user)
+        queryset = TimeOffRequest.objects.select_related('employee')
+        if self.is_manager_request():
+            return queryset
+        return queryset.filter(employee=self.get_request_employee())
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+        
+        start_date = _date_param(self.request, 'start_date')
+        end_date = _date_param(self.request, 'end_date')
+        employee_ids = _ids_param(self.request, 'employee')
+        statuses = _choices_param(self.request, 'status', TimeOffRequest.STATUS_CHOICES)
+        
+        if start_date and end_date:
+            queryset = overlapping_time_off(start_date, end_date, queryset)
+        elif start_date:
+            queryset = queryset.filter(end_date__gte=start_date)
+        elif end_date:
+            queryset = queryset.filter(start_date__lte=end_date)
+        if employee_ids is not None:
+            queryset = queryset.filter(employee_id__in=employee_ids)
+        if statuses is not None:
+            queryset = queryset.filter(status__in=statuses)
+        return queryset.order_by('start_date', 'id')
     
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -200,3 +355,14 @@ class TimeOffRequestViewSet(viewsets.ModelViewSet):
         time_off_request.status = 'rejected'
         time_off_request.save()
         return Response({"message": "Time off request rejected"}, status=status.HTTP_200_OK)
+
+class ScheduleGenerationJobViewSet(RequestEmployeeMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ScheduleGenerationJob.objects.all()
+    serializer_class = ScheduleGenerationJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        user = self.request.user
+        if self.is_manager_request():
+            return ScheduleGenerationJob.objects.all()
+        return ScheduleGenerationJob.objects.filter(created_by=user)
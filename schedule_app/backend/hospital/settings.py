@@ -176,3 +176,31 @@ MESSAGE_TAGS = {
     messages.WARNING: 'alert-warning',
     messages.ERROR: 'alert-danger',
 }
+
+SCHEDULE_ASSIGNMENT_ENGINE = os.environ.get('SCHEDULE_ASSIGNMENT_ENGINE', 'hungarian')
+# Public holidays taken out of the working days that set the monthly norm of hours: 'none' or 'ru'.
+# 'ru' lowers the norm of months with weekday holidays
+SCHEDULE_HOLIDAY_CALENDAR = os.environ.get('SCHEDULE_HOLIDAY_CALENDAR', 'none')
+
+# Background schedule generation: jobs run on an in-process thread pool, no broker needed
+SCHEDULE_JOB_WORKERS = int(os.environ.get('SCHEDULE_JOB_WORKERS', '1'))
+SCHEDULE_JOB_TIMEOUT = int(os.environ.get('SCHEDULE_JOB_TIMEOUT', '600'))
+SCHEDULE_JOBS_RUN_INLINE = os.environ.get('SCHEDULE_JOBS_RUN_INLINE', 'False') == 'True'
+# Equipment groups without shared staff are assigned in this many worker processes
+SCHEDULE_GENERATION_PROCESSES = int(os.environ.get('SCHEDULE_GENERATION_PROCESSES', '1'))
+
+# Schedule versions are stored as deltas against the previous version of the same period,
+# with a full copy every SCHEDULE_VERSION_MAX_CHAIN versions
+SCHEDULE_VERSION_MAX_CHAIN = int(os.environ.get('SCHEDULE_VERSION_MAX_CHAIN', '10'))
+# Versions kept per period by the compact_schedule_versions command
+SCHEDULE_VERSION_KEEP = int(os.environ.get('SCHEDULE_VERSION_KEEP', '20'))
+
+# Rendered schedule calendars are cached per month. Use a shared backend (FileBasedCache,
+# Memcached, Redis) when running several processes, so invalidation reaches all of them
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'hospital-calendar'),
+    }
+}
+SCHEDULE_CALENDAR_CACHE_TIMEOUT = int(os.environ.get('SCHEDULE_CALENDAR_CACHE_TIMEOUT', '3600'))
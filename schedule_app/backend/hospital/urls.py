@@ -12,11 +12,14 @@ from rest_framework_simplejwt.views import (
 from api.views import (
     EmployeeViewSet, EquipmentViewSet, ScheduleViewSet,
     EmployeeEquipmentSkillViewSet, TimeOffRequestViewSet,
-    UserViewSet
+    UserViewSet, ScheduleGenerationJobViewSet
 )
 
 from hospital import views
-from hospital.views_part2 import employee_work_hours, edit_schedule_entry, restore_schedule_version, move_schedule_entry
+from hospital.views_part2 import (
+    employee_work_hours, edit_schedule_entry, restore_schedule_version, move_schedule_entry,
+    schedule_generation_job_status
+)
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
@@ -25,6 +28,7 @@ router.register(r'equipment', EquipmentViewSet)
 router.register(r'schedules', ScheduleViewSet)
 router.register(r'skills', EmployeeEquipmentSkillViewSet)
 router.register(r'time-off-requests', TimeOffRequestViewSet)
+router.register(r'schedule-jobs', ScheduleGenerationJobViewSet)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -51,6 +55,7 @@ urlpatterns = [
     path('manager-schedule/', views.manager_schedule, name='manager_schedule'),
     
     path('schedule-generator/', views.schedule_generator, name='schedule_generator'),
+    path('schedule-generator/jobs/<int:job_id>/', schedule_generation_job_status, name='schedule_generation_job_status'),
     path('schedule/create/', views.create_schedule_entry, name='create_schedule_entry'),
     path('schedule/edit/<int:entry_id>/', edit_schedule_entry, name='edit_schedule_entry'),
     path('schedule/delete/<int:entry_id>/', views.delete_schedule_entry, name='delete_schedule_entry'),
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+import hashlib
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate, logout, get_user_model
@@ -7,7 +8,7 @@ from django.http import HttpResponseRedirect, JsonResponse
 from django.urls import reverse
 from django.utils import timezone
 from django.db.models import Q
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth.views import (
     PasswordResetView, PasswordResetDoneView, 
@@ -18,6 +19,8 @@ from django.contrib.auth.views import (
 from api.models import (
     Employee, Equipment, Schedule, EmployeeEquipmentSkill, TimeOffRequest
 )
+from api.scheduling.cache import get_or_build_calendar, invalidate_all_schedule_months, schedule_version
+from api.scheduling.work_calendar import month_bounds, month_after, month_before, period_bounds, week_bounds
 from api.views import ScheduleViewSet
 from .forms import (
     CustomUserCreationForm, ManagerRegistrationForm, EmployeeRegistrationForm,
@@ -44,6 +47,36 @@ def manager_required(view_func):
         return view_func(request, *args, **kwargs)
     return wrapper
 
+def schedule_page_etag(request):
+    """ETag of a schedule calendar page, for conditional GETs of polling clients.
+
+    Besides the schedule version of the shown period the page depends on the
+    query string, the user, today's date and the CSRF token, so they all go
+    into the tag. While flash messages wait to be shown there is no tag and
+    the page is always rendered.
+    """
+    if len(messages.get_messages(request)):
+        return None
+    
+    try:
+        current_date = datetime.strptime(request.GET.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        current_date = timezone.now().date()
+    start_date, end_date = period_bounds(current_date, request.GET.get('view', 'month'))
+    
+    version, _ = schedule_version(start_date, end_date)
+    employee = getattr(request.user, 'employee', None)
+    key = (
+        request.get_full_path(),
+        request.user.pk,
+        request.user.email,
+        employee and (employee.full_name, employee.role),
+        timezone.now().date(),
+        request.META.get('CSRF_COOKIE'),
+        version
+    )
+    return hashlib.md5(repr(key).encode()).hexdigest()
+
 def logout_view(request):
     logout(request)
     messages.success(request, "Вы успешно вышли из системы.")
@@ -73,6 +106,7 @@ def register(request):
                 phone=form.cleaned_data.get('phone') if role == 'staff' else None,
                 role=role
             )
+            invalidate_all_schedule_months()
             
             email = form.cleaned_data.get('email')
             password = form.cleaned_data.get('password1')
@@ -95,6 +129,7 @@ def profile(request):
         form = ProfileForm(request.POST, instance=employee)
         if form.is_valid():
             form.save()
+            invalidate_all_schedule_months()
             messages.success(request, "Профиль успешно обновлен!")
             return redirect('profile')
     else:
@@ -151,6 +186,7 @@ def home(request):
         return redirect('my_schedule')
 
 @login_required
+@condition(etag_func=schedule_page_etag)
 def my_schedule(request):
     view_mode = request.GET.get('view', 'month')
     date_str = request.GET.get('date')
@@ -160,32 +196,12 @@ def my_schedule(request):
     except ValueError:
         current_date = timezone.now().date()
     
+    start_date, end_date = period_bounds(current_date, view_mode)
     if view_mode == 'month':
-        year = current_date.year
-        month = current_date.month
-        start_date = datetime(year, month, 1).date()
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
-        
-        if month == 1:
-            prev_date = datetime(year - 1, 12, 1).date()
-        else:
-            prev_date = datetime(year, month - 1, 1).date()
-            
-        if month == 12:
-            next_date = datetime(year + 1, 1, 1).date()
-        else:
-            next_date = datetime(year, month + 1, 1).date()
-            
+        prev_date = datetime(*month_before(current_date.year, current_date.month), 1).date()
+        next_date = datetime(*month_after(current_date.year, current_date.month), 1).date()
         header_text = current_date.strftime('%B %Y')
     else:
-        day = current_date.day
-        weekday = current_date.weekday()
-        start_date = current_date - timedelta(days=weekday)
-        end_date = start_date + timedelta(days=6)
-        
         prev_date = current_date - timedelta(days=7)
         next_date = current_date + timedelta(days=7)
         
@@ -202,35 +218,12 @@ def my_schedule(request):
     )
     
     day_names = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
-    calendar_days = generate_calendar_days(current_date, view_mode)
-    calendar_rows = []
-    
-    if view_mode == 'month':
-        for i in range(0, len(calendar_days), 7):
-            calendar_rows.append(calendar_days[i:i+7])
-    else:
-        calendar_rows = [calendar_days]
-    
-    for schedule in schedules:
-        date_str = schedule.date.isoformat()
-        for row in calendar_rows:
-            for cell in row:
-                if cell['date'] and cell['date'].isoformat() == date_str:
-                    if 'shifts' not in cell:
-                        cell['shifts'] = []
-                    
-                    shift_info = get_shift_info(schedule.shift_type)
-                    
-                    cell['shifts'].append({
-                        'id': schedule.id,
-                        'employee_name': schedule.employee.full_name,
-                        'equipment_name': schedule.equipment.name,
-                        'shift_type': schedule.shift_type,
-                        'shift_label': shift_info['label'],
-                        'shift_time': shift_info['time'],
-                        'color': shift_info['color'],
-                        'date': schedule.date
-                    })
+    calendar_rows = get_or_build_calendar(
+        start_date,
+        end_date,
+        ('employee', employee.id, view_mode, current_date.month),
+        lambda: build_calendar_rows(current_date, view_mode, schedules)
+    )
     
     context = {
         'view_mode': view_mode,
@@ -249,13 +242,10 @@ def generate_calendar_days(current_date, view_mode):
     """Generate calendar days for the given date and view mode"""
     year = current_date.year
     month = current_date.month
+    today = datetime.now().date()
     
     if view_mode == 'month':
-        first_day = datetime(year, month, 1).date()
-        if month == 12:
-            last_day = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            last_day = datetime(year, month + 1, 1).date() - timedelta(days=1)
+        first_day, last_day = month_bounds(year, month)
         
         # 0 = Monday, 6 = Sunday
         first_day_of_week = first_day.weekday()
@@ -265,12 +255,12 @@ def generate_calendar_days(current_date, view_mode):
         for i in range(first_day_of_week):
             days.append({'date': None, 'is_current_month': False})
         
-        for day in range(1, last_day.day + 1):
-            date = datetime(year, month, day).date()
+        for day in range(last_day.day):
+            date = first_day + timedelta(days=day)
             days.append({
                 'date': date,
                 'is_current_month': True,
-                'is_today': date == datetime.now().date()
+                'is_today': date == today
             })
         
         last_day_of_week = last_day.weekday()
@@ -279,9 +269,7 @@ def generate_calendar_days(current_date, view_mode):
         
         return days
     else:
-        day = current_date.day
-        weekday = current_date.weekday()
-        start_day = current_date - timedelta(days=weekday)
+        start_day, _ = week_bounds(current_date)
         
         days = []
         for i in range(7):
@@ -289,19 +277,50 @@ def generate_calendar_days(current_date, view_mode):
             days.append({
                 'date': date,
                 'is_current_month': date.month == current_date.month,
-                'is_today': date == datetime.now().date()
+                'is_today': date == today
             })
         
         return days
 
+SHIFT_INFO = {
+    'morning': {'label': 'Утро', 'time': '8:00-14:00', 'color': 'success'},
+    'evening': {'label': 'Вечер', 'time': '14:00-20:00', 'color': 'primary'},
+    'night': {'label': 'Ночь', 'time': '20:00-8:00', 'color': 'danger'}
+}
+
 def get_shift_info(shift_type):
-    shift_types = {
-        'morning': {'label': 'Утро', 'time': '8:00-14:00', 'color': 'success'},
-        'evening': {'label': 'Вечер', 'time': '14:00-20:00', 'color': 'primary'},
-        'night': {'label': 'Ночь', 'time': '20:00-8:00', 'color': 'danger'}
-    }
+    return SHIFT_INFO.get(shift_type, {'label': shift_type, 'time': '', 'color': 'secondary'})
+
+def build_calendar_rows(current_date, view_mode, schedules):
+    """
+    Calendar rows for the view with every schedule placed into the cell of its date.
+    The schedules are read in one query together with the employee and equipment names
+    and grouped by date, so the cells are filled in a single pass over the days.
+    """
+    shifts_by_date = {}
+    for schedule_id, schedule_date, shift_type, employee_name, equipment_name in schedules.values_list(
+        'id', 'date', 'shift_type', 'employee__full_name', 'equipment__name'
+    ):
+        shift_info = get_shift_info(shift_type)
+        shifts_by_date.setdefault(schedule_date, []).append({
+            'id': schedule_id,
+            'employee_name': employee_name,
+            'equipment_name': equipment_name,
+            'shift_type': shift_type,
+            'shift_label': shift_info['label'],
+            'shift_time': shift_info['time'],
+            'color': shift_info['color'],
+            'date': schedule_date
+        })
     
-    return shift_types.get(shift_type, {'label': shift_type, 'time': '', 'color': 'secondary'})
+    calendar_days = generate_calendar_days(current_date, view_mode)
+    for cell in calendar_days:
+        if cell['date'] in shifts_by_date:
+            cell['shifts'] = shifts_by_date[cell['date']]
+    
+    if view_mode == 'month':
+        return [calendar_days[i:i + 7] for i in range(0, len(calendar_days), 7)]
+    return [calendar_days]
 
 from .views_part2 import (
     manager_schedule, schedule_generator, time_off_requests, time_off_request_new,
@@ -181,4 +181,10 @@ CREATE INDEX IF NOT EXISTS "api_employeeequipmentskill_employee_id_idx" ON "api_
 CREATE INDEX IF NOT EXISTS "api_employeeequipmentskill_equipment_id_idx" ON "api_employeeequipmentskill" ("equipment_id");
 CREATE INDEX IF NOT EXISTS "api_schedule_employee_id_idx" ON "api_schedule" ("employee_id");
 CREATE INDEX IF NOT EXISTS "api_schedule_equipment_id_idx" ON "api_schedule" ("equipment_id");
-CREATE INDEX IF NOT EXISTS "api_timeoffrequest_employee_id_idx" ON "api_timeoffrequest" ("employee_id");
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS "api_timeoffrequest_employee_id_idx" ON "api_timeoffrequest" ("employee_id");
+CREATE INDEX IF NOT EXISTS "schedule_employee_day_shift" ON "api_schedule" ("employee_id", "date", "shift_type");
+CREATE INDEX IF NOT EXISTS "schedule_day_covering" ON "api_schedule" ("date", "employee_id", "equipment_id", "shift_type");
+CREATE INDEX IF NOT EXISTS "timeoff_employee_status_dates" ON "api_timeoffrequest" ("employee_id", "status", "start_date", "end_date");
+CREATE INDEX IF NOT EXISTS "timeoff_dates" ON "api_timeoffrequest" ("start_date", "end_date");
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+CREATE INDEX IF NOT EXISTS "timeoff_employee_period_gist" ON "api_timeoffrequest" USING gist ("employee_id", daterange("start_date", "end_date", '[]'));